@@ -16,7 +16,7 @@ if %errorlevel% neq 0 (
     echo.
     echo [!] Python is not installed or not in PATH!
     echo.
-    echo Please install Python 3.7 or higher from:
+    echo Please install Python 3.9 or higher from:
     echo https://www.python.org/downloads/
     echo.
     echo IMPORTANT: Check "Add Python to PATH" during installation
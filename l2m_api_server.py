@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Lineage2M API Server
+Local asyncio HTTP/JSON service for the calculators, timers and routes
+"""
+
+import asyncio
+import http.client
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from l2m_rate_tables import karma_boost, diamond_cost_per_attempt
+from l2m_cost_distribution import DEFAULT_TUMBAL_PRICE
+from l2m_yield_model import BUFFS
+from l2m_export import json_default
+from l2m_history_store import DEFAULT_CHARACTER
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CACHE_SIZE = 4096
+MAX_HEADER_BYTES = 16 * 1024
+
+TRUE_FLAGS = {'y', 'yes', 'true', '1'}
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               500: 'Internal Server Error'}
+
+
+def _flag(text):
+    return text.strip().lower() in TRUE_FLAGS
+
+
+def _buffs(text):
+    """'party,event' → ('event', 'party'); order and duplicates do not matter"""
+    buffs = tuple(sorted({b.strip().lower() for b in text.split(',') if b.strip()}))
+    unknown = set(buffs) - set(BUFFS)
+    if unknown:
+        raise ValueError(f"Unknown buffs: {sorted(unknown)}")
+    return buffs
+
+
+def _region(text):
+    return text.strip().upper() or None
+
+
+def encode(payload):
+    return json.dumps(payload, default=json_default, separators=(',', ':')).encode()
+
+
+class L2MResponseCache:
+    """LRU of encoded response bodies with per-entry expiry"""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        body, expires = entry
+        if expires is not None and now >= expires:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return body
+
+    def clear(self):
+        self._entries.clear()
+
+    def put(self, key, body, expires=None):
+        self._entries[key] = (body, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+class L2MAPIServer:
+    """HTTP/1.1 keep-alive JSON server over a master optimizer instance
+
+    Every endpoint declares its parameters as {name: (cast, default)},
+    default None meaning required; a request's query string is cast and
+    completed with defaults, so equivalent requests ('event=yes' vs
+    'event=1', reordered buffs) share one cache key. Time-dependent endpoints also have a TTL: the key
+    carries the current TTL bucket (epoch seconds // ttl) and the entry
+    expires at the bucket's end, so answers change on bucket boundaries
+    instead of drifting per request. Concurrent misses on one key await
+    a single computation. Computations run on one worker thread, which
+    keeps the calculators single-threaded while cache hits are served
+    from the event loop. Actions (POST, e.g. /kill) change state: they
+    are never cached and clear the response cache.
+    """
+
+    def __init__(self, app, host=DEFAULT_HOST, port=DEFAULT_PORT, cache_size=CACHE_SIZE):
+        self.app = app
+        self.analyzer = app.epic_analyzer
+        self.host = host
+        self.port = port
+        self.cache = L2MResponseCache(cache_size)
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'coalesced': 0, 'errors': 0}
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._server = None
+
+        region = (_region, '')
+        self.endpoints = {
+            '/rate': (self.rate, {
+                'grade': (str.lower, None), 'level': (int, None),
+                'tumbal': (int, 0), 'event': (_flag, False)
+            }, None),
+            '/cost': (self.cost, {
+                'grade': (str.lower, None), 'start': (int, None), 'target': (int, None),
+                'tumbal': (int, 0), 'event': (_flag, False),
+                'tumbal_price': (int, DEFAULT_TUMBAL_PRICE), 'item_price': (int, 0)
+            }, None),
+            '/bosses': (self.bosses, {'days': (int, 7), 'region': region}, 60),
+            '/field-bosses': (self.field_bosses, {'count': (int, 10), 'region': region}, 60),
+            '/field-bosses/up': (self.field_bosses_up, {
+                'count': (int, 5), 'within': (int, 15), 'region': region
+            }, 60),
+            '/day': (self.day, {'region': region}, 3600),
+            '/report': (self.report, {'region': region}, 60),
+            '/route': (self.route, {
+                'level': (int, None), 'hours': (int, 4), 'buffs': (_buffs, ()), 'region': region
+            }, 3600),
+            '/streak': (self.streak, {
+                'character': (str.strip, DEFAULT_CHARACTER), 'channel': (str.strip, '')
+            }, None)
+        }
+        self.actions = {
+            '/kill': (self.kill, {'boss': (str.strip, None), 'channel': (str.strip, ''), 'region': region}),
+            '/attempt': (self.attempt, {
+                'grade': (str.lower, None), 'level': (int, None), 'outcome': (str.lower, None),
+                'tumbal': (int, 0), 'event': (_flag, False), 'is_tumbal': (_flag, False),
+                'channel': (str.strip, ''), 'character': (str.strip, DEFAULT_CHARACTER)
+            })
+        }
+
+    # Endpoints: plain functions of normalized parameters returning JSON-able dicts
+
+    def rate(self, grade, level, tumbal, event):
+        table = self.app.rate_table
+        g, l = table.grade_index(grade), table.level_index(level)
+        if tumbal < 0:
+            raise ValueError("tumbal must be >= 0")
+        final = float(table.final_rate(g, l, tumbal, event))
+        cost = diamond_cost_per_attempt(level)
+        return {
+            'grade': grade,
+            'level': level,
+            'tumbal': tumbal,
+            'event': event,
+            'base_rate': table.base_rate(grade, level),
+            'destroy_rate': table.destroy_rate(grade, level),
+            'karma_boost': karma_boost(tumbal),
+            'final_rate': final,
+            'expected_attempts': 1 / final,
+            'expected_diamonds': cost / final
+        }
+
+    def cost(self, grade, start, target, tumbal, event, tumbal_price, item_price):
+        dist = self.app.cost_distribution.distribution(
+            grade, start, target, tumbal, event, tumbal_price, item_price)
+        return {
+            'grade': grade,
+            'start': start,
+            'target': target,
+            'tumbal': tumbal,
+            'event': event,
+            'mean': dist.mean,
+            'std': dist.std,
+            'quantiles': {f'p{round(q * 100)}': dist.quantile(q) for q in (0.05, 0.5, 0.9, 0.95, 0.99)},
+            'tail_mass': dist.tail_mass
+        }
+
+    def bosses(self, days, region):
+        return {'server_time': self.analyzer.now(region),
+                'timers': self.analyzer.get_boss_timers(days, region)}
+
+    def field_bosses(self, count, region):
+        return {'server_time': self.analyzer.now(region),
+                'timers': self.analyzer.get_field_boss_timers(count, region)}
+
+    def field_bosses_up(self, count, within, region):
+        return {'server_time': self.analyzer.now(region),
+                'likely_up': self.analyzer.get_field_bosses_up(count, within, region)}
+
+    def kill(self, boss, channel, region):
+        rule = self.analyzer.record_field_kill(boss, channel=channel or None, region=region)
+        window_start, window_end = rule.window(rule.spawn)
+        return {'boss': rule.info['boss'], 'channel': rule.info['channel'], 'kill_time': rule.anchor,
+                'spawn_time': rule.spawn, 'window_start': window_start, 'window_end': window_end}
+
+    def attempt(self, grade, level, outcome, tumbal, event, is_tumbal, channel, character):
+        signals = self.app.record_attempt(grade, level, tumbal, outcome, event, is_tumbal,
+                                          channel or None, character)
+        return dict(self.streak(character, channel), signals=signals)
+
+    def streak(self, character, channel):
+        detector = self.app.streak_detector
+        return {'character': character, 'hot': detector.is_hot(character),
+                'channel': channel or None,
+                'channel_hot': detector.is_hot(channel=channel) if channel else None}
+
+    def day(self, region):
+        return self.analyzer.get_current_day_analysis(region)
+
+    def report(self, region):
+        return self.analyzer.generate_daily_report(region)
+
+    def route(self, level, hours, buffs, region):
+        return self.analyzer.plan_farming_route(level, hours, buffs=list(buffs), region=region)
+
+    # Request handling
+
+    def _normalize(self, spec, query):
+        unknown = set(query) - set(spec)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        values = []
+        for name, (cast, default) in spec.items():
+            if name in query:
+                try:
+                    values.append(cast(query[name]))
+                except ValueError as e:
+                    raise ValueError(f"Bad value for {name}: {query[name]} ({e})") from None
+            elif default is None:
+                raise ValueError(f"Missing parameter: {name}")
+            else:
+                values.append(default)
+        return tuple(values)
+
+    async def respond(self, target, method='GET'):
+        """(status, body) for a request target like '/rate?grade=rare&level=8'"""
+        self.stats['requests'] += 1
+        url = urlsplit(target)
+        if url.path in self.actions:
+            if method != 'POST':
+                return 405, encode({'error': f"{url.path} needs POST"})
+            return await self._act(url)
+        if method == 'POST':
+            return 405, encode({'error': f"Method not allowed: {method}"})
+        if url.path == '/stats':
+            return 200, encode(dict(self.stats, cached=len(self.cache), inflight=len(self._inflight)))
+        endpoint = self.endpoints.get(url.path)
+        if endpoint is None:
+            return 404, encode({'error': f"Unknown endpoint: {url.path}",
+                                'endpoints': sorted(self.endpoints) + ['/stats'],
+                                'actions': sorted(self.actions)})
+        handler, spec, ttl = endpoint
+        try:
+            params = self._normalize(spec, dict(parse_qsl(url.query)))
+        except ValueError as e:
+            self.stats['errors'] += 1
+            return 400, encode({'error': str(e)})
+
+        now = time.time()
+        bucket = None if ttl is None else int(now // ttl)
+        key = (url.path, params, bucket)
+        body = self.cache.get(key, now)
+        if body is not None:
+            self.stats['hits'] += 1
+            return 200, body
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats['coalesced'] += 1
+        else:
+            self.stats['misses'] += 1
+            pending = asyncio.ensure_future(self._compute(key, handler, params, ttl, bucket))
+            self._inflight[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _act(self, url):
+        handler, spec = self.actions[url.path]
+        loop = asyncio.get_running_loop()
+        try:
+            params = self._normalize(spec, dict(parse_qsl(url.query)))
+            result = await loop.run_in_executor(self._executor, lambda: handler(*params))
+        except ValueError as e:
+            self.stats['errors'] += 1
+            return 400, encode({'error': str(e)})
+        except Exception as e:
+            self.stats['errors'] += 1
+            return 500, encode({'error': f"{type(e).__name__}: {e}"})
+        self.cache.clear()
+        return 200, encode(result)
+
+    async def _compute(self, key, handler, params, ttl, bucket):
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self._executor, lambda: handler(*params))
+            body = encode(result)
+            self.cache.put(key, body, None if ttl is None else (bucket + 1) * ttl)
+            return 200, body
+        except ValueError as e:
+            self.stats['errors'] += 1
+            return 400, encode({'error': str(e)})
+        except Exception as e:
+            self.stats['errors'] += 1
+            return 500, encode({'error': f"{type(e).__name__}: {e}"})
+        finally:
+            del self._inflight[key]
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until it closes"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(self._response(400, encode({'error': 'Headers too large'}), False))
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ')
+                except ValueError:
+                    writer.write(self._response(400, encode({'error': 'Malformed request line'}), False))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    if name:
+                        headers[name.strip().lower()] = value.strip().lower()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError
+                except ValueError:
+                    writer.write(self._response(400, encode({'error': 'Bad Content-Length'}), False))
+                    break
+                if length:
+                    try:
+                        await reader.readexactly(length)
+                    except (asyncio.IncompleteReadError, ConnectionError):
+                        break
+
+                connection = headers.get('connection', '')
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                if method not in ('GET', 'HEAD', 'POST'):
+                    status, body = 405, encode({'error': f"Method not allowed: {method}"})
+                else:
+                    status, body = await self.respond(target, method)
+                writer.write(self._response(status, body, keep_alive, method == 'HEAD'))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    def _response(self, status, body, keep_alive, head_only=False):
+        header = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                  f"Content-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n"
+                  f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode()
+        return header if head_only else header + body
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self._server
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False)
+
+
+class L2MAPIClient:
+    """Blocking keep-alive client for the local API (bots, scripts, tests)
+
+    Parameters are passed as keywords; lists become comma-separated
+    values and None is left out. Returns (status, decoded JSON).
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=10):
+        self._conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, method, path, **params):
+        query = urlencode({
+            name: ','.join(map(str, value)) if isinstance(value, (list, tuple)) else value
+            for name, value in params.items() if value is not None
+        })
+        self._conn.request(method, f'{path}?{query}' if query else path)
+        response = self._conn.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+
+    def get(self, path, **params):
+        return self.request('GET', path, **params)
+
+    def post(self, path, **params):
+        return self.request('POST', path, **params)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
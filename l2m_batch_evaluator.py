@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Batch Scenario Evaluator
+Streams CSV/JSONL scenarios through the rate tables in vectorized chunks
+"""
+
+import csv
+import json
+from itertools import islice
+
+import numpy as np
+
+from l2m_rate_tables import MIN_LEVEL, MAX_LEVEL
+
+INPUT_FIELDS = ('grade', 'current', 'tumbal', 'event')
+OUTPUT_FIELDS = INPUT_FIELDS + ('final_rate', 'expected_attempts', 'diamond_cost', 'error')
+
+TRUE_FLAGS = {'y', 'yes', 'true', '1'}
+
+
+def detect_format(path, default='csv'):
+    """Guess csv/jsonl from a file name ('-' means stdin/stdout)"""
+    if path and path.lower().endswith(('.jsonl', '.ndjson', '.json')):
+        return 'jsonl'
+    if path and path.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+class L2MBatchEvaluator:
+    """Evaluates scenario rows (grade, current level, tumbal, event flag)
+
+    Rows are read and written in fixed-size chunks so memory stays bounded
+    whatever the input size. Invalid rows are passed through with an error
+    message instead of stopping the batch.
+    """
+
+    def __init__(self, rate_table, chunk_size=100_000):
+        self.rate_table = rate_table
+        self.chunk_size = chunk_size
+        self._grade_index = {grade: i for i, grade in enumerate(rate_table.grades)}
+
+    def evaluate(self, grades, current, tumbal, event):
+        """Vectorized final rate, expected attempts and diamond cost"""
+        grade_idx = np.array([self._grade_index.get(g, -1) for g in grades], dtype=np.int64)
+        current = np.asarray(current, dtype=np.int64)
+        tumbal = np.asarray(tumbal, dtype=np.int64)
+        event = np.asarray(event, dtype=bool)
+
+        valid = (grade_idx >= 0) & (current >= MIN_LEVEL) & (current < MAX_LEVEL) & (tumbal >= 0)
+        g = np.where(valid, grade_idx, 0)
+        l = np.where(valid, current - MIN_LEVEL, 0)
+
+        final_rate = self.rate_table.final_rate(g, l, tumbal, event)
+        attempts = 1.0 / final_rate
+        cost = attempts * self.rate_table.cost[l]
+        return {
+            'final_rate': np.where(valid, final_rate, np.nan),
+            'expected_attempts': np.where(valid, attempts, np.nan),
+            'diamond_cost': np.where(valid, cost, np.nan),
+            'valid': valid
+        }
+
+    def _csv_chunks(self, stream):
+        reader = csv.reader(stream)
+        header = [name.strip().lower() for name in next(reader, [])]
+        missing = [f for f in INPUT_FIELDS if f not in header]
+        if missing:
+            raise ValueError(f"CSV input missing columns: {', '.join(missing)}")
+        indices = [header.index(f) for f in INPUT_FIELDS]
+        width = max(indices) + 1
+
+        def rows():
+            for r in reader:
+                if not r:
+                    continue
+                if len(r) < width:
+                    values = [r[i] if i < len(r) else '' for i in indices]
+                    yield (*values, f"Expected {len(header)} columns, got {len(r)}")
+                else:
+                    yield (*(r[i] for i in indices), '')
+        return self._chunks(rows())
+
+    def _jsonl_chunks(self, stream):
+        def rows():
+            for line in stream:
+                if not line.strip():
+                    continue
+                try:
+                    r = json.loads(line)
+                except ValueError as e:
+                    yield '', '', 0, False, f"Invalid JSON: {e}"
+                    continue
+                if not isinstance(r, dict):
+                    yield '', '', 0, False, f"Expected a JSON object, got {type(r).__name__}"
+                    continue
+                yield r.get('grade'), r.get('current'), r.get('tumbal', 0), r.get('event', False), ''
+        return self._chunks(rows())
+
+    def _chunks(self, rows):
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return
+            yield self._columns(chunk)
+
+    def _columns(self, chunk):
+        """Normalize raw row values into typed columns"""
+        grades, current, tumbal, event, errors = [], [], [], [], []
+        for grade, level, count, flag, error in chunk:
+            grade = str(grade or '').strip().lower()
+            try:
+                level = int(str(level).lstrip('+'))
+                count = int(count or 0)
+            except (TypeError, ValueError):
+                level, count, error = -1, 0, error or 'Invalid level or tumbal count'
+            if isinstance(flag, str):
+                flag = flag.strip().lower() in TRUE_FLAGS
+            grades.append(grade)
+            current.append(level)
+            tumbal.append(count)
+            event.append(bool(flag))
+            errors.append(error)
+        return grades, current, tumbal, event, errors
+
+    def _row_error(self, grade, level, count, error):
+        if error:
+            return error
+        if grade not in self._grade_index:
+            try:
+                self.rate_table.grade_index(grade)
+            except ValueError as e:
+                return str(e)
+        if not MIN_LEVEL <= level < MAX_LEVEL:
+            return f"No enhancement rates for level +{level}"
+        return f"Invalid tumbal count: {count}"
+
+    def run(self, instream, outstream, in_format='csv', out_format='csv'):
+        """Stream scenarios from instream to outstream, returns row count"""
+        chunks = self._jsonl_chunks(instream) if in_format == 'jsonl' else self._csv_chunks(instream)
+        if out_format == 'csv':
+            outstream.write(','.join(OUTPUT_FIELDS) + '\n')
+
+        total = 0
+        for grades, current, tumbal, event, errors in chunks:
+            result = self.evaluate(grades, current, tumbal, event)
+            final_rate = np.round(result['final_rate'], 6).tolist()
+            attempts = np.round(result['expected_attempts'], 4).tolist()
+            cost = np.round(result['diamond_cost'], 2).tolist()
+            lines = []
+            valid = result['valid'] & ~np.array([bool(error) for error in errors])
+            for i, ok in enumerate(valid.tolist()):
+                if ok:
+                    values = (final_rate[i], attempts[i], cost[i], '')
+                else:
+                    values = ('', '', '', self._row_error(grades[i], current[i], tumbal[i], errors[i]))
+                row = (grades[i], current[i], tumbal[i], event[i]) + values
+                if out_format == 'jsonl':
+                    record = dict(zip(OUTPUT_FIELDS, row))
+                    if ok:
+                        del record['error']
+                    lines.append(json.dumps(record))
+                elif ok:
+                    lines.append('%s,%d,%d,%s,%r,%r,%r,' % row[:7])
+                else:
+                    lines.append(','.join(map(_csv_field, row)))
+            outstream.write('\n'.join(lines) + '\n')
+            total += len(lines)
+        return total
+
+
+def _csv_field(value):
+    """Quote a free-text CSV field when needed"""
+    value = str(value)
+    if any(c in value for c in ',"\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
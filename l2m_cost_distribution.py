@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Cost Distribution Engine
+Exact probability distribution of diamonds spent to reach a target level
+"""
+
+from math import gcd
+
+import numpy as np
+
+from l2m_rate_tables import (
+    EVENT_BOOST, FINAL_RATE_CAP, MIN_LEVEL, MAX_LEVEL, karma_boost, diamond_cost_per_attempt
+)
+from l2m_enhancement_simulator import tumbal_per_level
+
+DEFAULT_TUMBAL_PRICE = 50  # Rare +6 low market price, the usual tumbal
+
+
+class CostDistribution:
+    """Lattice distribution of total diamonds (multiples of `unit`)
+
+    pmf[i] is the probability of spending exactly i * unit diamonds.
+    Mass beyond the last lattice point (below the truncation tolerance)
+    is reported as `tail_mass`.
+    """
+
+    def __init__(self, pmf, unit, tail_mass, params):
+        self.pmf = pmf
+        self.unit = unit
+        self.tail_mass = tail_mass
+        self.params = params
+        self.cdf_values = np.cumsum(pmf)
+        self.support = np.arange(pmf.size) * unit
+
+    @property
+    def mean(self):
+        return float(self.support @ self.pmf)
+
+    @property
+    def std(self):
+        return float(np.sqrt(max((self.support ** 2) @ self.pmf - self.mean ** 2, 0.0)))
+
+    def quantile(self, q):
+        """Smallest cost whose cumulative probability reaches q"""
+        i = int(np.searchsorted(self.cdf_values, q - 1e-15))
+        if i >= self.pmf.size:
+            raise ValueError(f"Quantile {q} lies in the truncated tail ({self.tail_mass:.1e})")
+        return int(self.support[i])
+
+    def cdf(self, diamonds):
+        """P(total cost <= diamonds)"""
+        i = int(diamonds // self.unit)
+        if i < 0:
+            return 0.0
+        return float(self.cdf_values[min(i, self.pmf.size - 1)])
+
+
+class L2MCostDistributionEngine:
+    """Exact cost distributions by forward propagation over the cost lattice
+
+    Every attempt at level L costs the tier price (50/100/200) plus the
+    tumbal bought for it; a destroyed weapon can also cost `item_price`
+    to replace before restarting at the start level. All costs are whole
+    diamonds, so probability mass lives on multiples of their gcd and is
+    pushed forward one lattice point at a time until less than `tail` is
+    left unabsorbed. Results are cached per parameter set.
+    """
+
+    def __init__(self, rate_table, tail=1e-12):
+        self.rate_table = rate_table
+        self.tail = tail
+        self._cache = {}
+
+    def distribution(self, grade, start, target, tumbal=0, event=False,
+                     tumbal_price=DEFAULT_TUMBAL_PRICE, item_price=0):
+        """Distribution of diamonds spent to take one weapon from start to target"""
+        if not MIN_LEVEL <= start < target <= MAX_LEVEL:
+            raise ValueError(f"Invalid enhancement range: +{start} → +{target}")
+        tumbal_map = tumbal_per_level(tumbal, start, target)
+        key = (grade, start, target, tuple(sorted(tumbal_map.items())), bool(event),
+               int(tumbal_price), int(item_price))
+        if key not in self._cache:
+            self._cache[key] = self._propagate(key)
+        return self._cache[key]
+
+    def _propagate(self, key):
+        grade, start, target, tumbal_items, event, tumbal_price, item_price = key
+        tumbal_map = dict(tumbal_items)
+        levels = list(range(start, target))
+
+        success, stay, destroy, cost = [], [], [], []
+        for level in levels:
+            base = self.rate_table.base_rate(grade, level)
+            p = min(base + karma_boost(tumbal_map[level]) + (EVENT_BOOST if event else 0),
+                    FINAL_RATE_CAP)
+            d = (1 - p) * self.rate_table.destroy_rate(grade, level)
+            success.append(p)
+            destroy.append(d)
+            stay.append(1 - p - d)
+            cost.append(int(round(diamond_cost_per_attempt(level) + tumbal_map[level] * tumbal_price)))
+
+        unit = 0
+        for c in cost + ([item_price] if item_price else []):
+            unit = gcd(unit, c)
+        unit = unit or 1
+        step = [c // unit for c in cost]
+        replace = item_price // unit
+
+        n = len(levels)
+        mass = [[0.0] * 64 for _ in range(n)]
+        absorbed = [0.0] * 64
+        remaining = 1.0
+        mass[0][0] = 1.0
+        i = 0
+
+        def add(row, index, value):
+            if index >= len(row):
+                row.extend([0.0] * (index - len(row) + 1 + len(row)))
+            row[index] += value
+
+        while remaining > self.tail:
+            for s in range(n):
+                row = mass[s]
+                if i >= len(row) or not row[i]:
+                    continue
+                m = row[i]
+                row[i] = 0.0
+                j = i + step[s]
+                if s + 1 == n:
+                    add(absorbed, j, m * success[s])
+                    remaining -= m * success[s]
+                else:
+                    add(mass[s + 1], j, m * success[s])
+                add(row, j, m * stay[s])
+                if destroy[s]:
+                    add(mass[0], j + replace, m * destroy[s])
+            i += 1
+
+        pmf = np.array(absorbed[:max(k for k, v in enumerate(absorbed) if v) + 1])
+        params = {'grade': grade, 'start': start, 'target': target, 'tumbal': tumbal_map,
+                  'event': event, 'tumbal_price': tumbal_price, 'item_price': item_price}
+        return CostDistribution(pmf, unit, max(remaining, 0.0), params)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Enhancement Simulator
+Vectorized Monte Carlo engine for +6 → +10 enhancement sessions
+"""
+
+import numpy as np
+
+from l2m_rate_tables import (
+    EVENT_BOOST, FINAL_RATE_CAP, MIN_LEVEL, MAX_LEVEL,
+    L2MRateTable, karma_boost, diamond_cost_per_attempt
+)
+
+
+def tumbal_per_level(tumbal, start, target):
+    """Expand a tumbal count (int, list or {level: count}) per level"""
+    if isinstance(tumbal, dict):
+        return {lvl: tumbal.get(lvl, 0) for lvl in range(start, target)}
+    if isinstance(tumbal, (list, tuple)):
+        return {lvl: tumbal[i] for i, lvl in enumerate(range(start, target))}
+    return {lvl: tumbal for lvl in range(start, target)}
+
+
+class L2MEnhancementSimulator:
+    def __init__(self, enhancement_rates, destruction_rates, seed=None):
+        self.rate_table = L2MRateTable(enhancement_rates, destruction_rates)
+        self.rng = np.random.default_rng(seed)
+
+    def _step_rates(self, grade, level, tumbal, event):
+        """Success and destroy-on-fail probability for one step"""
+        base_rate = self.rate_table.base_rate(grade, level)
+        boost = karma_boost(tumbal) + (EVENT_BOOST if event else 0)
+        success = min(base_rate + boost, FINAL_RATE_CAP)
+        destroy = self.rate_table.destroy_rate(grade, level)
+        return success, destroy
+
+    def simulate(self, grade, start=6, target=10, trials=1_000_000,
+                 tumbal=0, event=False, tumbal_cost=0):
+        """Simulate enhancement sessions from start to target level
+
+        Every trial keeps enhancing until the weapon reaches the target.
+        A failed attempt either keeps the level or destroys the weapon
+        (destruction rates apply to failed attempts); a destroyed weapon
+        is replaced by a fresh one at the start level.
+
+        Tumbal counts may be fractional, e.g. the decay-weighted count from
+        L2MKarmaTracker.effective_tumbal() for time-aware karma.
+
+        Returns per-trial arrays of attempts, destroyed items and diamonds.
+        """
+        if not MIN_LEVEL <= start < target <= MAX_LEVEL:
+            raise ValueError(f"Invalid enhancement range: +{start} → +{target}")
+
+        tumbal_map = tumbal_per_level(tumbal, start, target)
+        steps = {
+            lvl: self._step_rates(grade, lvl, tumbal_map[lvl], event)
+            for lvl in range(start, target)
+        }
+
+        level = np.full(trials, start, dtype=np.int8)
+        attempts = np.zeros(trials, dtype=np.int64)
+        destroyed = np.zeros(trials, dtype=np.int64)
+        diamonds = np.zeros(trials, dtype=np.float64)
+
+        active = np.arange(trials)
+        while active.size:
+            for lvl in range(start, target):
+                idx = active[level[active] == lvl]
+                if not idx.size:
+                    continue
+
+                success, destroy = steps[lvl]
+                # Chance that an attempt ends the stay at this level
+                leave = success + (1 - success) * destroy
+
+                # Attempts spent at this level ~ Geometric(leave)
+                u = 1.0 - self.rng.random(idx.size)
+                if leave < 1.0:
+                    tries = np.ceil(np.log(u) / np.log1p(-leave)).astype(np.int64)
+                    np.maximum(tries, 1, out=tries)
+                else:
+                    tries = np.ones(idx.size, dtype=np.int64)
+
+                per_attempt = diamond_cost_per_attempt(lvl) + tumbal_map[lvl] * tumbal_cost
+                attempts[idx] += tries
+                diamonds[idx] += tries * per_attempt
+
+                won = self.rng.random(idx.size) < success / leave
+                level[idx[won]] = lvl + 1
+                lost = idx[~won]
+                level[lost] = start
+                destroyed[lost] += 1
+
+            active = active[level[active] < target]
+
+        return {
+            'grade': grade,
+            'start': start,
+            'target': target,
+            'trials': trials,
+            'attempts': attempts,
+            'destroyed': destroyed,
+            'diamonds': diamonds
+        }
+
+    def summarize(self, result, percentiles=(10, 50, 90, 99)):
+        """Summary statistics for a simulation result"""
+        summary = {
+            'grade': result['grade'],
+            'enhancement': f"+{result['start']} → +{result['target']}",
+            'trials': result['trials']
+        }
+        for name in ('attempts', 'destroyed', 'diamonds'):
+            values = result[name]
+            stats = {
+                'mean': float(values.mean()),
+                'std': float(values.std())
+            }
+            for pct, value in zip(percentiles, np.percentile(values, percentiles)):
+                stats[f'p{pct}'] = float(value)
+            summary[name] = stats
+        summary['destroy_probability'] = float((result['destroyed'] > 0).mean())
+        return summary
+
+    def histogram(self, values, bins=50):
+        """Histogram (counts, edges) of a simulated distribution"""
+        if np.issubdtype(values.dtype, np.integer):
+            counts = np.bincount(values)
+            return counts, np.arange(counts.size + 1)
+        return np.histogram(values, bins=bins)
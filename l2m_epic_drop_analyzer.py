@@ -8,6 +8,16 @@ import json
 from datetime import datetime, timedelta
 import time
 
+import numpy as np
+
+from l2m_spawn_calendar import L2MSpawnCalendar
+from l2m_respawn_tracker import L2MRespawnTracker
+from l2m_route_optimizer import L2MRouteOptimizer
+from l2m_map_catalog import L2MMapCatalog
+from l2m_time_windows import L2MTimeWindowGrid
+from l2m_yield_model import L2MYieldModel
+from l2m_server_clock import L2MServerClock, DEFAULT_REGION, to_seconds, to_datetime64
+
 class L2MEpicDropAnalyzer:
     def __init__(self):
         # Field Boss spawn schedules (server time UTC+9 Korea)
@@ -263,15 +273,59 @@ class L2MEpicDropAnalyzer:
                 }
             }
         }
+        
+        # Schedules run on server time; each region resets at its own midnight
+        self.clock = L2MServerClock()
+        self.region = DEFAULT_REGION
+        
+        # Parsed spawn rules for world and field bosses
+        self.spawn_calendar = L2MSpawnCalendar(self.world_bosses, self.field_bosses, start=self.now())
+        self._calendars = {self.region: self.spawn_calendar}
+        
+        # Observed kills per boss/channel for ranged respawn windows
+        self.respawn_tracker = L2MRespawnTracker(self.field_bosses, clock=self.clock, region=self.region)
+        self._trackers = {self.region: self.respawn_tracker}
+        
+        # Numeric map data with level/hour indexes
+        self.map_catalog = L2MMapCatalog(self.epic_drop_maps)
+        self.yield_model = L2MYieldModel(self)
+        self.route_optimizer = L2MRouteOptimizer(self)
+        
+        # Week × hour grids of timing scores and epic yields, per buff set
+        self._time_windows = {}
+        
+        # Daily reports and their sections per region (see generate_daily_report)
+        self._reports = {}
+    
+    def now(self, region=None):
+        """Current server time (naive) of a region, default the analyzer's region"""
+        return self.clock.now(region or self.region)
+    
+    def calendar_for(self, region):
+        """Spawn calendar anchored at a region's server midnight"""
+        region = region or self.region
+        if region not in self._calendars:
+            self._calendars[region] = L2MSpawnCalendar(self.world_bosses, self.field_bosses,
+                                                       start=self.now(region))
+        return self._calendars[region]
     
-    def get_current_day_analysis(self):
+    def tracker_for(self, region):
+        """Respawn tracker on a region's server time"""
+        region = region or self.region
+        if region not in self._trackers:
+            self._trackers[region] = L2MRespawnTracker(self.field_bosses, clock=self.clock, region=region)
+        return self._trackers[region]
+    
+    def get_current_day_analysis(self, region=None, now=None):
         """Analyze current day for epic drops"""
-        current_day = datetime.now().strftime('%A').lower()
-        current_hour = datetime.now().hour
-        
+        now = now or self.now(region)
+        return self._day_analysis(self._day_profile(now), self.time_windows().slot(now))
+    
+    def _day_profile(self, now):
+        """Day-only part of the analysis (unchanged until server midnight)"""
+        current_day = now.strftime('%A').lower()
         day_data = self.daily_drop_rates.get(current_day, self.daily_drop_rates['monday'])
-        
-        analysis = {
+        return {
             'current_day': current_day.capitalize(),
             'drop_modifier': day_data['modifier'],
             'bonus_percentage': f"+{(day_data['modifier']-1)*100:.0f}%",
@@ -279,62 +333,88 @@ class L2MEpicDropAnalyzer:
             'recommended_maps': day_data['best_maps'],
             'special_events': day_data.get('special', 'None')
         }
+    
+    def _day_analysis(self, profile, slot):
+        analysis = dict(profile)
         
         # Time-based recommendations
-        if 0 <= current_hour < 6:
-            analysis['time_bonus'] = 'EXCELLENT - Low competition'
-            analysis['recommended_action'] = 'Farm elite zones now!'
-        elif 6 <= current_hour < 12:
-            analysis['time_bonus'] = 'GOOD - Moderate competition'
-            analysis['recommended_action'] = 'Focus on less popular maps'
-        elif 12 <= current_hour < 18:
-            analysis['time_bonus'] = 'AVERAGE - Standard competition'
-            analysis['recommended_action'] = 'Prepare for evening bosses'
-        else:
-            analysis['time_bonus'] = 'POOR - High competition'
-            analysis['recommended_action'] = 'Wait for late night or join world boss'
+        analysis['time_bonus'] = slot['time_bonus']
+        analysis['recommended_action'] = slot['recommended_action']
         
         return analysis
     
-    def get_boss_timers(self):
-        """Calculate next boss spawn times"""
-        current_time = datetime.now()
-        timers = []
+    def time_windows(self, buffs=None):
+        """Week × hour grid for a buff set (built once per set)"""
+        key = tuple(sorted(buffs or ()))
+        if key not in self._time_windows:
+            self._time_windows[key] = L2MTimeWindowGrid(self, key)
+        return self._time_windows[key]
+    
+    def get_boss_timers(self, days=7, region=None, now=None):
+        """Calculate next world boss spawn times"""
+        current_time = now or self.now(region)
+        spawns = self.calendar_for(region).spawns_between(
+            current_time, current_time + timedelta(days=days), kind='world'
+        )
+        return [self._timer_entry(spawn, current_time) for spawn in spawns]
+    
+    def get_field_boss_timers(self, count=10, region=None):
+        """Next field boss spawns from recorded kills, then respawn ranges of the rest
         
-        # Check world bosses
-        for boss_name, boss_data in self.world_bosses.items():
-            if 'spawn_schedule' in boss_data:
-                schedule = boss_data['spawn_schedule']
-                if 'Wednesday' in schedule:
-                    next_spawn = self._get_next_weekday(2, 20)  # Wednesday 20:00
-                    timers.append({
-                        'boss': boss_name,
-                        'spawn_time': next_spawn,
-                        'time_until': str(next_spawn - current_time).split('.')[0],
-                        'drops': boss_data['drops']['items']
-                    })
-                elif 'Saturday' in schedule:
-                    next_spawn = self._get_next_weekday(5, 21)  # Saturday 21:00
-                    timers.append({
-                        'boss': boss_name,
-                        'spawn_time': next_spawn,
-                        'time_until': str(next_spawn - current_time).split('.')[0],
-                        'drops': boss_data['drops']['items']
-                    })
-                elif 'Sunday' in schedule:
-                    next_spawn = self._get_next_weekday(6, 20)  # Sunday 20:00
-                    timers.append({
-                        'boss': boss_name,
-                        'spawn_time': next_spawn,
-                        'time_until': str(next_spawn - current_time).split('.')[0],
-                        'drops': boss_data['drops']['items']
-                    })
+        Field bosses respawn relative to their last kill, so a spawn time is
+        only given once a kill has been recorded (record_field_kill); other
+        bosses are listed with their respawn range and no spawn time.
+        """
+        current_time = self.now(region)
+        calendar = self.calendar_for(region)
+        spawns = calendar.next_spawns(current_time, count, kind='field')
+        timers = [dict(self._timer_entry(spawn, current_time), channel=spawn['channel'],
+                       window_start=spawn['window_start']) for spawn in spawns]
+        for entry in calendar.respawn_ranges(exclude={spawn['boss'] for spawn in spawns}):
+            if len(timers) >= count:
+                break
+            timers.append({
+                'boss': entry['boss'],
+                'spawn_time': None,
+                'window_end': None,
+                'time_until': None,
+                'location': entry['location'],
+                'drops': entry['drops'],
+                'channel': None,
+                'window_start': None,
+                'respawn_time': entry['respawn_time']
+            })
+        return timers
+    
+    def record_field_kill(self, boss, when=None, channel=None, region=None):
+        """Record a field boss kill (server time of the region)
         
-        return sorted(timers, key=lambda x: x['spawn_time'])
+        The respawn tracker gets the kill's spawn-probability window and
+        the calendar anchors the boss's next spawn, which field timers,
+        reports and farming routes then use.
+        """
+        when = when or self.now(region)
+        self.tracker_for(region).record_kill(boss, channel, when)
+        return self.calendar_for(region).record_kill(boss, when, channel)
+    
+    def get_field_bosses_up(self, count=5, within_minutes=15, region=None):
+        """Field bosses most likely to be up within the next minutes, from recorded kills"""
+        return self.tracker_for(region).most_likely(
+            self.now(region), timedelta(minutes=within_minutes), count)
+    
+    def _timer_entry(self, spawn, current_time):
+        return {
+            'boss': spawn['boss'],
+            'spawn_time': spawn['spawn_time'],
+            'window_end': spawn['window_end'],
+            'time_until': str(spawn['spawn_time'] - current_time).split('.')[0],
+            'location': spawn['location'],
+            'drops': spawn['drops']
+        }
     
     def _get_next_weekday(self, weekday, hour):
         """Get next occurrence of weekday at specific hour"""
-        current = datetime.now()
+        current = self.now()
         days_ahead = weekday - current.weekday()
         
         if days_ahead < 0:  # Target day already happened this week
@@ -346,81 +426,91 @@ class L2MEpicDropAnalyzer:
         target = current + timedelta(days=days_ahead)
         return target.replace(hour=hour, minute=0, second=0, microsecond=0)
     
+    def batch_lookup(self, users, k=3, kind=None, when=None):
+        """Day bonus and next k spawns for many users in one pass
+        
+        users are dicts with 'region' and optionally 'timezone' (IANA name,
+        default the region's zone). Each distinct region is queried once;
+        spawn times are converted to every user's zone in one vectorized
+        call. Returns per-user arrays; times are datetime64 wall clock.
+        Field spawns are only known after recorded kills, so missing
+        entries are None / NaT with seconds_until -1.
+        """
+        when = int(time.time() if when is None else when)
+        regions = sorted({user.get('region') or self.region for user in users})
+        server_now, modifiers, days, bosses, spawns = [], [], [], [], []
+        for region in regions:
+            moment = self.clock.now(region, when)
+            day = moment.strftime('%A').lower()
+            upcoming = self.calendar_for(region).next_spawns(moment, k, kind)
+            server_now.append(moment)
+            days.append(day)
+            modifiers.append(self.daily_drop_rates.get(day, self.daily_drop_rates['monday'])['modifier'])
+            missing = k - len(upcoming)
+            bosses.append([spawn['boss'] for spawn in upcoming] + [None] * missing)
+            spawns.append([spawn['spawn_time'] for spawn in upcoming] + [moment] * missing)
+        
+        index = {region: r for r, region in enumerate(regions)}
+        rows = np.array([index[user.get('region') or self.region] for user in users], dtype=np.int64)
+        region_zones = np.array([self.clock.zone_name(region) for region in regions], dtype=object)
+        from_zones = region_zones[rows][:, None]
+        to_zones = np.array([user.get('timezone') or region_zones[r] for user, r in zip(users, rows)],
+                            dtype=object)[:, None]
+        
+        boss = np.array(bosses, dtype=object).reshape(len(regions), k)[rows]
+        found = np.not_equal(boss, None)
+        spawn_server = to_seconds(spawns)[rows]
+        spawn_utc = self.clock.to_utc(spawn_server, from_zones)
+        missing = np.datetime64('NaT', 's')
+        return {
+            'region': np.array(regions, dtype=object)[rows],
+            'server_time': to_datetime64(to_seconds(server_now))[rows],
+            'day': np.array(days, dtype=object)[rows],
+            'day_modifier': np.array(modifiers)[rows],
+            'boss': boss,
+            'spawn_server': np.where(found, to_datetime64(spawn_server), missing),
+            'spawn_local': np.where(found, to_datetime64(self.clock.to_local(spawn_utc, to_zones)), missing),
+            'seconds_until': np.where(found, spawn_utc - when, -1)
+        }
+    
     def get_recommended_farming_route(self, level):
         """Get recommended farming route based on level"""
-        routes = []
+        _, maps = self.map_catalog.bracket_for_level(level)
+        bosses = {
+            data['location']: (name.replace('_', ' '), data)
+            for group in self.field_bosses.values() for name, data in group.items()
+        }
         
-        if 40 <= level < 50:
-            routes = [
-                {
-                    'priority': 1,
-                    'map': 'Orc Barracks',
-                    'reason': 'High mob density, decent epic chance',
-                    'epic_rate': '0.5-1%',
-                    'items': ['Orc Chief Ring', 'Warrior Belt']
-                },
-                {
-                    'priority': 2,
-                    'map': 'Wasteland',
-                    'reason': 'Lower competition, better rates',
-                    'epic_rate': '0.8-1.2%',
-                    'items': ['Basilisk Belt', 'Speed Boots']
-                }
-            ]
-        elif 50 <= level < 60:
-            routes = [
-                {
-                    'priority': 1,
-                    'map': 'Giran Territory',
-                    'reason': 'Death Knight spawns here',
-                    'epic_rate': '1-1.5%',
-                    'items': ['Death Knight Armor', 'Dark Sword']
-                },
-                {
-                    'priority': 2,
-                    'map': 'Tower of Insolence 1F',
-                    'reason': 'Good for solo farming',
-                    'epic_rate': '1.2-1.8%',
-                    'items': ['Magic Set', 'Wizard Items']
-                }
-            ]
-        elif 60 <= level < 70:
-            routes = [
-                {
-                    'priority': 1,
-                    'map': 'Tower of Insolence 3F',
-                    'reason': 'Cursed Clara spawns',
-                    'epic_rate': '1.5-2%',
-                    'items': ['Clara\'s Necklace', 'Magic Ring']
-                },
-                {
-                    'priority': 2,
-                    'map': 'Cruma Tower 3F',
-                    'reason': 'Core spawns, best jewels',
-                    'epic_rate': '2-2.5%',
-                    'items': ['Core Ring', 'Jewel of Core']
-                }
-            ]
-        else:  # 70+
-            routes = [
-                {
-                    'priority': 1,
-                    'map': 'Sea of Spores',
-                    'reason': 'Orfen spawns, high value drops',
-                    'epic_rate': '2.5-3%',
-                    'items': ['Orfen Earring', 'Blessed Scroll']
-                },
-                {
-                    'priority': 2,
-                    'map': 'Ant Nest',
-                    'reason': 'Queen Ant, best accessories',
-                    'epic_rate': '3-3.5%',
-                    'items': ['Queen Ant Ring', 'Royal Armor']
-                }
-            ]
+        # Rank by expected epics per hour today, not by the listed rate
+        today = self.now().strftime('%A').lower()
+        ranked = self.yield_model.rank(maps, day=today)
+        
+        routes = []
+        for priority, throughput in enumerate(ranked[:2], 1):
+            entry = throughput['map']
+            boss = bosses.get(entry['name'])
+            if boss:
+                reason = f"{boss[0]} spawns here"
+                items = boss[1]['drops']['items']
+            else:
+                reason = f"{entry['mob_density']} mob density, {entry['competition'].lower()} competition"
+                items = entry['epic_items']
+            routes.append({
+                'priority': priority,
+                'map': entry['name'],
+                'reason': reason,
+                'epic_rate': f"{entry['drop_rate'][0]:g}-{entry['drop_rate'][1]:g}%",
+                'epics_per_hour': throughput['expected_epics'],
+                'p_epic_per_hour': throughput['p_any_epic'],
+                'items': items
+            })
         
         return routes
     
+    def plan_farming_route(self, level, hours=4, start=None, buffs=None, region=None):
+        """Time-sequenced farming plan maximizing expected epic drops (server time of the region)"""
+        return self.route_optimizer.plan(level, hours, start, buffs, region)
+    
     def calculate_epic_drop_chance(self, base_rate, day_modifier, buffs=None):
         """Calculate actual epic drop chance"""
         final_rate = base_rate * day_modifier
@@ -435,32 +525,73 @@ class L2MEpicDropAnalyzer:
         
         return min(final_rate, 10.0)  # Cap at 10%
     
-    def generate_daily_report(self):
-        """Generate daily epic farming report"""
-        report = {
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'day_analysis': self.get_current_day_analysis(),
-            'boss_timers': self.get_boss_timers(),
-            'recommended_maps': [],
-            'special_notes': []
-        }
+    def generate_daily_report(self, region=None):
+        """Generate daily epic farming report (cached per region, date and hour)
         
-        # Add map recommendations based on day
-        current_day = datetime.now().strftime('%A').lower()
-        if current_day in ['wednesday', 'saturday', 'sunday']:
-            report['special_notes'].append('WORLD BOSS DAY - Prepare for raid!')
+        The time-independent part is built once per hour and reused; on a
+        new hour only the sections whose inputs changed are rebuilt: day
+        profile and notes per date, slot outlook per weekday and hour, the
+        world boss spawn list per hour. Boss countdowns are recomputed from
+        one server-clock reading on every call, dropping spawns that have
+        passed. Treat the nested sections as read-only.
+        """
+        region = region or self.region
+        now = self.now(region)
+        key = (now.date(), now.hour)
+        cache = self._reports.setdefault(region, {'key': None, 'report': None, 'sections': {}})
+        if cache['key'] != key:
+            cache['key'], cache['report'] = key, self._report_sections(region, now, key, cache['sections'])
         
-        if current_day == 'wednesday':
-            report['special_notes'].append('Post-maintenance boost active!')
+        static, spawns = cache['report']
+        end = now + timedelta(days=7)
+        return dict(static, generated_at=now, boss_timers=[
+            self._timer_entry(spawn, now) for spawn in spawns if now <= spawn['spawn_time'] < end
+        ])
+    
+    def _report_sections(self, region, now, key, sections):
+        """Time-independent part of the report and the hour's world boss spawns"""
         
-        # Time-based recommendations
-        current_hour = datetime.now().hour
-        if 0 <= current_hour < 6:
-            report['recommended_maps'] = ['Tower of Insolence 3F', 'Cruma Tower 3F']
-            report['special_notes'].append('Prime farming time - Low competition!')
-        elif 19 <= current_hour <= 22:
-            report['special_notes'].append('Check for world boss spawns!')
+        def section(name, depends, build):
+            hit = sections.get(name)
+            if hit is None or hit[0] != depends:
+                hit = sections[name] = (depends, build())
+            return hit[1]
+        
+        profile = section('day', now.date(), lambda: self._day_profile(now))
+        day_notes = section('day_notes', now.date(), lambda: self._day_notes(now))
+        slot = section('slot', (now.weekday(), now.hour), lambda: self.time_windows().slot(now))
+        # Covers the 7-day lookahead from any moment of this hour
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        spawns = section('boss_spawns', key, lambda: self.calendar_for(region).spawns_between(
+            hour_start, hour_start + timedelta(days=7, hours=1), kind='world'))
         
-        return report
+        static = {
+            'date': now.strftime('%Y-%m-%d'),
+            'region': region,
+            'day_analysis': self._day_analysis(profile, slot),
+            'recommended_maps': slot['best_maps'],
+            'special_notes': day_notes + self._slot_notes(slot)
+        }
+        return static, spawns
+    
+    def _day_notes(self, now):
+        """Notes that hold for the whole server day"""
+        notes = []
+        current_day = now.strftime('%A').lower()
+        if current_day in ['wednesday', 'saturday', 'sunday']:
+            notes.append('WORLD BOSS DAY - Prepare for raid!')
+        
+        if current_day == 'wednesday':
+            notes.append('Post-maintenance boost active!')
+        return notes
+    
+    def _slot_notes(self, slot):
+        """Notes for the current hour"""
+        notes = []
+        if slot['competition'] == 'Low':
+            notes.append('Prime farming time - Low competition!')
+        if slot['boss_time']:
+            notes.append('Check for world boss spawns!')
+        return notes
 
 # This class will be integrated into the main optimizer
\ No newline at end of file
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Export
+Streaming compressed NDJSON and memory-mappable columnar files
+"""
+
+import gzip
+import io
+import json
+import os
+import shutil
+import struct
+import tempfile
+from datetime import date, datetime
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for .zst files
+    zstandard = None
+
+COLUMNAR_MAGIC = b'L2MCOL01'
+COLUMNAR_ALIGN = 64
+COLUMNAR_SUFFIX = '.l2mc'
+_TRAILER = struct.Struct('<Q8s')  # footer length, magic
+
+
+def json_default(value):
+    """JSON encoding for datetimes and numpy scalars/arrays"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def detect_compression(path):
+    """'gzip', 'zstd' or None from a file name"""
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return None
+
+
+def open_text(path, mode='rt', compression=None):
+    """Open a text stream, transparently (de)compressing gzip or zstd"""
+    compression = compression or detect_compression(path)
+    if compression == 'gzip':
+        return gzip.open(path, mode, compresslevel=6, encoding='utf-8')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+        return zstandard.open(path, mode, encoding='utf-8')
+    if compression is not None:
+        raise ValueError(f"Unknown compression: {compression}")
+    return open(path, mode, encoding='utf-8', newline='\n')
+
+
+class L2MNDJSONWriter:
+    """One JSON object per line, written as it comes
+
+    Compression is picked from the file name (.gz, .zst) unless given.
+    Nothing is held beyond the compressor's buffer, so output size is not
+    limited by memory.
+    """
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.rows = 0
+        self._file = open_text(path, 'wt', compression)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, default=json_default, separators=(',', ':')))
+        self._file.write('\n')
+        self.rows += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def write_columns(self, columns):
+        """Write a chunk given as {name: equal-length array}, one line per row"""
+        names = list(columns)
+        values = [np.asarray(columns[name]).tolist() for name in names]
+        lines = [json.dumps(dict(zip(names, row)), default=json_default, separators=(',', ':'))
+                 for row in zip(*values)]
+        if lines:
+            self._file.write('\n'.join(lines))
+            self._file.write('\n')
+        self.rows += len(lines)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_ndjson(path, compression=None):
+    """Iterate the records of an NDJSON file (compressed or not)"""
+    with open_text(path, 'rt', compression) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class L2MColumnarWriter:
+    """Columnar binary file written chunk by chunk
+
+    Layout: magic, then each column's values contiguous and 64-byte
+    aligned, then a JSON footer (rows, column dtypes/offsets/shapes,
+    metadata), then the footer length and magic again. Chunks are spilled
+    to one temporary file per column and copied into place on close, so
+    memory stays at one chunk while every column ends up contiguous and
+    memory-mappable. The footer sits at the end because the row count is
+    only known once the stream ends. The file is written under a
+    temporary name and renamed when complete.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.rows = 0
+        self._columns = {}
+        self._dir = os.path.dirname(os.path.abspath(path))
+
+    def write(self, columns):
+        """Append a chunk given as {name: array}; every chunk has the same columns"""
+        arrays = {name: np.ascontiguousarray(values) for name, values in columns.items()}
+        lengths = {len(values) for values in arrays.values()}
+        if len(lengths) != 1:
+            raise ValueError(f"Columns in a chunk differ in length: {sorted(lengths)}")
+        if not self._columns:
+            for name, values in arrays.items():
+                spill = tempfile.TemporaryFile(dir=self._dir)
+                self._columns[name] = (values.dtype, values.shape[1:], spill)
+        elif set(arrays) != set(self._columns):
+            raise ValueError(f"Chunk columns {sorted(arrays)} differ from {sorted(self._columns)}")
+        for name, values in arrays.items():
+            dtype, shape, spill = self._columns[name]
+            if values.shape[1:] != shape:
+                raise ValueError(f"Column {name} changed shape: {values.shape[1:]} vs {shape}")
+            spill.write(values.astype(dtype, copy=False).tobytes())
+        self.rows += lengths.pop()
+
+    def close(self):
+        partial = self.path + '.part'
+        columns = []
+        try:
+            with open(partial, 'wb') as out:
+                out.write(COLUMNAR_MAGIC)
+                for name, (dtype, shape, spill) in self._columns.items():
+                    out.write(b'\0' * (-out.tell() % COLUMNAR_ALIGN))
+                    columns.append({'name': name, 'dtype': dtype.str, 'shape': list(shape),
+                                    'offset': out.tell()})
+                    spill.seek(0)
+                    shutil.copyfileobj(spill, out, 1 << 20)
+                footer = json.dumps({'rows': self.rows, 'columns': columns, 'metadata': self.metadata},
+                                    default=json_default).encode()
+                out.write(footer)
+                out.write(_TRAILER.pack(len(footer), COLUMNAR_MAGIC))
+            os.replace(partial, self.path)
+        finally:
+            for _, _, spill in self._columns.values():
+                spill.close()
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            for _, _, spill in self._columns.values():
+                spill.close()
+
+
+class L2MColumnarTable:
+    """Read-only view of a columnar file; columns are np.memmap (no copy)"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+                raise ValueError(f"Not an L2M columnar file: {path}")
+            f.seek(-_TRAILER.size, io.SEEK_END)
+            length, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+            if magic != COLUMNAR_MAGIC:
+                raise ValueError(f"Truncated L2M columnar file: {path}")
+            f.seek(-_TRAILER.size - length, io.SEEK_END)
+            footer = json.loads(f.read(length))
+        self.rows = footer['rows']
+        self.metadata = footer['metadata']
+        self.columns = {}
+        for column in footer['columns']:
+            shape = (self.rows, *column['shape'])
+            if self.rows:
+                self.columns[column['name']] = np.memmap(path, dtype=np.dtype(column['dtype']), mode='r',
+                                                         offset=column['offset'], shape=shape)
+            else:
+                self.columns[column['name']] = np.empty(shape, dtype=np.dtype(column['dtype']))
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def keys(self):
+        return self.columns.keys()
+
+
+def load_columnar(path):
+    """Memory-map a file written by L2MColumnarWriter"""
+    return L2MColumnarTable(path)
+
+
+def export_sweep(runner, configs, path, trials=100_000, seed=None, per_trial=False):
+    """Stream a simulation sweep to NDJSON (.ndjson[.gz|.zst]) or columnar (.l2mc)
+
+    Default: one NDJSON row per config with summary statistics and the
+    merged histograms. per_trial=True writes every simulated trial
+    (config index, attempts, destroyed, diamonds) one shard at a time,
+    with the same shard seeds as runner.sweep; the config list goes into
+    the columnar metadata or a leading NDJSON header row. Returns rows
+    written.
+    """
+    columnar = path.endswith(COLUMNAR_SUFFIX)
+    if columnar and not per_trial:
+        raise ValueError("Columnar export holds per-trial rows; use per_trial or an NDJSON path")
+    header = {'configs': configs, 'trials': trials, 'seed': seed}
+
+    if not per_trial:
+        with L2MNDJSONWriter(path) as writer:
+            for merged in runner.sweep(configs, trials, seed):
+                writer.write({
+                    'config': merged['config'],
+                    'seed': merged['seed'],
+                    'summary': runner.summarize(merged),
+                    'bin_width': merged['bin_width'],
+                    'histograms': {name: merged[name]['counts'] for name in ('attempts', 'destroyed', 'diamonds')}
+                })
+            return writer.rows
+
+    writer = L2MColumnarWriter(path, header) if columnar else L2MNDJSONWriter(path)
+    with writer:
+        if not columnar:
+            writer.write(header)
+        for i, result in runner.iter_trials(configs, trials, seed):
+            chunk = {
+                'config': np.full(result['trials'], i, dtype=np.int32),
+                'attempts': result['attempts'],
+                'destroyed': result['destroyed'],
+                'diamonds': result['diamonds']
+            }
+            if columnar:
+                writer.write(chunk)
+            else:
+                writer.write_columns(chunk)
+        return writer.rows - (0 if columnar else 1)
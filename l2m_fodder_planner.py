@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Fodder Planner
+Allocates a mixed tumbal inventory across one or more main weapons
+"""
+
+from itertools import product
+
+import numpy as np
+
+from l2m_rate_tables import (
+    KARMA_PER_TUMBAL, KARMA_CAP, MIN_LEVEL, MAX_LEVEL, step_key, diamond_cost_per_attempt
+)
+from l2m_tumbal_policy import MARKET_PRICES
+
+# Fodder-only grades missing from the main rate tables: (success, destroy) per step.
+# These are ASSUMED values, not game data: rare success rates with destroy
+# rates raised step by step. Plans that burn these grades report them.
+FODDER_RATES = {
+    'common': {
+        '+6_to_+7': (0.33, 0.40),
+        '+7_to_+8': (0.20, 0.50),
+        '+8_to_+9': (0.12, 0.60),
+        '+9_to_+10': (0.06, 0.70)
+    }
+}
+
+STOP, BURN = 0, 1
+
+
+class L2MFodderPlan:
+    """Solved allocation: burn order, policy table and expected outcome
+
+    The policy is indexed [config, karma, fodder used], where config packs
+    every main weapon's progress; action() takes plain levels instead.
+    """
+
+    def __init__(self, queue, mains, sizes, policy, expected):
+        self.queue = queue
+        self.mains = mains
+        self.sizes = sizes
+        self.policy = policy
+        self.expected = expected
+        self.max_karma = policy.shape[1] - 1
+
+    def _config(self, levels):
+        states = []
+        for main, level in zip(self.mains, levels):
+            if level is None:
+                states.append(main['target'] - main['level'] + 1)
+            elif main['level'] <= level <= main['target']:
+                states.append(level - main['level'])
+            else:
+                raise ValueError(f"Level +{level} is outside +{main['level']} → +{main['target']}")
+        return int(np.ravel_multi_index(states, self.sizes))
+
+    def action(self, levels, karma, used):
+        """('stop' | 'burn' | 'attempt', main index) for current levels (None = destroyed)"""
+        if len(levels) != len(self.mains):
+            raise ValueError(f"Expected {len(self.mains)} main levels, got {len(levels)}")
+        if not 0 <= used <= len(self.queue):
+            raise ValueError(f"Plan covers 0-{len(self.queue)} burned fodder, got {used}")
+        code = int(self.policy[self._config(levels), min(karma, self.max_karma), used])
+        if code == STOP:
+            return 'stop', None
+        if code == BURN:
+            return 'burn', self.queue[used]
+        return 'attempt', code - 2
+
+    def burn_order(self):
+        """[(grade, level, count)] in the order fodder is burned"""
+        order = []
+        for item in self.queue:
+            if order and order[-1][:2] == item:
+                order[-1] = (*item, order[-1][2] + 1)
+            else:
+                order.append((*item, 1))
+        return order
+
+
+class L2MFodderPlanner:
+    """Tabulated DP over (main weapon levels, karma, fodder burned)
+
+    Burning a fodder item repeats until it is destroyed (+1 karma) or
+    succeeds; a success resets karma and the item is pivoted one level up
+    at once, where destruction gives karma 1 and another success retires
+    it. Burning costs the item's market value, less the value of the
+    retired item when it survives. Items are burned cheapest per expected
+    destruction first (item value plus attempt diamonds), so fodder state
+    is one queue position and hundreds of items stay cheap. That order is
+    a fixed heuristic, not optimized: the DP decides when to burn the
+    next item, never which one. In every state the DP picks stop, burn the next item, or attempt any unfinished main with
+    the current karma (failures that keep the weapon loop back in closed
+    form). The table is filled backwards along the queue, one progress
+    layer of main configurations at a time, vectorized over karma.
+    """
+
+    def __init__(self, rate_table, fodder_rates=FODDER_RATES, event=False):
+        self.rate_table = rate_table
+        self.fodder_rates = fodder_rates
+        self.event = event
+        self.max_karma = int(round(KARMA_CAP / KARMA_PER_TUMBAL))
+        self._plans = {}
+
+    def _fodder_step(self, grade, level):
+        """(success, destroy) of one unboosted attempt on a fodder item"""
+        if grade in self.fodder_rates:
+            success, destroy_rate = self.fodder_rates[grade][step_key(level)]
+        else:
+            success = self.rate_table.base_rate(grade, level)
+            destroy_rate = self.rate_table.destroy_rate(grade, level)
+        return success, (1 - success) * destroy_rate
+
+    def _burn_outcomes(self, grade, level):
+        """P(destroy), P(success then pivot destroyed), P(success twice), expected diamonds"""
+        if not MIN_LEVEL <= level < MAX_LEVEL:
+            raise ValueError(f"No fodder rates for +{level} (need +{MIN_LEVEL} to +{MAX_LEVEL - 1})")
+        success, destroy = self._fodder_step(grade, level)
+        destroyed = destroy / (success + destroy)
+        cost = diamond_cost_per_attempt(level) / (success + destroy)
+        if level + 1 >= MAX_LEVEL:
+            return destroyed, 0.0, 1 - destroyed, cost
+        p_success, p_destroy = self._fodder_step(grade, level + 1)
+        pivot_destroyed = (1 - destroyed) * p_destroy / (p_success + p_destroy)
+        cost += (1 - destroyed) * diamond_cost_per_attempt(level + 1) / (p_success + p_destroy)
+        return destroyed, pivot_destroyed, 1 - destroyed - pivot_destroyed, cost
+
+    @staticmethod
+    def _fodder_worth(grade, level, prices):
+        """Market value of a fodder item (0 when its grade/level has no price)"""
+        return float(prices.get(grade, {}).get(min(level, MAX_LEVEL), 0))
+
+    def _burn_value(self, grade, level, retired, prices):
+        """Expected market value consumed by burning one item that survives with P(retired)"""
+        return (self._fodder_worth(grade, level, prices)
+                - retired * self._fodder_worth(grade, min(level + 2, MAX_LEVEL), prices))
+
+    def _main_steps(self, main):
+        """(success, destroy) arrays of shape (steps, karma), diamond cost per step"""
+        g = self.rate_table.grade_index(main['grade'])
+        levels = np.arange(main['level'], main['target']) - MIN_LEVEL
+        success = self.rate_table.final_rate(g, levels[:, None], np.arange(self.max_karma + 1),
+                                             self.event)
+        destroy = (1 - success) * self.rate_table.destroy[g, levels][:, None]
+        return success, destroy, self.rate_table.cost[levels].astype(float)
+
+    def _main_values(self, main, prices):
+        """Value of each main state: levels gained 0..T, then destroyed"""
+        levels = range(main['level'], main['target'] + 1)
+        grade_prices = prices.get(main['grade'], {})
+        missing = [level for level in levels if level not in grade_prices]
+        if missing:
+            raise ValueError(f"Missing {main['grade']} prices for levels: {missing}")
+        return [float(grade_prices[level]) for level in levels] + [0.0]
+
+    def plan(self, inventory, mains, prices=None):
+        """Solve for an inventory {(grade, level): count} and mains [{grade, level, target}]
+
+        Final levels are weighted by market value ({grade: {level:
+        diamonds}}, MARKET_PRICES by default) and a destroyed main counts
+        as 0; the plan maximizes the mains' expected worth minus the
+        diamonds spent on main and fodder attempts and the market value of
+        burned fodder (unpriced fodder, e.g. common, counts as 0). A main without a
+        target aims for the highest level its grade has a price for.
+        """
+        prices = MARKET_PRICES if prices is None else prices
+        mains = [dict(main, target=main.get('target') or self._top_priced_level(main['grade'], prices))
+                 for main in mains]
+        for main in mains:
+            if not MIN_LEVEL <= main['level'] < main['target'] <= MAX_LEVEL:
+                raise ValueError(f"Invalid main range: +{main['level']} → +{main['target']}")
+        key = (tuple(sorted(inventory.items())),
+               tuple((m['grade'], m['level'], m['target']) for m in mains),
+               repr(sorted(prices.items())))
+        if key not in self._plans:
+            self._plans[key] = self._solve(inventory, mains, prices)
+        return self._plans[key]
+
+    @staticmethod
+    def _top_priced_level(grade, prices):
+        if not prices.get(grade):
+            raise ValueError(f"No market prices for grade: {grade}")
+        return max(prices[grade])
+
+    def _solve(self, inventory, mains, prices):
+        outcomes = {}
+        for item, count in inventory.items():
+            if count > 0:
+                burned = self._burn_outcomes(*item)
+                outcomes[item] = (*burned, self._burn_value(*item, burned[2], prices))
+        # Fixed burn order: cheapest (value + diamonds) per expected destruction first
+        queue = [item for item in sorted(outcomes, key=lambda item: (sum(outcomes[item][3:]) / outcomes[item][0],
+                                                                     -outcomes[item][0]))
+                 for _ in range(inventory[item])]
+        burn = np.array([outcomes[item] for item in queue]).reshape(-1, 5)
+
+        n_mains, K, N = len(mains), self.max_karma, len(queue)
+        sizes = tuple(m['target'] - m['level'] + 2 for m in mains)
+        configs = np.array(list(product(*[range(size) for size in sizes]))).reshape(-1, n_mains)
+        strides = np.array([int(np.prod(sizes[m + 1:])) for m in range(n_mains)])
+        finished = np.array(sizes) - 2
+        destroyed_state = np.array(sizes) - 1
+
+        # Channels: 0 objective, then per main its value and P(target),
+        # then fodder value consumed, fodder burned and diamonds spent
+        channels = 2 * n_mains + 4
+
+        def charge(cost):
+            spent = np.zeros(channels)
+            spent[0], spent[-1] = -cost, cost
+            return spent
+
+        stop = np.zeros((len(configs), channels))
+        for m, main in enumerate(mains):
+            stop[:, 1 + m] = np.array(self._main_values(main, prices))[configs[:, m]]
+            stop[:, 1 + n_mains + m] = configs[:, m] == finished[m]
+        stop[:, 0] = stop[:, 1:1 + n_mains].sum(axis=1)
+        steps = [self._main_steps(main) for main in mains]
+
+        rank = np.where(configs == destroyed_state, finished + 1, configs).sum(axis=1)
+        layers = [np.nonzero(rank == r)[0] for r in range(rank.max(), -1, -1)]
+        kup = np.minimum(np.arange(K + 1) + 1, K)
+
+        policy = np.zeros((len(configs), K + 1, N + 1), dtype=np.int8)
+        after = None
+        for i in range(N, -1, -1):
+            value = np.empty((len(configs), K + 1, channels))
+            for C in layers:
+                options, valid = [np.broadcast_to(stop[C][:, None], (len(C), K + 1, channels))], []
+                valid.append(np.ones((len(C), K + 1), dtype=bool))
+
+                if i < N:
+                    a, b, c, cost, worth = burn[i]
+                    burned = (a * after[C][:, kup] + b * after[C][:, 1:2] + c * after[C][:, 0:1]
+                              + charge(cost))
+                    burned[..., 0] -= worth
+                    burned[..., -3] += worth
+                    burned[..., -2] += 1
+                    options.append(burned)
+                    valid.append(np.ones((len(C), K + 1), dtype=bool))
+                else:
+                    options.append(options[0])
+                    valid.append(np.zeros((len(C), K + 1), dtype=bool))
+
+                attempts = []
+                for m in range(n_mains):
+                    state = configs[C, m]
+                    open_ = state < finished[m]
+                    step = np.minimum(state, finished[m] - 1)
+                    s, d = steps[m][0][step], steps[m][1][step]
+                    spent = -steps[m][2][step, None] * charge(-1)
+                    up = value[np.where(open_, C + strides[m], C)][:, 0]
+                    down = value[np.where(open_, C + (destroyed_state[m] - state) * strides[m], C)][:, 0]
+                    attempts.append((s, d, spent, up, down, open_))
+
+                # Karma 0 first: its failures loop back to the same state
+                k0 = [opt[:, 0] for opt in options]
+                v0 = [ok[:, 0] for ok in valid]
+                for s, d, spent, up, down, open_ in attempts:
+                    s0, d0 = s[:, :1], d[:, :1]
+                    k0.append((s0 * up + d0 * down + spent) / (s0 + d0))
+                    v0.append(open_)
+                best0 = self._choose(k0, v0)
+                value[C, 0] = np.stack(k0)[best0, np.arange(len(C))]
+                policy[C, 0, i] = best0
+
+                rest = [opt[:, 1:] for opt in options]
+                vrest = [ok[:, 1:] for ok in valid]
+                for s, d, spent, up, down, open_ in attempts:
+                    f = 1 - s[:, 1:] - d[:, 1:]
+                    rest.append(s[:, 1:, None] * up[:, None] + d[:, 1:, None] * down[:, None]
+                                + f[..., None] * value[C, 0][:, None] + spent[:, None])
+                    vrest.append(np.broadcast_to(open_[:, None], (len(C), K)))
+                best = self._choose(rest, vrest)
+                value[C, 1:] = np.stack(rest)[best, np.arange(len(C))[:, None], np.arange(K)]
+                policy[C, 1:, i] = best
+            after = value
+
+        start = after[0, 0]
+        expected = {
+            'objective': float(start[0]),
+            'mains': [
+                {'value': float(start[1 + m]), 'reach_target': float(start[1 + n_mains + m])}
+                for m in range(n_mains)
+            ],
+            'fodder_used': float(start[-2]),
+            'fodder_value': float(start[-3]),
+            'diamonds': float(start[-1]),
+            'assumed_rates': sorted({grade for grade, _ in queue if grade in self.fodder_rates})
+        }
+        return L2MFodderPlan(queue, mains, sizes, policy, expected)
+
+    @staticmethod
+    def _choose(options, valid):
+        """Index of the best valid option by objective, preferring earlier ones on ties"""
+        scores = np.stack([np.where(ok, opt[..., 0], -np.inf) for opt, ok in zip(options, valid)])
+        return scores.argmax(axis=0)
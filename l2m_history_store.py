@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Lineage2M History Store
+SQLite log of enhancement attempts and epic drops with incremental aggregates
+"""
+
+import os
+import sqlite3
+import time
+from collections import Counter
+
+import numpy as np
+
+from l2m_rate_tables import diamond_cost_per_attempt
+from l2m_rate_estimator import OUTCOMES, MAX_TUMBAL
+from l2m_server_clock import L2MServerClock
+
+DEFAULT_HISTORY_DB = 'L2M_History.db'
+DEFAULT_CHARACTER = 'default'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    character TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    tumbal INTEGER NOT NULL,
+    event INTEGER NOT NULL,
+    outcome INTEGER NOT NULL,
+    diamonds INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    hour INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_character_step_ts ON attempts (character, grade, level, ts);
+
+CREATE TABLE IF NOT EXISTS drops (
+    id INTEGER PRIMARY KEY,
+    character TEXT NOT NULL,
+    map TEXT NOT NULL,
+    item TEXT,
+    boss TEXT,
+    ts REAL NOT NULL,
+    hour INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drops_map_hour ON drops (map, hour);
+
+CREATE TABLE IF NOT EXISTS attempt_stats (
+    character TEXT NOT NULL,
+    grade TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    tumbal INTEGER NOT NULL,
+    hour INTEGER NOT NULL,
+    attempts INTEGER NOT NULL,
+    successes INTEGER NOT NULL,
+    destroys INTEGER NOT NULL,
+    diamonds INTEGER NOT NULL,
+    PRIMARY KEY (character, grade, level, tumbal, hour)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attempt_stats_step ON attempt_stats (grade, level, tumbal);
+
+CREATE TABLE IF NOT EXISTS drop_stats (
+    character TEXT NOT NULL,
+    map TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    drops INTEGER NOT NULL,
+    PRIMARY KEY (map, hour, character)
+) WITHOUT ROWID;
+"""
+
+ATTEMPT_UPSERT = """
+INSERT INTO attempt_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (character, grade, level, tumbal, hour) DO UPDATE SET
+    attempts = attempts + excluded.attempts,
+    successes = successes + excluded.successes,
+    destroys = destroys + excluded.destroys,
+    diamonds = diamonds + excluded.diamonds
+"""
+
+DROP_UPSERT = """
+INSERT INTO drop_stats VALUES (?, ?, ?, ?)
+ON CONFLICT (map, hour, character) DO UPDATE SET drops = drops + excluded.drops
+"""
+
+
+class L2MHistoryStore:
+    """Persistent attempt and drop history in one SQLite file
+
+    Records are buffered and written in one transaction per batch; the
+    same transaction folds the batch into the aggregate tables (per
+    character × grade × level × tumbal × server hour, and per map × hour),
+    so rate and drop queries read a few aggregate rows instead of
+    scanning the raw history. Tumbal is clamped at the karma cap in the
+    aggregates, like the rate estimator. The database runs in WAL mode so
+    the menu, the API server and imports can read while one of them
+    writes. Nothing is created on disk until the first record.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_DB, batch_size=10_000, clock=None, region=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.clock = clock or L2MServerClock()
+        self.zone = self.clock.zone_name(region)
+        self._conn = None
+        self._attempts = []
+        self._drops = []
+
+    def _connect(self, create=True):
+        if self._conn is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _hours(self, timestamps):
+        """Server hour of day for epoch timestamps"""
+        local = self.clock.to_local(np.floor(np.asarray(timestamps, dtype=float)).astype(np.int64), self.zone)
+        return (local // 3600 % 24).tolist()
+
+    def record_attempt(self, grade, level, tumbal, outcome, timestamp=None, character=DEFAULT_CHARACTER,
+                       event=False, diamonds=None):
+        """Buffer one enhancement attempt (outcome: success/fail/destroy)"""
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        if diamonds is None:
+            diamonds = diamond_cost_per_attempt(level)
+        self._attempts.append((character, grade, int(level), int(tumbal), int(bool(event)),
+                               OUTCOMES.index(outcome), int(diamonds),
+                               time.time() if timestamp is None else float(timestamp)))
+        if len(self._attempts) >= self.batch_size:
+            self.flush()
+
+    def record_drop(self, map_name, item=None, boss=None, timestamp=None, character=DEFAULT_CHARACTER):
+        """Buffer one epic drop"""
+        self._drops.append((character, map_name, item, boss,
+                            time.time() if timestamp is None else float(timestamp)))
+        if len(self._drops) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered records and update the aggregates in one transaction"""
+        if not self._attempts and not self._drops:
+            return 0
+        conn = self._connect()
+        attempts, drops = self._attempts, self._drops
+        self._attempts, self._drops = [], []
+
+        attempt_rows = [row + (hour,) for row, hour in zip(attempts, self._hours([r[-1] for r in attempts]))]
+        drop_rows = [row + (hour,) for row, hour in zip(drops, self._hours([r[-1] for r in drops]))]
+
+        totals = {}
+        drop_counts = Counter()
+        for character, grade, level, tumbal, _, outcome, diamonds, _, hour in attempt_rows:
+            key = (character, grade, level, min(max(tumbal, 0), MAX_TUMBAL), hour)
+            counts = totals.setdefault(key, [0, 0, 0, 0])
+            counts[0] += 1
+            counts[1] += outcome == 0
+            counts[2] += outcome == 2
+            counts[3] += diamonds
+        for character, map_name, _, _, _, hour in drop_rows:
+            drop_counts[character, map_name, hour] += 1
+
+        with conn:
+            conn.executemany('INSERT INTO attempts (character, grade, level, tumbal, event, outcome, '
+                             'diamonds, ts, hour) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', attempt_rows)
+            conn.executemany('INSERT INTO drops (character, map, item, boss, ts, hour) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', drop_rows)
+            conn.executemany(ATTEMPT_UPSERT, [key + tuple(counts) for key, counts in totals.items()])
+            conn.executemany(DROP_UPSERT, [key + (count,) for key, count in drop_counts.items()])
+        return len(attempt_rows) + len(drop_rows)
+
+    def rebuild_aggregates(self):
+        """Recompute the aggregate tables from the raw history"""
+        self.flush()
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM attempt_stats')
+            conn.execute('DELETE FROM drop_stats')
+            conn.execute(f"""
+                INSERT INTO attempt_stats
+                SELECT character, grade, level, MIN(MAX(tumbal, 0), {MAX_TUMBAL}) AS t, hour,
+                       COUNT(*), SUM(outcome = 0), SUM(outcome = 2), SUM(diamonds)
+                FROM attempts GROUP BY character, grade, level, t, hour""")
+            conn.execute("""
+                INSERT INTO drop_stats
+                SELECT character, map, hour, COUNT(*) FROM drops GROUP BY character, map, hour""")
+
+    def _query(self, sql, params=()):
+        self.flush()
+        conn = self._connect(create=False)
+        return conn.execute(sql, params).fetchall() if conn else []
+
+    def success_rate(self, grade, level, tumbal=None, character=None, by_hour=False):
+        """Observed success and destroy rates of one step from the aggregates
+
+        Filters on tumbal and character when given. Returns one summary,
+        or {server hour: summary} with by_hour.
+        """
+        where = ['grade = ?', 'level = ?']
+        params = [grade, level]
+        if tumbal is not None:
+            where.append('tumbal = ?')
+            params.append(min(max(tumbal, 0), MAX_TUMBAL))
+        if character is not None:
+            where.append('character = ?')
+            params.append(character)
+        group = ' GROUP BY hour' if by_hour else ''
+        rows = self._query(f'SELECT hour, SUM(attempts), SUM(successes), SUM(destroys), SUM(diamonds) '
+                           f'FROM attempt_stats WHERE {" AND ".join(where)}{group}', params)
+        summaries = {row[0]: self._summary(*row[1:]) for row in rows if row[1]}
+        if by_hour:
+            return dict(sorted(summaries.items()))
+        return next(iter(summaries.values()), self._summary(0, 0, 0, 0))
+
+    def _summary(self, attempts, successes, destroys, diamonds):
+        failures = attempts - successes
+        return {
+            'attempts': attempts,
+            'successes': successes,
+            'destroys': destroys,
+            'diamonds': diamonds,
+            'rate': successes / attempts if attempts else None,
+            'destroy_rate': destroys / failures if failures else None
+        }
+
+    def drops_by_hour(self, map_name=None, character=None):
+        """{server hour: drops}, for one map or all maps"""
+        where, params = [], []
+        if map_name is not None:
+            where.append('map = ?')
+            params.append(map_name)
+        if character is not None:
+            where.append('character = ?')
+            params.append(character)
+        clause = f' WHERE {" AND ".join(where)}' if where else ''
+        rows = self._query(f'SELECT hour, SUM(drops) FROM drop_stats{clause} GROUP BY hour ORDER BY hour', params)
+        return dict(rows)
+
+    def attempts_between(self, character, grade, level, start=None, end=None):
+        """Raw attempts of one character and step in [start, end), oldest first"""
+        rows = self._query(
+            'SELECT ts, tumbal, event, outcome, diamonds FROM attempts '
+            'WHERE character = ? AND grade = ? AND level = ? AND ts >= ? AND ts < ? ORDER BY ts',
+            (character, grade, level, float('-inf') if start is None else start,
+             float('inf') if end is None else end))
+        return [{'timestamp': ts, 'tumbal': tumbal, 'event': bool(event), 'outcome': OUTCOMES[outcome],
+                 'diamonds': diamonds} for ts, tumbal, event, outcome, diamonds in rows]
+
+    def step_counts(self, event=False):
+        """[(grade, level, tumbal, attempts, successes, destroys)] over all characters
+
+        Reads the raw attempts, since the aggregates do not split event
+        attempts out; tumbal is clamped at the karma cap.
+        """
+        return self._query('SELECT grade, level, MIN(tumbal, ?), COUNT(*), SUM(outcome = ?), SUM(outcome = ?) '
+                           'FROM attempts WHERE event = ? GROUP BY 1, 2, 3',
+                           (MAX_TUMBAL, OUTCOMES.index('success'), OUTCOMES.index('destroy'), int(event)))
+
+    def attempt_count(self):
+        """Total recorded attempts (from the aggregates)"""
+        rows = self._query('SELECT SUM(attempts) FROM attempt_stats')
+        return (rows[0][0] or 0) if rows else 0
+
+    def attempt_log(self, character=None, grade=None, level=None):
+        """Recorded attempts as column arrays, ordered by character, grade, level and time
+
+        Columns: character, grade, level, tumbal, event, outcome (index
+        into OUTCOMES), timestamp. This is the input of L2MCounterfactualReplay.
+        """
+        where, params = [], []
+        for column, value in (('character', character), ('grade', grade), ('level', level)):
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(value)
+        clause = f' WHERE {" AND ".join(where)}' if where else ''
+        rows = self._query('SELECT character, grade, level, tumbal, event, outcome, ts FROM attempts'
+                           f'{clause} ORDER BY character, grade, level, ts', params)
+        columns = list(zip(*rows)) or [()] * 7
+        return {
+            'character': np.array(columns[0], dtype=object),
+            'grade': np.array(columns[1], dtype=object),
+            'level': np.array(columns[2], dtype=np.int64),
+            'tumbal': np.array(columns[3], dtype=np.int64),
+            'event': np.array(columns[4], dtype=bool),
+            'outcome': np.array(columns[5], dtype=np.int8),
+            'timestamp': np.array(columns[6], dtype=float)
+        }
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
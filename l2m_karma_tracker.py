@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Karma Tracker
+Time-decaying karma per character driven by a hierarchical timer wheel
+"""
+
+import time
+from itertools import count
+
+from l2m_rate_tables import KARMA_PER_TUMBAL, KARMA_CAP
+
+# Karma effectiveness by seconds since a tumbal was destroyed:
+# 0-60s 100%, 60-120s 90%, 2-5 min 70%, 5+ min expired
+KARMA_DECAY_STEPS = ((60, 0.9), (120, 0.7), (300, 0.0))
+
+
+def decay_weight(age_seconds):
+    """Karma effectiveness of one destroyed tumbal after age_seconds"""
+    weight = 1.0
+    for step_age, step_weight in KARMA_DECAY_STEPS:
+        if age_seconds < step_age:
+            break
+        weight = step_weight
+    return weight
+
+
+def decayed_boost(tumbal_count, age_seconds):
+    """Karma boost of tumbal_count destroyed age_seconds ago"""
+    return min(tumbal_count * decay_weight(age_seconds) * KARMA_PER_TUMBAL, KARMA_CAP)
+
+
+class TimerWheel:
+    """Hierarchical timing wheel with O(1) schedule and amortized O(1) expiry
+
+    Level 0 has one slot per tick; each higher level covers 2**bits times
+    the span of the one below and is cascaded down when the lower wheel
+    wraps. Timers further out than the top level wait in an overflow list.
+    """
+
+    def __init__(self, tick=1.0, bits=6, levels=3, start=None):
+        self.tick = tick
+        self.bits = bits
+        self.levels = levels
+        self.mask = (1 << bits) - 1
+        self.wheels = [[[] for _ in range(1 << bits)] for _ in range(levels)]
+        self.overflow = []
+        self.due = []
+        self.pending = 0
+        self.current = self._ticks(time.time() if start is None else start)
+
+    def _ticks(self, timestamp):
+        return int(timestamp // self.tick)
+
+    def _insert(self, expire, item):
+        delta = expire - self.current
+        if delta < 0:
+            self.due.append(item)
+            return
+        for level in range(self.levels):
+            if delta < 1 << (self.bits * (level + 1)):
+                slot = (expire >> (self.bits * level)) & self.mask
+                self.wheels[level][slot].append((expire, item))
+                return
+        self.overflow.append((expire, item))
+
+    def schedule(self, timestamp, item):
+        """Fire item once the wheel has advanced to timestamp"""
+        self.pending += 1
+        self._insert(-int(-timestamp // self.tick), item)
+
+    def advance(self, timestamp):
+        """Move the wheel forward, returns the items that fired in order"""
+        target = self._ticks(timestamp)
+        fired, self.due = self.due, []
+        while self.current < target:
+            if self.pending == len(fired):
+                # Nothing left to fire, jump straight to the target tick
+                self.current = target
+                break
+            self.current += 1
+            for level in range(1, self.levels):
+                if self.current & ((1 << (self.bits * level)) - 1):
+                    break
+                slot = (self.current >> (self.bits * level)) & self.mask
+                items, self.wheels[level][slot] = self.wheels[level][slot], []
+                for expire, item in items:
+                    self._insert(expire, item)
+            else:
+                if not self.current & ((1 << (self.bits * self.levels)) - 1):
+                    items, self.overflow = self.overflow, []
+                    for expire, item in items:
+                        self._insert(expire, item)
+
+            slot = self.current & self.mask
+            if self.wheels[0][slot]:
+                fired.extend(item for _, item in self.wheels[0][slot])
+                self.wheels[0][slot] = []
+        self.pending -= len(fired)
+        return fired
+
+
+class L2MKarmaTracker:
+    """Effective karma per character with scheduled decay steps
+
+    Every destroyed tumbal schedules one wheel event per decay step. When
+    an event fires, the character's running weighted tumbal count is
+    adjusted, so reading the current boost is O(1) and each tick costs
+    only the events that actually fire, however many characters are
+    tracked. A main-weapon attempt or a tumbal success resets karma.
+
+    `effective_tumbal()` returns a fractional tumbal count that can be
+    passed straight to the simulator or the calculators.
+    """
+
+    def __init__(self, start=None):
+        self.wheel = TimerWheel(start=start)
+        self.characters = {}
+        self._ids = count()
+
+    def advance(self, now=None):
+        """Apply all decay steps due up to now"""
+        for character, entry_id, weight in self.wheel.advance(time.time() if now is None else now):
+            state = self.characters.get(character)
+            if not state or entry_id not in state['entries']:
+                continue
+            state['effective'] += weight - state['entries'][entry_id][1]
+            if weight:
+                state['entries'][entry_id] = (state['entries'][entry_id][0], weight)
+            else:
+                del state['entries'][entry_id]
+                if not state['entries']:
+                    del self.characters[character]
+
+    def record_destruction(self, character, timestamp=None):
+        """Register one destroyed tumbal for character"""
+        timestamp = time.time() if timestamp is None else timestamp
+        self.advance(timestamp)
+        state = self.characters.setdefault(character, {'entries': {}, 'effective': 0.0})
+        entry_id = next(self._ids)
+        weight = decay_weight(0)
+        state['entries'][entry_id] = (timestamp, weight)
+        state['effective'] += weight
+        for step_age, step_weight in KARMA_DECAY_STEPS:
+            self.wheel.schedule(timestamp + step_age, (character, entry_id, step_weight))
+
+    def reset(self, character):
+        """Karma consumed (main attempt) or reset (tumbal succeeded)"""
+        self.characters.pop(character, None)
+
+    def effective_tumbal(self, character, now=None):
+        """Decay-weighted tumbal count at now (O(1) at the wheel's time)"""
+        if now is not None and self.wheel._ticks(now) < self.wheel.current:
+            state = self.characters.get(character)
+            if not state:
+                return 0.0
+            return sum(decay_weight(now - ts) for ts, _ in state['entries'].values() if ts <= now)
+        self.advance(now)
+        state = self.characters.get(character)
+        return state['effective'] if state else 0.0
+
+    def effective_boost(self, character, now=None):
+        """Karma boost for character's next attempt"""
+        return min(self.effective_tumbal(character, now) * KARMA_PER_TUMBAL, KARMA_CAP)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Map Catalog
+Epic drop maps parsed once into numeric ranges with level/hour indexes
+"""
+
+import re
+from bisect import bisect_right
+
+_NUMBERS = re.compile(r'\d+(?:\.\d+)?')
+_CLOCK = re.compile(r'(\d{1,2}):\d{2}\s*-\s*(\d{1,2}):\d{2}')
+_BRACKET = re.compile(r'level_(\d+)_(\d+|plus)')
+
+
+def parse_range(text):
+    """'45-50' → (45.0, 50.0), '0.5-1%' → (0.5, 1.0), '3%' → (3.0, 3.0)"""
+    values = [float(v) for v in _NUMBERS.findall(text)]
+    if not values:
+        raise ValueError(f"No numeric range in: {text}")
+    return values[0], values[-1]
+
+
+def parse_hour_window(text):
+    """'02:00-06:00' → (2, 6); None for free text like 'After world boss'"""
+    match = _CLOCK.search(text)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def in_hour_window(hour, window):
+    """Whether hour falls in [start, end), wrapping past midnight"""
+    start, end = window
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def parse_bracket(key):
+    """'level_40_50' → (40, 50), 'level_70_plus' → (70, None)"""
+    match = _BRACKET.fullmatch(key)
+    if not match:
+        raise ValueError(f"Unrecognized level bracket: {key}")
+    high = match.group(2)
+    return int(match.group(1)), None if high == 'plus' else int(high)
+
+
+class L2MMapCatalog:
+    """Numeric view of epic_drop_maps with interval indexes
+
+    Recommended level ranges are split into elementary level segments
+    (sorted boundaries); every segment × hour-of-day keeps the maps valid
+    there, pre-ranked by expected drop rate. A query is one bisect plus a
+    slice: O(log n + k).
+    """
+
+    def __init__(self, epic_drop_maps):
+        self.maps = []
+        self.brackets = []
+        for bracket_key, maps in epic_drop_maps.items():
+            bracket = parse_bracket(bracket_key)
+            bracket_maps = []
+            for key, data in maps.items():
+                low, high = parse_range(data['drop_rate'])
+                entry = {
+                    'key': key,
+                    'name': key.replace('_', ' '),
+                    'bracket': bracket,
+                    'level': tuple(int(v) for v in parse_range(data['recommended_level'])),
+                    'drop_rate': (low, high),
+                    'expected_rate': (low + high) / 2,
+                    'best_hours': parse_hour_window(data['best_time']),
+                    'best_time': data['best_time'],
+                    'mob_density': data['mob_density'],
+                    'competition': data['competition'],
+                    'epic_items': data['epic_items']
+                }
+                self.maps.append(entry)
+                bracket_maps.append(entry)
+            bracket_maps.sort(key=lambda m: -m['expected_rate'])
+            self.brackets.append((bracket, bracket_maps))
+        self.brackets.sort(key=lambda b: b[0][0])
+        self._bracket_starts = [b[0][0] for b in self.brackets]
+        self.by_name = {m['name']: m for m in self.maps}
+        self._build_level_index()
+
+    def _build_level_index(self):
+        bounds = sorted({m['level'][0] for m in self.maps} | {m['level'][1] + 1 for m in self.maps})
+        self._bounds = bounds
+        self._segments = []
+        ranked = sorted(self.maps, key=lambda m: -m['expected_rate'])
+        for lo in bounds[:-1]:
+            covering = [m for m in ranked if m['level'][0] <= lo <= m['level'][1]]
+            by_hour = [
+                [m for m in covering if m['best_hours'] is None or in_hour_window(hour, m['best_hours'])]
+                for hour in range(24)
+            ]
+            self._segments.append((covering, by_hour))
+
+    def maps_for_level(self, level, hour=None, k=None):
+        """Maps whose recommended level covers level, best expected rate first
+
+        With an hour, only maps whose best_time window contains it (or that
+        have no fixed window) are returned.
+        """
+        i = bisect_right(self._bounds, level) - 1
+        if i < 0 or i >= len(self._segments):
+            return []
+        covering, by_hour = self._segments[i]
+        maps = covering if hour is None else by_hour[hour % 24]
+        return maps if k is None else maps[:k]
+
+    def bracket_for_level(self, level):
+        """(bracket, ranked maps) of the level bracket containing level"""
+        i = bisect_right(self._bracket_starts, level) - 1
+        if i < 0:
+            return None, []
+        (low, high), maps = self.brackets[i]
+        if high is not None and level >= high:
+            return None, []
+        return (low, high), maps
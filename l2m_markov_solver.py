@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Enhancement Markov Solver
+Exact absorbing-chain answers for the +6 → +10 enhancement ladder
+"""
+
+import hashlib
+
+import numpy as np
+
+from l2m_rate_tables import (
+    EVENT_BOOST, FINAL_RATE_CAP, MIN_LEVEL, MAX_LEVEL,
+    step_key, karma_boost, diamond_cost_per_attempt
+)
+from l2m_enhancement_simulator import tumbal_per_level
+
+
+def rate_table_version(enhancement_rates, destruction_rates):
+    """Fingerprint of the current rate tables, stable across processes"""
+    def freeze(table):
+        return tuple(sorted(
+            (grade, tuple(sorted(steps.items())))
+            for grade, steps in table.items()
+        ))
+    frozen = (freeze(enhancement_rates), freeze(destruction_rates))
+    return hashlib.sha1(repr(frozen).encode()).hexdigest()
+
+
+class L2MEnhancementMarkovSolver:
+    """Absorbing Markov chain over weapon levels
+
+    Transient states are the levels start..target-1. Every attempt either
+    succeeds (level + 1), fails and keeps the level, or fails and destroys
+    the weapon. The target level and destruction are the absorbing states.
+    """
+
+    def __init__(self, enhancement_rates, destruction_rates):
+        self.enhancement_rates = enhancement_rates
+        self.destruction_rates = destruction_rates
+        self._cache = {}
+        self._version = None
+
+    def _check_version(self):
+        """Drop memoized results when the rate tables change"""
+        version = rate_table_version(self.enhancement_rates, self.destruction_rates)
+        if version != self._version:
+            self._cache.clear()
+            self._version = version
+
+    def transition_matrix(self, grade, start=6, target=10, tumbal=0, event=False):
+        """Full transition matrix over [start..target-1, target, destroyed]"""
+        if grade not in self.enhancement_rates:
+            raise ValueError(f"Unknown weapon grade: {grade}")
+        if grade not in self.destruction_rates:
+            raise ValueError(f"No destruction rates for grade: {grade}")
+        if not MIN_LEVEL <= start < target <= MAX_LEVEL:
+            raise ValueError(f"Invalid enhancement range: +{start} → +{target}")
+
+        tumbal_map = tumbal_per_level(tumbal, start, target)
+        n = target - start
+        P = np.zeros((n + 2, n + 2))
+        for i, lvl in enumerate(range(start, target)):
+            key = step_key(lvl)
+            boost = karma_boost(tumbal_map[lvl]) + (EVENT_BOOST if event else 0)
+            success = min(self.enhancement_rates[grade][key] + boost, FINAL_RATE_CAP)
+            destroy = (1 - success) * self.destruction_rates[grade][key]
+            P[i, i + 1] = success
+            P[i, i] = 1 - success - destroy
+            P[i, n + 1] = destroy
+        P[n, n] = 1.0
+        P[n + 1, n + 1] = 1.0
+        return P
+
+    def solve(self, grade, start=6, target=10, tumbal=0, event=False, tumbal_cost=0):
+        """Exact expected attempts, destroy probability and diamond cost
+
+        Per-weapon figures count attempts until the weapon either reaches
+        the target or is destroyed. The `*_with_restart` figures assume a
+        destroyed weapon is replaced by a fresh one at the start level.
+        """
+        self._check_version()
+        tumbal_map = tumbal_per_level(tumbal, start, target)
+        key = (grade, start, target, tuple(sorted(tumbal_map.items())), event, tumbal_cost)
+        if key in self._cache:
+            return self._cache[key]
+
+        P = self.transition_matrix(grade, start, target, tumbal_map, event)
+        n = target - start
+        Q = P[:n, :n]
+        R = P[:n, n:]
+
+        # Fundamental matrix N = (I - Q)^-1 gives expected visits per state
+        N = np.linalg.inv(np.eye(n) - Q)
+        cost = np.array([
+            diamond_cost_per_attempt(lvl) + tumbal_map[lvl] * tumbal_cost
+            for lvl in range(start, target)
+        ])
+        attempts = N.sum(axis=1)
+        diamonds = N @ cost
+        absorbed = N @ R
+
+        success_probability = float(absorbed[0, 0])
+        result = {
+            'grade': grade,
+            'start': start,
+            'target': target,
+            'expected_attempts': float(attempts[0]),
+            'expected_diamonds': float(diamonds[0]),
+            'success_probability': success_probability,
+            'destroy_probability': float(absorbed[0, 1]),
+            'expected_attempts_with_restart': float(attempts[0] / success_probability),
+            'expected_diamonds_with_restart': float(diamonds[0] / success_probability),
+            'expected_destroyed_with_restart': float(1 / success_probability - 1)
+        }
+        self._cache[key] = result
+        return result
+
+    def solve_all(self, tumbal=0, event=False, tumbal_cost=0):
+        """Solve every grade and start/target pair with destruction rates"""
+        results = {}
+        for grade in self.enhancement_rates:
+            if grade not in self.destruction_rates:
+                continue
+            for start in range(MIN_LEVEL, MAX_LEVEL):
+                for target in range(start + 1, MAX_LEVEL + 1):
+                    results[(grade, start, target)] = self.solve(
+                        grade, start, target, tumbal, event, tumbal_cost
+                    )
+        return results
@@ -17,6 +17,27 @@ import math
 
 # Import epic drop analyzer
 from l2m_epic_drop_analyzer import L2MEpicDropAnalyzer
+from l2m_rate_tables import (
+    L2MRateTable, GRADES, EVENT_BOOST, FINAL_RATE_CAP, karma_boost as karma_boost_for, diamond_cost_per_attempt
+)
+from l2m_parallel_runner import L2MParallelRunner
+from l2m_markov_solver import L2MEnhancementMarkovSolver
+from l2m_tumbal_policy import L2MTumbalPolicySolver, MARKET_PRICES
+from l2m_batch_evaluator import L2MBatchEvaluator, detect_format
+from l2m_rate_estimator import L2MRateEstimator, OUTCOMES
+from l2m_karma_tracker import L2MKarmaTracker
+from l2m_streak_detector import L2MStreakDetector
+from l2m_cost_distribution import L2MCostDistributionEngine, DEFAULT_TUMBAL_PRICE
+from l2m_tumbal_roi import L2MTumbalROIOptimizer
+from l2m_fodder_planner import L2MFodderPlanner
+from l2m_sensitivity_grid import L2MSensitivityGrid, parse_axis
+from l2m_api_server import L2MAPIServer, DEFAULT_HOST, DEFAULT_PORT, CACHE_SIZE
+from l2m_export import export_sweep
+from l2m_history_store import L2MHistoryStore, DEFAULT_CHARACTER
+from l2m_replay import L2MCounterfactualReplay
+
+# Step the menu assumes for tumbal fodder (the +6 → +7 burn)
+TUMBAL_STEP = ('rare', 6)
 
 class L2MEnhancementMasterSystem:
     def __init__(self):
@@ -61,6 +82,56 @@ class L2MEnhancementMasterSystem:
                 '+9_to_+10': 0.55
             }
         }
+        
+        # Compiled tables (raises if a grade or level is missing; legendary is success-only)
+        self.rate_table = L2MRateTable(self.enhancement_rates, self.destruction_rates)
+        
+        # Monte Carlo engine over the same rate tables
+        self.parallel_runner = L2MParallelRunner(self.enhancement_rates, self.destruction_rates)
+        self.markov_solver = L2MEnhancementMarkovSolver(self.enhancement_rates, self.destruction_rates)
+        self.tumbal_policy = L2MTumbalPolicySolver(self.enhancement_rates, self.destruction_rates)
+        
+        # Per-tumbal karma decay for the quick calculator
+        self.karma_tracker = L2MKarmaTracker()
+        # Hot streaks over the attempts recorded through record_attempt()
+        self.streak_detector = L2MStreakDetector(self.enhancement_rates)
+        self.history = L2MHistoryStore(clock=self.epic_analyzer.clock, region=self.epic_analyzer.region)
+        # Posteriors from the recorded history (and a guild attempt log, if one exists)
+        self.rate_estimator = L2MRateEstimator(self.enhancement_rates, self.destruction_rates)
+        self.rate_estimator.load_history(self.history)
+        self._posterior_costs = None
+        self.tumbal_replay = L2MCounterfactualReplay(self.rate_table)
+        self.cost_distribution = L2MCostDistributionEngine(self.rate_table)
+        self.tumbal_roi = L2MTumbalROIOptimizer(self.rate_table)
+        self.fodder_planner = L2MFodderPlanner(self.rate_table)
+    
+    def record_attempt(self, grade, level, tumbal, outcome, event=False, is_tumbal=False,
+                       channel=None, character=DEFAULT_CHARACTER):
+        """Record one attempt, returns the streak detector's state-change signals
+
+        Main-weapon attempts go to the history store; tumbal burns only feed
+        the streak detector, whose HOT STREAK rule counts tumbal successes.
+        """
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        now = time.time()
+        signals = self.streak_detector.process(character, channel, grade, level, outcome == 'success',
+                                               tumbal, is_tumbal, now)
+        if not is_tumbal:
+            self.history.record_attempt(grade, level, tumbal, outcome, now, character, event)
+            self.history.flush()
+            if not event and grade in self.rate_estimator.grades:
+                self.rate_estimator.record(grade, level, tumbal, outcome, now)
+        return signals
+    
+    def posterior_costs(self, tumbal=0):
+        """Cost distribution engine over the rate estimator's posterior rates at a tumbal count"""
+        self.rate_estimator.poll()
+        key = (self.rate_estimator.attempts, tumbal)
+        if self._posterior_costs is None or self._posterior_costs[0] != key:
+            table = L2MRateTable(*self.rate_estimator.posterior_rates(tumbal), success_only=())
+            self._posterior_costs = (key, L2MCostDistributionEngine(table))
+        return self._posterior_costs[1]
     
     def clear_screen(self):
         """Clear console screen"""
@@ -120,27 +191,37 @@ class L2MEnhancementMasterSystem:
         print("4. +9 → +10")
         level_choice = input("\nChoice (1-4): ")
         
-        level_map = {
-            '1': '+6_to_+7',
-            '2': '+7_to_+8',
-            '3': '+8_to_+9',
-            '4': '+9_to_+10'
-        }
-        level = level_map.get(level_choice, '+6_to_+7')
+        level_map = {'1': 6, '2': 7, '3': 8, '4': 9}
+        level = level_map.get(level_choice, 6)
         
         tumbal_count = int(input("\nNumber of tumbal destroyed: "))
+        print("Seconds since each tumbal was destroyed, comma separated")
+        seconds = input("(one value = same for all, Enter = just now): ").strip()
+        ages = [int(age) for age in seconds.replace(' ', '').split(',') if age.isdigit()] or [0]
+        if len(ages) < tumbal_count:
+            ages += [ages[-1] if len(ages) == 1 else 0] * (tumbal_count - len(ages))
+        
+        # Each tumbal decays on its own schedule in the karma tracker
+        now = time.time()
+        self.karma_tracker.reset(DEFAULT_CHARACTER)
+        for age in sorted(ages[:tumbal_count], reverse=True):
+            self.karma_tracker.record_destruction(DEFAULT_CHARACTER, now - age)
+        effective = self.karma_tracker.effective_tumbal(DEFAULT_CHARACTER, now)
         
         # Calculate
-        base_rate = self.enhancement_rates[grade][level]
-        karma_boost = min(tumbal_count * 0.03, 0.30)
-        final_rate = base_rate + karma_boost
+        base_rate = self.rate_table.base_rate(grade, level)
+        karma_boost = self.karma_tracker.effective_boost(DEFAULT_CHARACTER, now)
+        final_rate = min(base_rate + karma_boost, FINAL_RATE_CAP)
         
         print("\n" + "="*50)
         print("📊 CALCULATION RESULTS:")
         print(f"• Weapon Grade: {grade.upper()}")
-        print(f"• Enhancement: {level.replace('_to_', ' → ')}")
+        print(f"• Enhancement: +{level} → +{level + 1}")
         print(f"• Base Rate: {base_rate*100:.1f}%")
         print(f"• Tumbal Destroyed: {tumbal_count}")
+        if tumbal_count:
+            print(f"• Karma Effectiveness: {effective / tumbal_count*100:.0f}% "
+                  f"({effective:.1f} effective tumbal)")
         print(f"• Karma Boost: +{karma_boost*100:.1f}%")
         print(f"• FINAL SUCCESS RATE: {final_rate*100:.1f}%")
         print(f"• Expected Attempts: {1/final_rate:.2f}")
@@ -153,50 +234,26 @@ class L2MEnhancementMasterSystem:
         self.print_header()
         print("💀 TUMBAL STRATEGY ANALYSIS\n")
         
-        strategies = {
-            'RARE WEAPONS': {
-                '+7 (33% base)': {
-                    'tumbal_needed': '2-3 weapons',
-                    'final_rate': '39-42%',
-                    'recommendation': 'Optional, base rate decent'
-                },
-                '+8 (20% base)': {
-                    'tumbal_needed': '5 weapons',
-                    'final_rate': '35%',
-                    'recommendation': 'Recommended, saves attempts'
-                },
-                '+9 (12% base)': {
-                    'tumbal_needed': '8 weapons',
-                    'final_rate': '36%',
-                    'recommendation': 'MANDATORY - triples success'
-                }
-            },
-            'UNIQUE WEAPONS': {
-                '+7 (30% base)': {
-                    'tumbal_needed': '3 weapons',
-                    'final_rate': '39%',
-                    'recommendation': 'Good value for expensive item'
-                },
-                '+8 (18% base)': {
-                    'tumbal_needed': '6 weapons',
-                    'final_rate': '36%',
-                    'recommendation': 'Essential - doubles success'
-                },
-                '+9 (10% base)': {
-                    'tumbal_needed': '10 weapons',
-                    'final_rate': '40%',
-                    'recommendation': 'MANDATORY - quadruples rate'
-                }
-            }
-        }
+        # Profit-maximizing tumbal counts at current market prices
+        strategies = self.tumbal_roi.table()
         
         for grade, levels in strategies.items():
-            print(f"\n[{grade}]")
-            for level, data in levels.items():
-                print(f"\n• {level}")
-                print(f"  Tumbal: {data['tumbal_needed']}")
-                print(f"  Success: {data['final_rate']}")
-                print(f"  Note: {data['recommendation']}")
+            print(f"\n[{grade.upper()} WEAPONS]")
+            for target, best in levels.items():
+                tumbal = best['tumbal']
+                base_rate = self.rate_table.base_rate(grade, target - 1)
+                step = self.markov_solver.solve(grade, target - 1, target, tumbal)
+                print(f"\n• +{target} ({base_rate*100:.0f}% base)")
+                print(f"  Tumbal: {tumbal} weapons")
+                print(f"  Success Before Destroy: {step['success_probability']*100:.0f}%")
+                print(f"  Expected Attempts: {step['expected_attempts_with_restart']:.2f}")
+                print(f"  Destroy Risk: {step['destroy_probability']*100:.0f}%")
+                print(f"  Expected Profit: {best['profit']:+.0f} diamonds (ROI {best['roi']*100:+.0f}%)")
+                if tumbal:
+                    gain = best['profit'] - best['no_tumbal_profit']
+                    print(f"  Note: {tumbal} tumbal add {gain:+.0f} diamonds vs none")
+                else:
+                    print("  Note: Skip tumbal - base rate pays better")
         
         print("\n" + "="*50)
         print("⚠️ TUMBAL SUCCESS PROBLEM:")
@@ -212,30 +269,16 @@ class L2MEnhancementMasterSystem:
         self.print_header()
         print("⏰ REAL-TIME ENHANCEMENT ADVISOR\n")
         
-        current_time = datetime.now()
+        current_time = self.epic_analyzer.now()
         hour = current_time.hour
         weekday = current_time.strftime('%A')
         
-        # Time scoring
-        time_scores = {
-            range(0, 1): (95, '⭐⭐⭐⭐⭐', 'EXCELLENT - Daily reset!'),
-            range(1, 6): (85, '⭐⭐⭐⭐', 'GOOD - Low population'),
-            range(6, 10): (70, '⭐⭐⭐', 'ACCEPTABLE - Moderate'),
-            range(10, 17): (50, '⭐⭐', 'POOR - Standard rates'),
-            range(17, 20): (35, '⭐', 'BAD - High population'),
-            range(20, 24): (25, '⭐', 'TERRIBLE - Peak hours')
-        }
-        
-        score = 50
-        rating = '⭐⭐'
-        advice = 'Standard conditions'
-        
-        for time_range, (s, r, a) in time_scores.items():
-            if hour in time_range:
-                score, rating, advice = s, r, a
-                break
+        # Timing score from the week × hour grid
+        windows = self.epic_analyzer.time_windows()
+        slot = windows.slot(current_time)
+        score, rating, advice = slot['score'], slot['rating'], slot['assessment']
         
-        print(f"Current Time: {current_time.strftime('%Y-%m-%d %H:%M')}")
+        print(f"Server Time ({self.epic_analyzer.region}): {current_time.strftime('%Y-%m-%d %H:%M')}")
         print(f"Day: {weekday}")
         print(f"Hour: {hour:02d}:00")
         print()
@@ -253,7 +296,11 @@ class L2MEnhancementMasterSystem:
             print("• Consider waiting for better time")
         else:
             print("❌ RECOMMENDATION: WAIT!")
-            print(f"• Next good window: {(24-hour) if hour > 0 else 1} hours")
+            window = windows.next_window(current_time, min_score=75)
+            if window:
+                minutes = int((window - current_time).total_seconds() // 60)
+                print(f"• Next good window: {window.strftime('%A %H:%M')} "
+                      f"(in {minutes // 60}h {minutes % 60:02d}m)")
             print("• Save materials for better timing")
         
         print("\n" + "="*50)
@@ -278,17 +325,19 @@ class L2MEnhancementMasterSystem:
         tumbal = int(input("Tumbal destroyed: "))
         event = input("Event active? (y/n): ").lower() == 'y'
         
-        level_key = f'+{current}_to_+{target}'
-        
         try:
-            base_rate = self.enhancement_rates.get(grade, self.enhancement_rates['rare']).get(level_key, 0.10)
-        except:
-            base_rate = 0.10
+            base_rate = self.rate_table.base_rate(grade, current)
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            input("\nPress Enter to continue...")
+            return
+        # Success-only grades (legendary) have no destroy rates for the cost distribution
+        compiled = grade in self.rate_table.grades
         
-        karma_boost = min(tumbal * 0.03, 0.30)
-        event_boost = 0.25 if event else 0
+        karma_boost = karma_boost_for(tumbal)
+        event_boost = EVENT_BOOST if event else 0
         
-        final_rate = min(base_rate + karma_boost + event_boost, 0.75)
+        final_rate = min(base_rate + karma_boost + event_boost, FINAL_RATE_CAP)
         
         attempts_needed = 1 / final_rate if final_rate > 0 else 999
         
@@ -299,21 +348,76 @@ class L2MEnhancementMasterSystem:
         if event:
             print(f"• Event Boost: +{event_boost*100:.1f}%")
         print(f"• FINAL RATE: {final_rate*100:.1f}%")
+        if self.streak_detector.is_hot(DEFAULT_CHARACTER):
+            print("• 🔥 HOT STREAK: recent successes beat the odds - attempt the main weapon now")
+        
+        if compiled:
+            posterior = self.posterior_costs(tumbal)
+            logged = self.rate_estimator.base_rate(grade, current, tumbal)
+            if logged['observed']:
+                low, high = logged['interval']
+                print(f"• Posterior Rate: {logged['mean']*100:.1f}% "
+                      f"(90% CI {low*100:.1f}-{high*100:.1f}%, {logged['observed']} attempts)")
+            if self.rate_estimator.attempts:
+                boost = self.rate_estimator.karma_boost(grade)
+                low, high = boost.interval()
+                print(f"• Posterior Karma: +{boost.mean*100:.1f}% per tumbal "
+                      f"(90% CI {low*100:.1f}-{high*100:.1f}%)")
+        history = self.history.success_rate(grade, current, tumbal)
+        if history['attempts']:
+            print(f"• Your History: {history['rate']*100:.1f}% over {history['attempts']} attempts")
+            by_hour = self.history.success_rate(grade, current, tumbal, by_hour=True)
+            sampled = [(hour, stats) for hour, stats in by_hour.items() if stats['attempts'] >= 20]
+            if sampled:
+                hour, stats = max(sampled, key=lambda item: item[1]['rate'])
+                print(f"• Your Best Hour: {hour:02d}:00 ({stats['rate']*100:.1f}% over {stats['attempts']} attempts)")
         print()
+        diamond_per_attempt = diamond_cost_per_attempt(current) + tumbal * DEFAULT_TUMBAL_PRICE
         print(f"Expected Attempts: {attempts_needed:.2f}")
-        print(f"90% Confidence: {attempts_needed*0.5:.1f}-{attempts_needed*2:.1f} attempts")
-        
-        # Diamond cost estimation
-        diamond_per_attempt = 50 if current <= 7 else 100 if current == 8 else 200
-        total_cost = attempts_needed * diamond_per_attempt
+        if compiled:
+            # Exact cost distribution (a destroyed weapon is replaced at the same level)
+            dist = self.cost_distribution.distribution(grade, current, target, tumbal, event)
+            low_attempts = dist.quantile(0.05) // diamond_per_attempt
+            high_attempts = dist.quantile(0.95) // diamond_per_attempt
+            print(f"90% Confidence: {low_attempts}-{high_attempts} attempts")
         
         print()
         print(f"💎 ESTIMATED COST:")
-        print(f"• Per attempt: {diamond_per_attempt} diamonds")
-        print(f"• Expected total: {total_cost:.0f} diamonds")
-        print(f"• Worst case (2x): {total_cost*2:.0f} diamonds")
+        print(f"• Per attempt: {diamond_per_attempt} diamonds"
+              + (f" (incl. {tumbal} tumbal @ {DEFAULT_TUMBAL_PRICE})" if tumbal else ""))
+        if compiled:
+            print(f"• Expected total: {dist.mean:.0f} diamonds")
+            print(f"• Median: {dist.quantile(0.5)} diamonds")
+            print(f"• Worst case (95%): {dist.quantile(0.95)} diamonds")
+            print(f"• Worst case (99%): {dist.quantile(0.99)} diamonds")
+            if self.rate_estimator.attempts:
+                mine = posterior.distribution(grade, current, target, tumbal, event)
+                print(f"• At your posterior rates: {mine.mean:.0f} expected, "
+                      f"{mine.quantile(0.95)} worst case (95%)")
+        else:
+            print(f"• Expected total: {attempts_needed * diamond_per_attempt:.0f} diamonds "
+                  f"(excluding replacements)")
+            print(f"• No destruction rates for {grade}: worst-case costs are not available")
         print("="*50)
         
+        results = {'s': 'success', 'f': 'fail', 'd': 'destroy'}
+        burns = input(f"\nRecord tumbal burns ({TUMBAL_STEP[0]} +{TUMBAL_STEP[1]}) in order? "
+                      "(e.g. ddsd, Enter=skip): ").lower()
+        signals = []
+        for burn in burns:
+            if burn in results:
+                signals += self.record_attempt(*TUMBAL_STEP, 0, results[burn], event, is_tumbal=True)
+        result = input("Record your attempt? (s=success, f=fail, d=destroyed, Enter=skip): ").lower()
+        if result in results:
+            signals += self.record_attempt(grade, current, tumbal, results[result], event)
+            print("✅ Attempt recorded")
+        for signal in signals:
+            if signal['state'] == 'hot':
+                print(f"🔥 HOT STREAK: {signal['successes']} successes vs {signal['expected']:.1f} expected "
+                      f"({signal['tumbal_successes']} tumbal) - attempt the main weapon now")
+            else:
+                print("❄️ Streak cooled down")
+        
         input("\nPress Enter to continue...")
     
     def economic_analysis(self):
@@ -336,19 +440,27 @@ class L2MEnhancementMasterSystem:
         print("TUMBAL INVESTMENT ANALYSIS:")
         print()
         
+        # (grade, level reached, tumbal per attempt); the +N-1 weapon is
+        # bought at market price and rebought whenever it is destroyed
         scenarios = [
-            ("Rare +7", 5, 250, 400, "60% profit"),
-            ("Rare +8", 8, 400, 1500, "275% profit"),
-            ("Unique +7", 5, 250, 2500, "900% profit"),
-            ("Unique +8", 10, 500, 8000, "1500% profit")
+            ('rare', 7, 5),
+            ('rare', 8, 8),
+            ('unique', 7, 5),
+            ('unique', 8, 10)
         ]
         
-        for item, tumbal, cost, value, roi in scenarios:
-            print(f"{item}:")
-            print(f"  • Tumbal needed: {tumbal}")
-            print(f"  • Investment: {cost} diamonds")
-            print(f"  • Success value: {value} diamonds")
-            print(f"  • ROI: {roi}")
+        for grade, level, tumbal in scenarios:
+            prices = MARKET_PRICES[grade]
+            dist = self.cost_distribution.distribution(
+                grade, level - 1, level, tumbal, item_price=prices[level - 1])
+            investment = prices[level - 1] + dist.mean
+            roi = (prices[level] - investment) / investment * 100
+            print(f"{grade.title()} +{level}:")
+            print(f"  • Tumbal per attempt: {tumbal} (@ {DEFAULT_TUMBAL_PRICE} diamonds)")
+            print(f"  • Investment: {investment:.0f} diamonds "
+                  f"(90% ≤ {prices[level - 1] + dist.quantile(0.9)})")
+            print(f"  • Success value: {prices[level]} diamonds")
+            print(f"  • ROI: {roi:+.0f}%")
             print()
         
         print("="*50)
@@ -365,13 +477,14 @@ class L2MEnhancementMasterSystem:
         print("• Karma reset to 0!")
         print()
         
-        print("QUICK DECISION GUIDE:")
+        print("QUICK DECISION GUIDE (Unique +8 → +9, 5 fodder left):")
         print("="*50)
-        print("If tumbal succeeds after:")
-        print("• 0-1 destroyed → RESTART (need more)")
-        print("• 2 destroyed → Borderline (50/50 decision)")
-        print("• 3 destroyed → PROCEED (acceptable karma)")
-        print("• 4+ destroyed → DEFINITELY PROCEED")
+        policy = self.tumbal_policy.solve('unique', start=8, target=9, max_fodder=10)
+        plain = policy.table(5, 8)
+        pivot = policy.table(5, 8, pivot=True)
+        for karma in range(6):
+            print(f"• {karma} destroyed → {plain[karma].upper()}"
+                  f" (holding tumbal +7: {pivot[karma].upper()})")
         print()
         
         print("SOLUTIONS:")
@@ -393,6 +506,82 @@ class L2MEnhancementMasterSystem:
         print("   • If destroys, karma continues")
         print("="*50)
         
+        if self.history.attempt_count() and \
+                input("\nReplay your recorded attempts with 5/8/10 tumbal? (y/n): ").lower() == 'y':
+            self.tumbal_replay_review()
+        
+        if input("\nPlan your own fodder inventory? (y/n): ").lower() == 'y':
+            self.fodder_allocation_plan()
+            return
+        
+        input("\nPress Enter to continue...")
+        
+    def tumbal_replay_review(self):
+        """Re-run recorded attempts under other tumbal counts with the same luck"""
+        log = self.history.attempt_log()
+        try:
+            results = self.tumbal_replay.replay(log, {f'{count} tumbal': count for count in (5, 8, 10)})
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            return
+        
+        actual = results['actual']
+        print("\n" + "="*50)
+        print(f"🔁 YOUR HISTORY REPLAYED ({actual['sessions']} sessions, {log['outcome'].size} attempts):")
+        for name, result in results.items():
+            print(f"• {name.title()}: {result['diamonds']:.0f} diamonds ({result['diamond_delta']:+.0f}), "
+                  f"{result['destroyed']:.1f} destroyed + {result['tumbal_used']:.0f} tumbal "
+                  f"({result['item_delta']:+.1f} items)")
+        best = min(results, key=lambda name: results[name]['diamonds'])
+        print(f"\n💡 Cheapest on your history: {best}")
+        print("="*50)
+    
+    def fodder_allocation_plan(self):
+        """Plan which fodder to burn against which main weapon"""
+        print("\nMain weapons as 'grade level target', comma separated (e.g. unique 8 9, rare 7 9)")
+        print("Fodder as 'grade level count', comma separated (e.g. common 6 40, rare 6 20)")
+        try:
+            mains = [
+                {'grade': grade, 'level': int(level), 'target': int(target)}
+                for grade, level, target in (part.split() for part in input("Mains: ").lower().split(','))
+            ]
+            inventory = defaultdict(int)
+            for grade, level, count in (part.split() for part in input("Fodder: ").lower().split(',')):
+                inventory[(grade, int(level))] += int(count)
+            plan = self.fodder_planner.plan(dict(inventory), mains)
+        except ValueError as e:
+            print(f"\n❌ {e}")
+            input("\nPress Enter to continue...")
+            return
+        
+        print("\n" + "="*50)
+        print("📦 FODDER ALLOCATION PLAN:")
+        print("Burn order (fixed heuristic, cheapest per destruction first): "
+              + ", ".join(f"{count}x {grade} +{level}" for grade, level, count in plan.burn_order()))
+        for main, outcome in zip(mains, plan.expected['mains']):
+            print(f"• {main['grade'].title()} +{main['level']} → +{main['target']}: "
+                  f"{outcome['reach_target']*100:.1f}% to reach, worth {outcome['value']:.0f} diamonds")
+        print(f"• Expected fodder burned: {plan.expected['fodder_used']:.1f}")
+        print(f"• Expected fodder value consumed: {plan.expected['fodder_value']:.0f} diamonds "
+              f"(net of fodder retired upgraded)")
+        print(f"• Expected diamonds spent: {plan.expected['diamonds']:.0f}")
+        print(f"• Expected net worth: {plan.expected['objective']:.0f} diamonds")
+        if plan.expected['assumed_rates']:
+            print(f"⚠️ Assumed (unsourced) fodder rates used for: {', '.join(plan.expected['assumed_rates'])}")
+        
+        print("\nOPENING MOVES (by karma):")
+        levels = [main['level'] for main in mains]
+        for karma in range(plan.max_karma + 1):
+            action, target = plan.action(levels, karma, 0)
+            if action == 'burn':
+                detail = f"BURN {target[0]} +{target[1]}"
+            elif action == 'attempt':
+                detail = f"ATTEMPT {mains[target]['grade']} +{mains[target]['level']}"
+            else:
+                detail = "STOP"
+            print(f"• {karma} destroyed → {detail}")
+        print("="*50)
+        
         input("\nPress Enter to continue...")
     
     def export_report(self):
@@ -403,19 +592,11 @@ class L2MEnhancementMasterSystem:
         report = {
             'generated': datetime.now().isoformat(),
             'version': self.version,
-            'enhancement_rates': self.enhancement_rates,
-            'destruction_rates': self.destruction_rates,
+            'enhancement_rates': self.rate_table.enhancement_rates,
+            'destruction_rates': self.rate_table.destruction_rates,
             'optimal_tumbal': {
-                'rare': {
-                    '+7': '2-3 tumbal',
-                    '+8': '5 tumbal',
-                    '+9': '8 tumbal'
-                },
-                'unique': {
-                    '+7': '3 tumbal',
-                    '+8': '6 tumbal',
-                    '+9': '10 tumbal'
-                }
+                grade: {f'+{target}': f"{best['tumbal']} tumbal" for target, best in levels.items()}
+                for grade, levels in self.tumbal_roi.table().items()
             },
             'timing_windows': {
                 'best': '00:00-00:30 daily reset',
@@ -434,11 +615,20 @@ class L2MEnhancementMasterSystem:
         
         try:
             with open(filename, 'w') as f:
-                json.dump(report, f, indent=2)
+                json.dump(report, f, indent=2, default=dict)
             print(f"✅ Report saved: {filename}")
         except Exception as e:
             print(f"❌ Error saving report: {e}")
         
+        if input("\nAlso export the full simulation sweep? (y/n): ").lower() == 'y':
+            try:
+                trials = int(input("Trials per configuration (default 100000): ") or 100_000)
+                filename = f"L2M_Sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson.gz"
+                rows = export_sweep(self.parallel_runner, self.parallel_runner.grid(), filename, trials)
+                print(f"✅ Sweep saved: {filename} ({rows} configurations)")
+            except Exception as e:
+                print(f"❌ Error exporting sweep: {e}")
+        
         input("\nPress Enter to continue...")
     
     def epic_drop_map_analysis(self):
@@ -462,19 +652,17 @@ class L2MEnhancementMasterSystem:
         print("BEST EPIC DROP MAPS BY LEVEL:")
         print("="*50)
         
-        level_ranges = [
-            (40, 50, "Level 40-50"),
-            (50, 60, "Level 50-60"),
-            (60, 70, "Level 60-70"),
-            (70, 80, "Level 70+")
-        ]
-        
-        for min_lvl, max_lvl, label in level_ranges:
+        today = day_analysis['current_day'].lower()
+        for (min_lvl, max_lvl), maps in self.epic_analyzer.map_catalog.brackets:
+            label = f"Level {min_lvl}-{max_lvl}" if max_lvl else f"Level {min_lvl}+"
             print(f"\n[{label}]")
-            maps = self.epic_analyzer.epic_drop_maps.get(f'level_{min_lvl}_{max_lvl}', {})
-            for map_name, map_data in list(maps.items())[:2]:
-                print(f"\n• {map_name.replace('_', ' ')}")
-                print(f"  Drop Rate: {map_data['drop_rate']}")
+            for throughput in self.epic_analyzer.yield_model.rank(maps, day=today)[:2]:
+                map_data = throughput['map']
+                print(f"\n• {map_data['name']}")
+                print(f"  Drop Rate: {map_data['drop_rate'][0]:g}-{map_data['drop_rate'][1]:g}%")
+                print(f"  Throughput: {throughput['kills_per_hour']:.0f} kills/h → "
+                      f"{throughput['expected_epics']:.2f} epics/h "
+                      f"(P(1+) {throughput['p_any_epic']*100:.0f}%)")
                 print(f"  Best Time: {map_data['best_time']}")
                 print(f"  Competition: {map_data['competition']}")
                 print(f"  Items: {', '.join(map_data['epic_items'][:2])}")
@@ -507,24 +695,37 @@ class L2MEnhancementMasterSystem:
                 print(f"   Time Until: {timer['time_until']}")
                 print(f"   Drops: {', '.join(timer['drops'])}")
         else:
-            print("No scheduled world bosses in next 24 hours")
+            print("No scheduled world bosses in the next 7 days")
         
         print("\n" + "="*50)
-        print("FIELD BOSS RESPAWN TIMES:")
+        print("NEXT FIELD BOSS SPAWNS:")
         print("="*50)
         
-        field_bosses = {
-            'Contaminated Orc Chief': '2 hours',
-            'Giant Wasteland Basilisk': '3 hours',
-            'Death Knight': '4 hours',
-            'Cursed Clara': '6 hours',
-            'Core': '8-12 hours',
-            'Orfen': '12-24 hours',
-            'Queen Ant': '24-36 hours'
-        }
-        
-        for boss, respawn in field_bosses.items():
-            print(f"• {boss}: {respawn}")
+        for timer in self.epic_analyzer.get_field_boss_timers(count=7):
+            if timer['spawn_time'] is None:
+                print(f"• {timer['boss']}: respawns {timer['respawn_time']} after a kill"
+                      f" ({timer['location']}, no kill recorded)")
+            else:
+                print(f"• {timer['boss']}: {timer['spawn_time'].strftime('%a %H:%M')}"
+                      f" (in {timer['time_until']}, {timer['location']})")
+        
+        likely = self.epic_analyzer.get_field_bosses_up()
+        if likely:
+            print("\nMOST LIKELY UP (next 15 min):")
+            for entry in likely:
+                channel = f" ch.{entry['channel']}" if entry['channel'] is not None else ""
+                chance = "overdue, maybe killed" if entry['overdue'] else f"{entry['probability']*100:.0f}%"
+                print(f"• {entry['boss']}{channel}: {chance}"
+                      f" (window {entry['window_start'].strftime('%H:%M')}-{entry['window_end'].strftime('%H:%M')})")
+        
+        kill = input("\nRecord a field boss kill? ('boss[, channel]', Enter=skip): ").strip()
+        if kill:
+            boss, _, channel = kill.partition(',')
+            try:
+                self.epic_analyzer.record_field_kill(boss.strip().title(), channel=channel.strip() or None)
+                print("✅ Kill recorded")
+            except ValueError as e:
+                print(f"❌ {e}")
         
         print("\n" + "="*50)
         print("WORLD BOSS SCHEDULE:")
@@ -557,33 +758,38 @@ class L2MEnhancementMasterSystem:
                 print(f"\nPriority {route['priority']}: {route['map']}")
                 print(f"  Reason: {route['reason']}")
                 print(f"  Epic Rate: {route['epic_rate']}")
+                print(f"  Throughput: {route['epics_per_hour']:.2f} epics/hour "
+                      f"({route['p_epic_per_hour']*100:.0f}% chance of 1+ per hour)")
                 print(f"  Target Items: {', '.join(route['items'])}")
         else:
             print("No specific route for this level")
         
+        plan = self.epic_analyzer.plan_farming_route(level, hours=4)
+        if plan['route']:
+            print(f"\n⏱️ OPTIMIZED 4H PLAN ({plan['expected_epics']:.2f} expected epics):")
+            for segment in plan['route']:
+                print(f"• {segment['start'].strftime('%H:%M')}-{segment['end'].strftime('%H:%M')} "
+                      f"{segment['map']} ({segment['expected_epics']:.2f} epics)")
+        
         # Daily optimization
-        current_hour = datetime.now().hour
+        now = self.epic_analyzer.now()
+        slot = self.epic_analyzer.time_windows().slot(now)
         print("\n" + "="*50)
         print("TODAY'S OPTIMIZATION:")
         print("="*50)
         
-        if 0 <= current_hour < 6:
-            print("✅ PRIME TIME NOW! (00:00-06:00)")
-            print("• Lowest competition")
-            print("• Best drop rates")
-            print("• Farm elite zones")
-        elif 6 <= current_hour < 12:
-            print("⚠️ MODERATE TIME (06:00-12:00)")
-            print("• Medium competition")
-            print("• Focus on less popular maps")
-        elif 12 <= current_hour < 19:
-            print("❌ POOR TIME (12:00-19:00)")
-            print("• High competition")
-            print("• Consider waiting or do quests")
-        else:
-            print("⚡ BOSS TIME (19:00-24:00)")
+        if slot['boss_time']:
+            print(f"⚡ BOSS TIME ({now.strftime('%H:00')})")
             print("• Check for world bosses")
             print("• Join raid parties")
+        else:
+            icon = {'Low': '✅', 'Moderate': '⚠️', 'Standard': '❌', 'High': '❌'}[slot['competition']]
+            print(f"{icon} {slot['time_bonus']} ({now.strftime('%H:00')})")
+            print(f"• {slot['recommended_action']}")
+            print(f"• Best maps this hour: {', '.join(slot['best_maps'][:2])}")
+            prime = self.epic_analyzer.time_windows().next_window(now, min_score=85)
+            if prime and prime > now:
+                print(f"• Next prime window: {prime.strftime('%A %H:%M')}")
         
         # Special day bonuses
         day_analysis = self.epic_analyzer.get_current_day_analysis()
@@ -621,7 +827,7 @@ class L2MEnhancementMasterSystem:
         print("• More tumbal = higher success")
         print("• Timing is critical")
         print("• Stop after failures")
-        print("• Track your patterns")
+        print("• Track your patterns (record attempts in the Success Rate Calculator)")
         print()
         print("="*50)
         print("Created for L2M community")
@@ -671,5 +877,131 @@ def main():
     app = L2MEnhancementMasterSystem()
     app.run()
 
+def batch_main(argv=None):
+    """Non-interactive entry point: evaluate scenario rows from a file or stdin"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='l2m_master_optimizer.py batch',
+        description='Evaluate enhancement scenarios (grade,current,tumbal,event) in bulk'
+    )
+    parser.add_argument('input', nargs='?', default='-', help='CSV/JSONL file, or - for stdin')
+    parser.add_argument('-o', '--output', default='-', help='CSV/JSONL file, or - for stdout')
+    parser.add_argument('--in-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--out-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args(argv)
+    
+    in_format = args.in_format or detect_format(args.input)
+    out_format = args.out_format or detect_format(args.output, default=in_format)
+    
+    app = L2MEnhancementMasterSystem()
+    evaluator = L2MBatchEvaluator(app.rate_table, chunk_size=args.chunk_size)
+    
+    instream = sys.stdin if args.input == '-' else open(args.input, newline='')
+    outstream = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    try:
+        total = evaluator.run(instream, outstream, in_format, out_format)
+    finally:
+        if instream is not sys.stdin:
+            instream.close()
+        if outstream is not sys.stdout:
+            outstream.close()
+    print(f"Evaluated {total} scenarios", file=sys.stderr)
+
+def whatif_main(argv=None):
+    """Non-interactive entry point: sweep rate/karma parameters and write the grid"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='l2m_master_optimizer.py whatif',
+        description='Sweep rate and karma parameters; axes take a,b,c lists or start:stop:count'
+    )
+    parser.add_argument('-o', '--output', default='L2M_WhatIf', help='Output prefix for .npz/.csv')
+    parser.add_argument('--grade', type=lambda text: text.split(','))
+    parser.add_argument('--level', type=lambda text: parse_axis(text, int))
+    parser.add_argument('--rate-delta', type=parse_axis)
+    parser.add_argument('--tumbal', type=lambda text: parse_axis(text, int))
+    parser.add_argument('--karma-step', type=parse_axis)
+    parser.add_argument('--karma-cap', type=parse_axis)
+    parser.add_argument('--event-boost', type=parse_axis)
+    parser.add_argument('--final-cap', type=parse_axis)
+    args = parser.parse_args(argv)
+    
+    app = L2MEnhancementMasterSystem()
+    grid = L2MSensitivityGrid(app.rate_table)
+    axes = {name: values for name, values in vars(args).items() if name != 'output' and values}
+    try:
+        results = grid.evaluate(**axes)
+    except ValueError as e:
+        parser.error(str(e))
+    paths = grid.write(results, args.output)
+    print(f"Evaluated {results['success'].size} combinations → {', '.join(paths)}", file=sys.stderr)
+
+def sweep_main(argv=None):
+    """Non-interactive entry point: simulate a grade/target/tumbal sweep and stream it to disk"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog='l2m_master_optimizer.py sweep',
+        description='Simulate a sweep; .ndjson[.gz|.zst] gets histograms (or rows with --per-trial), '
+                    '.l2mc gets memory-mappable per-trial columns'
+    )
+    parser.add_argument('-o', '--output', default='L2M_Sweep.ndjson.gz')
+    parser.add_argument('--trials', type=int, default=100_000)
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--grade', type=lambda text: text.split(','), default=list(GRADES))
+    parser.add_argument('--start', type=int, default=6)
+    parser.add_argument('--target', type=lambda text: parse_axis(text, int), default=[7, 8, 9, 10])
+    parser.add_argument('--tumbal', type=lambda text: parse_axis(text, int), default=list(range(11)))
+    parser.add_argument('--event', action='store_true')
+    parser.add_argument('--per-trial', action='store_true', help='Write every trial instead of histograms')
+    args = parser.parse_args(argv)
+    
+    app = L2MEnhancementMasterSystem()
+    runner = app.parallel_runner
+    configs = runner.grid(args.grade, args.start, args.target, args.tumbal, args.event)
+    per_trial = args.per_trial or args.output.endswith('.l2mc')
+    try:
+        rows = export_sweep(runner, configs, args.output, args.trials, args.seed, per_trial)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Wrote {rows} rows for {len(configs)} configurations → {args.output}", file=sys.stderr)
+
+def serve_main(argv=None):
+    """Non-interactive entry point: serve the calculators and timers as a local JSON API"""
+    import argparse
+    import asyncio
+    
+    parser = argparse.ArgumentParser(
+        prog='l2m_master_optimizer.py serve',
+        description='Local HTTP/JSON API for rates, cost distributions, boss timers and routes'
+    )
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE)
+    args = parser.parse_args(argv)
+    
+    server = L2MAPIServer(L2MEnhancementMasterSystem(), args.host, args.port, args.cache_size)
+    
+    async def run():
+        await server.start()
+        print(f"Serving on http://{server.host}:{server.port}", file=sys.stderr)
+        await server.serve_forever()
+    
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        batch_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'whatif':
+        whatif_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'sweep':
+        sweep_main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        serve_main(sys.argv[2:])
+    else:
+        main()
\ No newline at end of file
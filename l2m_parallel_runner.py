@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Parallel Simulation Runner
+Process-pool Monte Carlo with reproducible per-shard seed streams
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from l2m_rate_tables import GRADES
+from l2m_enhancement_simulator import L2MEnhancementSimulator
+
+METRICS = ('attempts', 'destroyed', 'diamonds')
+
+
+def _run_shard(task):
+    """Simulate one shard and reduce it to histograms and moments
+
+    Runs in a worker process; only the reduced statistics travel back.
+    """
+    rates, config, trials, seed, bin_width = task
+    simulator = L2MEnhancementSimulator(*rates, seed=seed)
+    result = simulator.simulate(trials=trials, **config)
+
+    shard = {'trials': trials, 'destroy_count': int((result['destroyed'] > 0).sum())}
+    for name in METRICS:
+        values = result[name]
+        width = bin_width if name == 'diamonds' else 1
+        bins = np.floor_divide(values, width).astype(np.int64)
+        shard[name] = {
+            'counts': np.bincount(bins),
+            'sum': float(values.sum()),
+            'sumsq': float(np.square(values, dtype=np.float64).sum()),
+            'min': float(values.min()),
+            'max': float(values.max())
+        }
+    return shard
+
+
+def _merge(shards, bin_width):
+    """Combine shard statistics in a fixed order (bit-identical merges)"""
+    merged = {
+        'trials': sum(s['trials'] for s in shards),
+        'destroy_count': sum(s['destroy_count'] for s in shards),
+        'bin_width': bin_width
+    }
+    for name in METRICS:
+        size = max(s[name]['counts'].size for s in shards)
+        counts = np.zeros(size, dtype=np.int64)
+        total = totalsq = 0.0
+        for s in shards:
+            counts[:s[name]['counts'].size] += s[name]['counts']
+            total += s[name]['sum']
+            totalsq += s[name]['sumsq']
+        merged[name] = {
+            'counts': counts,
+            'sum': total,
+            'sumsq': totalsq,
+            'min': min(s[name]['min'] for s in shards),
+            'max': max(s[name]['max'] for s in shards)
+        }
+    return merged
+
+
+class L2MParallelRunner:
+    """Shards enhancement simulations across a process pool
+
+    Trials are split into a fixed number of shards, each with its own
+    child SeedSequence spawned from the master seed. The shard layout does
+    not depend on the worker count, so a given master seed produces the
+    same merged histograms on any machine.
+    """
+
+    def __init__(self, enhancement_rates, destruction_rates, workers=None,
+                 shard_trials=250_000, bin_width=50):
+        self.rates = (enhancement_rates, destruction_rates)
+        self.workers = workers or os.cpu_count() or 1
+        self.shard_trials = shard_trials
+        self.bin_width = bin_width
+
+    def _tasks(self, config, trials, seed_seq):
+        n_shards = max(1, -(-trials // self.shard_trials))
+        sizes = [trials // n_shards + (i < trials % n_shards) for i in range(n_shards)]
+        return [
+            (self.rates, config, size, child, self.bin_width)
+            for size, child in zip(sizes, seed_seq.spawn(n_shards))
+        ]
+
+    def _map(self, tasks):
+        if self.workers == 1:
+            return [_run_shard(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(_run_shard, tasks))
+
+    def run(self, grade, start=6, target=10, trials=1_000_000, tumbal=0,
+            event=False, tumbal_cost=0, seed=None):
+        """Simulate one configuration, returns merged histograms and stats"""
+        return self.sweep([{
+            'grade': grade, 'start': start, 'target': target,
+            'tumbal': tumbal, 'event': event, 'tumbal_cost': tumbal_cost
+        }], trials, seed)[0]
+
+    def sweep(self, configs, trials=1_000_000, seed=None):
+        """Simulate many configurations through one shared pool
+
+        Each config gets its own seed stream spawned from the master seed,
+        so results do not depend on the order other configs finish in.
+        """
+        root = np.random.SeedSequence(seed)
+        tasks, owners = [], []
+        for i, (config, config_seq) in enumerate(zip(configs, root.spawn(len(configs)))):
+            config_tasks = self._tasks(config, trials, config_seq)
+            tasks.extend(config_tasks)
+            owners.extend([i] * len(config_tasks))
+
+        shards = self._map(tasks)
+
+        results = []
+        for i, config in enumerate(configs):
+            merged = _merge([s for s, owner in zip(shards, owners) if owner == i], self.bin_width)
+            merged['config'] = dict(config)
+            merged['seed'] = root.entropy
+            results.append(merged)
+        return results
+
+    def iter_trials(self, configs, trials=1_000_000, seed=None):
+        """Yield (config index, raw simulate() result) one shard at a time
+
+        Uses the same seed streams and shard layout as sweep(), in this
+        process, so per-trial data can be streamed out without holding
+        more than one shard.
+        """
+        root = np.random.SeedSequence(seed)
+        for i, (config, config_seq) in enumerate(zip(configs, root.spawn(len(configs)))):
+            for rates, config, size, child, _ in self._tasks(config, trials, config_seq):
+                yield i, L2MEnhancementSimulator(*rates, seed=child).simulate(trials=size, **config)
+
+    def grid(self, grades=GRADES, start=6, targets=(7, 8, 9, 10),
+             tumbal_counts=range(0, 11), event=False):
+        """Every grade × target × tumbal configuration for a nightly sweep"""
+        return [
+            {'grade': grade, 'start': start, 'target': target,
+             'tumbal': tumbal, 'event': event, 'tumbal_cost': 0}
+            for grade in grades for target in targets for tumbal in tumbal_counts
+            if target > start
+        ]
+
+    def summarize(self, merged, percentiles=(10, 50, 90, 99)):
+        """Summary statistics computed from merged histograms"""
+        config = merged.get('config', {})
+        summary = {
+            'grade': config.get('grade'),
+            'enhancement': f"+{config.get('start')} → +{config.get('target')}",
+            'trials': merged['trials']
+        }
+        n = merged['trials']
+        for name in METRICS:
+            stats = merged[name]
+            mean = stats['sum'] / n
+            width = merged['bin_width'] if name == 'diamonds' else 1
+            cumulative = np.cumsum(stats['counts'])
+            result = {
+                'mean': mean,
+                'std': float(np.sqrt(max(stats['sumsq'] / n - mean * mean, 0.0)))
+            }
+            for pct in percentiles:
+                rank = int(np.ceil(pct / 100 * n))
+                result[f'p{pct}'] = float(np.searchsorted(cumulative, max(rank, 1)) * width)
+            summary[name] = result
+        summary['destroy_probability'] = merged['destroy_count'] / n
+        return summary
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Rate Estimator
+Incremental Beta posteriors of enhancement rates from recorded attempts
+"""
+
+import os
+import json
+import statistics
+from collections import defaultdict, deque
+
+from l2m_rate_tables import (
+    KARMA_PER_TUMBAL, KARMA_CAP, FINAL_RATE_CAP, MIN_LEVEL, MAX_LEVEL, GRADES, karma_boost, step_key
+)
+
+DEFAULT_ATTEMPT_LOG = 'L2M_Attempt_Log.jsonl'
+
+OUTCOMES = ('success', 'fail', 'destroy')
+LOG_FIELDS = ('grade', 'level', 'tumbal', 'outcome', 'timestamp')
+MAX_TUMBAL = int(round(KARMA_CAP / KARMA_PER_TUMBAL))
+
+
+class BetaPosterior:
+    """Beta(alpha, beta) posterior with O(1) updates"""
+
+    __slots__ = ('alpha', 'beta')
+
+    def __init__(self, alpha=1.0, beta=1.0):
+        self.alpha = alpha
+        self.beta = beta
+
+    def update(self, successes, failures=0):
+        self.alpha += successes
+        self.beta += failures
+
+    @property
+    def mean(self):
+        return self.alpha / (self.alpha + self.beta)
+
+    @property
+    def variance(self):
+        n = self.alpha + self.beta
+        return self.alpha * self.beta / (n * n * (n + 1))
+
+    def interval(self, level=0.90):
+        """Credible interval (normal approximation, clipped to [0, 1])"""
+        z = statistics.NormalDist().inv_cdf((1 + level) / 2)
+        half = z * self.variance ** 0.5
+        return max(0.0, self.mean - half), min(1.0, self.mean + half)
+
+
+class L2MRateEstimator:
+    """Keeps rate posteriors from the history store and an optional attempt log
+
+    load_history() folds a history store's non-event attempts in with one
+    grouped query; record() adds attempts as they are made. poll() tails
+    an append-only log (e.g. written by a guild bot): each line is a JSON
+    object (or CSV row in LOG_FIELDS order) with grade, level, tumbal
+    count, outcome (success/fail/destroy) and a timestamp, read in
+    `read_size` byte chunks so a large backlog never sits in memory at
+    once. Posteriors are kept per (grade, level, tumbal) cell, with
+    tumbal clamped at the karma cap, so memory is bounded by the size of
+    the rate table rather than the history. Priors are centred on the
+    current hardcoded rates (capped at FINAL_RATE_CAP) with
+    `prior_weight` pseudo-attempts.
+    """
+
+    def __init__(self, enhancement_rates, destruction_rates, log_path=DEFAULT_ATTEMPT_LOG,
+                 prior_weight=20, grades=GRADES, read_size=1 << 20):
+        self.log_path = log_path
+        self.grades = tuple(grades)
+        self.read_size = read_size
+        self.offset = 0
+        self.attempts = 0
+        self.last_timestamp = None
+        self.rejected = deque(maxlen=100)
+        self.observed = defaultdict(int)
+        self._partial = b''
+
+        self.success = {}
+        self.destroy = {}
+        for grade in self.grades:
+            for level in range(MIN_LEVEL, MAX_LEVEL):
+                base = enhancement_rates[grade][step_key(level)]
+                destroy = destruction_rates[grade][step_key(level)]
+                for tumbal in range(MAX_TUMBAL + 1):
+                    rate = min(base + karma_boost(tumbal), FINAL_RATE_CAP)
+                    self.success[grade, level, tumbal] = BetaPosterior(
+                        prior_weight * rate, prior_weight * (1 - rate))
+                self.destroy[grade, level] = BetaPosterior(
+                    prior_weight * destroy, prior_weight * (1 - destroy))
+
+        # Karma-boost terms per (grade, level), refreshed only where attempts landed
+        self._boost = {}
+        self._stale = {(grade, level) for grade in self.grades for level in range(MIN_LEVEL, MAX_LEVEL)}
+
+    def record(self, grade, level, tumbal, outcome, timestamp=None):
+        """Fold one attempt into the posteriors in O(1)"""
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        cell = (grade, level, min(max(tumbal, 0), MAX_TUMBAL))
+        if cell not in self.success:
+            raise ValueError(f"No rates for {grade} +{level}")
+
+        if outcome == 'success':
+            self.success[cell].update(1, 0)
+        else:
+            self.success[cell].update(0, 1)
+            self.destroy[grade, level].update(outcome == 'destroy', outcome != 'destroy')
+        self.observed[cell] += 1
+        self._stale.add(cell[:2])
+        self.attempts += 1
+        if timestamp is not None:
+            self.last_timestamp = timestamp
+
+    def load_history(self, store):
+        """Fold a history store's non-event attempts into the posteriors, returns how many"""
+        count = 0
+        for grade, level, tumbal, attempts, successes, destroys in store.step_counts():
+            cell = (grade, level, tumbal)
+            if cell not in self.success:
+                # Success-only grades have no posterior cells
+                continue
+            failures = attempts - successes
+            self.success[cell].update(successes, failures)
+            self.destroy[grade, level].update(destroys, failures - destroys)
+            self.observed[cell] += attempts
+            self._stale.add(cell[:2])
+            self.attempts += attempts
+            count += attempts
+        return count
+
+    def _parse(self, line):
+        if line.startswith('{'):
+            entry = json.loads(line)
+        else:
+            entry = dict(zip(LOG_FIELDS, (v.strip() for v in line.split(','))))
+        return (str(entry['grade']).lower(), int(str(entry['level']).lstrip('+')),
+                int(entry.get('tumbal') or 0), str(entry['outcome']).lower(),
+                entry.get('timestamp'))
+
+    def poll(self):
+        """Read lines appended since the last poll, returns how many were new
+
+        A trailing line without a newline is kept until it is completed.
+        A log that shrinks is treated as rotated and read from the start.
+        """
+        if not self.log_path or not os.path.exists(self.log_path):
+            return 0
+        if os.path.getsize(self.log_path) < self.offset:
+            self.offset = 0
+            self._partial = b''
+
+        count = 0
+        with open(self.log_path, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                data = f.read(self.read_size)
+                if not data:
+                    break
+                self.offset += len(data)
+                lines = (self._partial + data).split(b'\n')
+                self._partial = lines.pop()
+                for line in lines:
+                    count += self._consume(line)
+        return count
+
+    def _consume(self, raw):
+        """Record one complete log line, returns 1 if it was an attempt"""
+        line = raw.decode('utf-8', errors='replace').strip()
+        if not line or line.startswith('grade,'):
+            return 0
+        try:
+            self.record(*self._parse(line))
+            return 1
+        except (ValueError, KeyError, TypeError) as e:
+            self.rejected.append((line, str(e)))
+            return 0
+
+    def base_rate(self, grade, level, tumbal=0, level_ci=0.90):
+        """Posterior mean, credible interval and sample count of one cell"""
+        cell = (grade, level, min(max(tumbal, 0), MAX_TUMBAL))
+        post = self.success[cell]
+        return {
+            'mean': post.mean,
+            'interval': post.interval(level_ci),
+            'observed': self.observed[cell]
+        }
+
+    def karma_boost(self, grade=None):
+        """Per-tumbal boost estimated from cells with tumbal > 0
+
+        Each cell gives (rate_t - rate_0) / t; cells are pooled with
+        inverse-variance weights and the result is moment-matched to a Beta.
+        The pooled sums are kept per (grade, level) and only levels with new
+        attempts are recomputed.
+        """
+        for key in self._stale:
+            self._boost[key] = self._boost_terms(*key)
+        self._stale.clear()
+        weights = total = 0.0
+        for (g, _), (w, t) in self._boost.items():
+            if not grade or g == grade:
+                weights += w
+                total += t
+
+        mean = min(max(total / weights, 1e-6), 1 - 1e-6)
+        variance = min(1 / weights, mean * (1 - mean) * 0.999)
+        strength = mean * (1 - mean) / variance - 1
+        return BetaPosterior(mean * strength, (1 - mean) * strength)
+
+    def _boost_terms(self, grade, level):
+        """(sum of weights, weighted sum) of one level's tumbal > 0 cells"""
+        base = self.success[grade, level, 0]
+        weights = total = 0.0
+        for tumbal in range(1, MAX_TUMBAL + 1):
+            post = self.success[grade, level, tumbal]
+            weight = tumbal * tumbal / (post.variance + base.variance)
+            total += weight * (post.mean - base.mean) / tumbal
+            weights += weight
+        return weights, total
+
+    def posterior_rates(self, tumbal=0):
+        """Posterior-mean rate tables in the enhancement_rates/destruction_rates shape
+
+        Base rates come from the cells at `tumbal`, less its karma boost,
+        so a rate table built from them gives those cells' posterior means
+        as final rates at that tumbal count.
+        """
+        tumbal = min(max(tumbal, 0), MAX_TUMBAL)
+        enhancement, destruction = {}, {}
+        for grade in self.grades:
+            enhancement[grade] = {}
+            destruction[grade] = {}
+            for level in range(MIN_LEVEL, MAX_LEVEL):
+                enhancement[grade][step_key(level)] = max(
+                    self.success[grade, level, tumbal].mean - karma_boost(tumbal), 0.0)
+                destruction[grade][step_key(level)] = self.destroy[grade, level].mean
+        return enhancement, destruction
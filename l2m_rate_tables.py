@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Rate Tables
+Validated, array-backed enhancement and destruction rates
+"""
+
+from types import MappingProxyType
+
+import numpy as np
+
+# Enhancement rules shared by the calculators
+KARMA_PER_TUMBAL = 0.03
+KARMA_CAP = 0.30
+EVENT_BOOST = 0.25
+FINAL_RATE_CAP = 0.75
+
+MIN_LEVEL = 6
+MAX_LEVEL = 10
+
+# Grades with both success and destruction rates. Legendary has success
+# rates only, so it is kept out of the compiled arrays.
+GRADES = ('rare', 'unique')
+RARE, UNIQUE = range(len(GRADES))
+SUCCESS_ONLY_GRADES = ('legendary',)
+LEVELS = tuple(range(MIN_LEVEL, MAX_LEVEL))
+
+
+def step_key(level):
+    """Rate table key for an enhancement from level to level+1"""
+    return f'+{level}_to_+{level + 1}'
+
+
+def karma_boost(tumbal_count):
+    """Karma boost from destroyed tumbal (3% each, max 30%)"""
+    return min(tumbal_count * KARMA_PER_TUMBAL, KARMA_CAP)
+
+
+def diamond_cost_per_attempt(level):
+    """Diamond cost of one attempt starting from level"""
+    return 50 if level <= 7 else 100 if level == 8 else 200
+
+
+class L2MRateTable:
+    """Compiled rate tables indexed by integer grade and level
+
+    `success` and `destroy` are C-contiguous float arrays of shape
+    (grade, level) and `cost` holds the diamond cost per level, so callers
+    can gather rates for millions of (grade, level) pairs at once.
+    Level indices count from +6 (index 0 is the +6 → +7 step). Grades
+    declared success-only (legendary) are kept apart in `success_only`:
+    base_rate() answers for them, anything needing the compiled arrays
+    raises ValueError. Every grade in either table must be declared one
+    way or the other.
+    """
+
+    def __init__(self, enhancement_rates, destruction_rates, grades=GRADES,
+                 success_only=SUCCESS_ONLY_GRADES):
+        self.grades = tuple(grades)
+        self._validate(enhancement_rates, destruction_rates, tuple(success_only))
+        self.success_only = MappingProxyType({
+            grade: MappingProxyType(dict(enhancement_rates[grade]))
+            for grade in success_only if grade in enhancement_rates
+        })
+
+        shape = (len(self.grades), len(LEVELS))
+        self.success = np.empty(shape)
+        self.destroy = np.empty(shape)
+        for g, grade in enumerate(self.grades):
+            for l, level in enumerate(LEVELS):
+                self.success[g, l] = enhancement_rates[grade][step_key(level)]
+                self.destroy[g, l] = destruction_rates[grade][step_key(level)]
+        self.cost = np.array([diamond_cost_per_attempt(level) for level in LEVELS],
+                             dtype=np.int64)
+        for array in (self.success, self.destroy, self.cost):
+            array.flags.writeable = False
+
+        # Read-only views in the original nested dict shape
+        self.enhancement_rates = self._view(self.success)
+        self.destruction_rates = self._view(self.destroy)
+
+    def _validate(self, enhancement_rates, destruction_rates, success_only):
+        problems = []
+        for name, table, grades in (('enhancement_rates', enhancement_rates, self.grades + success_only),
+                                    ('destruction_rates', destruction_rates, self.grades)):
+            for grade in table:
+                if grade not in grades:
+                    problems.append(f"{name} has undeclared grade '{grade}'")
+            for grade in grades:
+                if grade not in table:
+                    if grade not in success_only:
+                        problems.append(f"{name} missing grade '{grade}'")
+                    continue
+                for level in LEVELS:
+                    rate = table[grade].get(step_key(level))
+                    if rate is None:
+                        problems.append(f"{name}['{grade}'] missing '{step_key(level)}'")
+                    elif not 0 <= rate <= 1:
+                        problems.append(f"{name}['{grade}']['{step_key(level)}'] = {rate} "
+                                        f"is not a probability")
+        if problems:
+            raise ValueError("Incomplete rate tables: " + "; ".join(problems))
+
+    def _view(self, array):
+        return MappingProxyType({
+            grade: MappingProxyType({
+                step_key(level): float(array[g, l]) for l, level in enumerate(LEVELS)
+            })
+            for g, grade in enumerate(self.grades)
+        })
+
+    def grade_index(self, grade):
+        """Integer index of a grade name"""
+        try:
+            return self.grades.index(grade)
+        except ValueError:
+            if grade in self.success_only:
+                raise ValueError(f"No destruction rates for grade: {grade} "
+                                 f"(only its success rates are known)") from None
+            raise ValueError(f"Unknown weapon grade: {grade}") from None
+
+    def level_index(self, level):
+        """Integer index of a current level (+6 → 0)"""
+        if not MIN_LEVEL <= level < MAX_LEVEL:
+            raise ValueError(f"No enhancement rates for level +{level}")
+        return level - MIN_LEVEL
+
+    def base_rate(self, grade, level):
+        """Base success rate of one step from level to level+1"""
+        if grade in self.success_only:
+            self.level_index(level)
+            return float(self.success_only[grade][step_key(level)])
+        return float(self.success[self.grade_index(grade), self.level_index(level)])
+
+    def destroy_rate(self, grade, level):
+        """Destroy-on-fail rate of one step from level to level+1"""
+        return float(self.destroy[self.grade_index(grade), self.level_index(level)])
+
+    def gather(self, grade_idx, level_idx):
+        """Vectorized (success, destroy, cost) lookup for index arrays"""
+        grade_idx = np.asarray(grade_idx)
+        level_idx = np.asarray(level_idx)
+        return (self.success[grade_idx, level_idx],
+                self.destroy[grade_idx, level_idx],
+                self.cost[level_idx])
+
+    def final_rate(self, grade_idx, level_idx, tumbal=0, event=False):
+        """Vectorized success rate with karma and event boosts applied"""
+        boost = (np.minimum(np.asarray(tumbal) * KARMA_PER_TUMBAL, KARMA_CAP)
+                 + np.where(event, EVENT_BOOST, 0.0))
+        return np.minimum(self.success[grade_idx, level_idx] + boost, FINAL_RATE_CAP)
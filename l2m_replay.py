@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Counterfactual Replay
+Recorded attempt sessions re-run under alternative tumbal policies
+"""
+
+import zlib
+
+import numpy as np
+
+from l2m_rate_tables import MIN_LEVEL
+from l2m_cost_distribution import DEFAULT_TUMBAL_PRICE
+
+ACTUAL = 'actual'
+
+
+def session_starts(log):
+    """Row index where each session starts (rows sorted by character, grade, level, time)
+
+    A session is the run of attempts on one step until a success: a new
+    session starts after every success and whenever character, grade or
+    level changes.
+    """
+    n = len(log['outcome'])
+    new = np.zeros(n, dtype=bool)
+    new[:1] = True
+    for column in ('character', 'grade', 'level'):
+        new[1:] |= log[column][1:] != log[column][:-1]
+    new[1:] |= log['outcome'][:-1] == 0
+    return np.flatnonzero(new)
+
+
+class L2MCounterfactualReplay:
+    """Replays recorded sessions with other tumbal counts using common random numbers
+
+    Each recorded attempt gets a uniform u consistent with what happened:
+    u < p for a success and u >= p for a failure, where p is the success
+    rate at the recorded tumbal. Failures also get a uniform v consistent
+    with whether the weapon was destroyed. A policy with success rate q
+    then succeeds on that attempt exactly when u < q, so every policy sees
+    the same luck and the recorded policy reproduces history exactly.
+    A session ends at its first success under the policy. If a completed
+    session would still be running when the record ends, the remaining
+    attempts are drawn from one shared uniform per session (inverse
+    geometric CDF) and charged their expected destroys. The uniforms are
+    seeded from the recorded outcomes, so a replay is reproducible.
+    Destroyed weapons are replaced at the same level, as in the cost
+    distribution. All policies are evaluated together as (policy × attempt)
+    arrays, chunked at session boundaries.
+    """
+
+    def __init__(self, rate_table, tumbal_price=DEFAULT_TUMBAL_PRICE, chunk_size=100_000):
+        self.rate_table = rate_table
+        self.tumbal_price = tumbal_price
+        self.chunk_size = chunk_size
+        self._grade_index = {grade: i for i, grade in enumerate(rate_table.grades)}
+
+    def _policy_tumbal(self, policy, level, recorded):
+        """Tumbal per attempt: an int, {level: tumbal} (others as recorded), or None = as recorded"""
+        if policy is None:
+            return recorded
+        if isinstance(policy, dict):
+            table = np.full(max(int(level.max(initial=0)), max(policy, default=0)) + 1, -1, dtype=np.int64)
+            for lvl, count in policy.items():
+                table[lvl] = count
+            chosen = table[level]
+            return np.where(chosen >= 0, chosen, recorded)
+        if policy < 0:
+            raise ValueError(f"Tumbal count must be >= 0: {policy}")
+        return np.full_like(recorded, policy)
+
+    def replay(self, log, policies, seed=None):
+        """Totals per policy and their deltas against the recorded play
+
+        log: column arrays as returned by L2MHistoryStore.attempt_log().
+        policies: {name: tumbal policy}; the recorded play is added as
+        'actual'. Returns {name: totals} with diamonds (attempt cost plus
+        tumbal at tumbal_price), destroyed weapons, tumbal used, items
+        (destroyed + tumbal) and the diamond/item deltas vs actual.
+        """
+        # Grade names are run-length encoded (the log is sorted), so only run heads are looked up
+        names = np.asarray(log['grade'])
+        heads = np.flatnonzero(np.append(True, names[1:] != names[:-1]))
+        unknown = sorted({g for g in names[heads] if g not in self._grade_index})
+        if unknown:
+            raise ValueError(f"Unknown weapon grades: {unknown}")
+        grade = np.repeat([self._grade_index[g] for g in names[heads]], np.diff(np.append(heads, names.size)))
+        for level in np.unique(log['level']):
+            self.rate_table.level_index(int(level))
+
+        policies = dict({ACTUAL: None}, **{name: p for name, p in policies.items() if name != ACTUAL})
+        names = list(policies)
+        tumbal = np.stack([self._policy_tumbal(policies[name], log['level'], log['tumbal']) for name in names])
+
+        outcome = np.asarray(log['outcome'])
+        entropy = [zlib.crc32(outcome.tobytes()), outcome.size] + ([] if seed is None else [seed])
+        rng = np.random.default_rng(np.random.SeedSequence(entropy))
+
+        starts = session_starts(log)
+        ends = np.append(starts[1:], outcome.size)
+        # Drawn once for the whole log so results do not depend on the chunk size
+        uniforms = rng.random((2, outcome.size))
+        # In (0, 1], so log() in the geometric draw stays finite
+        session_uniforms = 1 - rng.random(starts.size)
+
+        totals = np.zeros((len(names), 5))  # attempts, successes, diamonds, destroyed, tumbal
+        # Chunks of whole sessions
+        first = 0
+        while first < starts.size:
+            last = min(np.searchsorted(starts, starts[first] + self.chunk_size, side='left'), starts.size)
+            last = max(last, first + 1)
+            rows = slice(starts[first], ends[last - 1])
+            totals += self._replay_chunk(
+                {column: np.asarray(log[column])[rows] for column in ('level', 'tumbal', 'event', 'outcome')},
+                grade[rows], tumbal[:, rows], starts[first:last] - starts[first],
+                uniforms[:, rows], session_uniforms[first:last])
+            first = last
+
+        results = {}
+        for name, (attempts, successes, diamonds, destroyed, used) in zip(names, totals):
+            results[name] = {
+                'tumbal': policies[name],
+                'sessions': int(starts.size),
+                'attempts': float(attempts),
+                'successes': int(successes),
+                'diamonds': float(diamonds),
+                'destroyed': float(destroyed),
+                'tumbal_used': float(used),
+                'items': float(destroyed + used)
+            }
+        actual = results[ACTUAL]
+        for result in results.values():
+            result['diamond_delta'] = result['diamonds'] - actual['diamonds']
+            result['item_delta'] = result['items'] - actual['items']
+        return results
+
+    def _replay_chunk(self, log, grade, tumbal, starts, uniforms, w):
+        n = log['outcome'].size
+        level = log['level'] - MIN_LEVEL
+        success = log['outcome'] == 0
+        destroyed = log['outcome'] == 2
+
+        # Common random numbers conditioned on the recorded outcome
+        p = self.rate_table.final_rate(grade, level, log['tumbal'], log['event'])
+        d = self.rate_table.destroy[grade, level]
+        r1, r2 = uniforms
+        u = np.where(success, p * r1, p + (1 - p) * r1)
+        v = np.where(success, r2, np.where(destroyed, d * r2, d + (1 - d) * r2))
+
+        q = self.rate_table.final_rate(grade, level, tumbal, log['event'])  # (policies, n)
+        won = u < q
+        lost_item = ~won & (v < d)
+        cost = self.rate_table.cost[level] + tumbal * self.tumbal_price
+
+        ends = np.append(starts[1:], n)
+        last = ends - 1
+        closed = success[last]
+        first_win = np.minimum.reduceat(np.where(won, np.arange(n), n), starts, axis=1)
+        hit = first_win < ends
+        stop = np.where(hit, first_win + 1, ends)  # exclusive end of the replayed prefix
+
+        def prefix(values):
+            cumulative = np.zeros((values.shape[0], n + 1))
+            np.cumsum(values, axis=1, out=cumulative[:, 1:])
+            return np.take_along_axis(cumulative, stop, axis=1) - cumulative[:, starts]
+
+        # Completed sessions the policy has not finished yet: extra attempts ~ Geometric(q)
+        q_last = q[:, last]
+        missing = closed & ~hit
+        with np.errstate(divide='ignore'):
+            extra = np.where(q_last < 1, np.ceil(np.log(w) / np.log1p(-np.minimum(q_last, 1 - 1e-12))), 1)
+        extra = np.where(missing, np.maximum(extra, 1), 0)
+
+        attempts = (stop - starts) + extra
+        diamonds = prefix(cost) + extra * cost[:, last]
+        lost = prefix(lost_item) + np.maximum(extra - 1, 0) * d[last]
+        used = prefix(tumbal) + extra * tumbal[:, last]
+        return np.stack([attempts.sum(axis=1), (hit | closed).sum(axis=1), diamonds.sum(axis=1),
+                         lost.sum(axis=1), used.sum(axis=1)], axis=1)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Respawn Tracker
+Probabilistic field boss respawn windows per boss and channel
+"""
+
+import heapq
+from datetime import timedelta
+from itertools import count, islice
+
+from l2m_spawn_calendar import parse_respawn_hours
+from l2m_server_clock import L2MServerClock
+
+
+class L2MRespawnTracker:
+    """Spawn-probability curves from observed kills
+
+    A kill at time K makes the next spawn uniform over [K + min, K + max]
+    of the boss's respawn range ('8-12 hours'); fixed timers ('2 hours')
+    get a small `jitter` window. Windows wait in a heap keyed by start and
+    join the active set once they start within `lookahead`. `grace` after
+    a window ends, an unreported boss has probably been killed by someone
+    else: the window leaves the active set (a second heap keyed by end)
+    for the overdue bucket, whose state is unknown, until the pair's next
+    kill replaces it. A "most likely up" query only scores the active set,
+    not every boss/channel pair. Times are naive server time of `region`.
+    """
+
+    def __init__(self, field_bosses, jitter=timedelta(minutes=10), lookahead=timedelta(hours=1),
+                 grace=timedelta(hours=1), clock=None, region=None):
+        self.lookahead = lookahead
+        self.grace = grace
+        self.clock = clock or L2MServerClock()
+        self.region = region
+        self.respawn = {}
+        for group in field_bosses.values():
+            for boss, data in group.items():
+                low, high = parse_respawn_hours(data['respawn_time'])
+                self.respawn[boss] = (timedelta(hours=low), max(timedelta(hours=high),
+                                                               timedelta(hours=low) + jitter))
+        self.windows = {}
+        self._pending = []
+        self._ending = []
+        self._seq = count()
+        self.active = {}
+        # Expired windows in expiry order, so the most recent is last
+        self.overdue = {}
+        self.now = None
+
+    def _boss_key(self, boss):
+        key = boss.replace(' ', '_')
+        if key not in self.respawn:
+            raise ValueError(f"Unknown field boss: {boss}")
+        return key
+
+    def record_kill(self, boss, channel, when=None):
+        """Register a kill; replaces any earlier window for the pair"""
+        boss = self._boss_key(boss)
+        when = when or self.clock.now(self.region)
+        low, high = self.respawn[boss]
+        window = (when + low, when + high)
+        pair = (boss, channel)
+        self.windows[pair] = window
+        self.active.pop(pair, None)
+        self.overdue.pop(pair, None)
+        # The sequence number keeps channels of mixed types from being compared
+        heapq.heappush(self._pending, (window[0], next(self._seq), pair, window))
+
+    def spawn_cdf(self, boss, channel, when):
+        """P(the boss has respawned by `when`) since the last recorded kill"""
+        window = self.windows.get((self._boss_key(boss), channel))
+        if not window:
+            return None
+        start, end = window
+        if when <= start:
+            return 0.0
+        if when >= end:
+            return 1.0
+        return (when - start) / (end - start)
+
+    def spawn_curve(self, boss, channel, start, end, step=timedelta(minutes=15)):
+        """[(time, P(spawned by time))] sampled from start to end"""
+        curve = []
+        moment = start
+        while moment <= end:
+            curve.append((moment, self.spawn_cdf(boss, channel, moment)))
+            moment += step
+        return curve
+
+    def _advance(self, now):
+        horizon = now + self.lookahead
+        while self._pending and self._pending[0][0] <= horizon:
+            _, _, pair, window = heapq.heappop(self._pending)
+            if self.windows.get(pair) == window:
+                self.active[pair] = window
+                heapq.heappush(self._ending, (window[1], next(self._seq), pair, window))
+        while self._ending and self._ending[0][0] + self.grace <= now:
+            _, _, pair, window = heapq.heappop(self._ending)
+            if self.active.get(pair) == window:
+                del self.active[pair]
+                self.overdue[pair] = window
+        self.now = now
+
+    def most_likely(self, now=None, within=timedelta(minutes=15), k=5):
+        """Boss/channel pairs most likely to be up by now + within
+
+        Ranked by P(respawned by now + within); pairs whose window has
+        fully elapsed score 1, the most recently elapsed first. Overdue
+        pairs (probability None) fill the remaining places, most recent
+        first.
+        """
+        now = now or self.clock.now(self.region)
+        if within > self.lookahead:
+            raise ValueError(f"Query window exceeds the {self.lookahead} lookahead")
+        if self.now is not None and now < self.now:
+            # Time went backwards: rebuild both buckets for this query
+            candidates = [(pair, window) for pair, window in self.windows.items()
+                          if window[1] + self.grace > now]
+            overdue = sorted(((pair, window) for pair, window in self.windows.items()
+                              if window[1] + self.grace <= now), key=lambda item: item[1][1])
+        else:
+            self._advance(now)
+            candidates = self.active.items()
+            overdue = self.overdue.items()
+
+        end = now + within
+        scored = []
+        for (boss, channel), (start, stop) in candidates:
+            if start < end:
+                scored.append((min((end - start) / (stop - start), 1.0), start, boss, channel, stop))
+        scored = heapq.nlargest(k, scored, key=lambda item: (item[0], item[4]))
+        for (boss, channel), (start, stop) in islice(reversed(overdue), max(k - len(scored), 0)):
+            scored.append((None, start, boss, channel, stop))
+
+        return [
+            {
+                'boss': boss.replace('_', ' '),
+                'channel': channel,
+                'probability': probability,
+                'overdue': probability is None,
+                'window_start': start,
+                'window_end': stop
+            }
+            for probability, start, boss, channel, stop in scored
+        ]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Route Optimizer
+Time-sequenced farming plans that maximize expected epic drops
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+from l2m_map_catalog import parse_range
+from l2m_time_windows import slot_index
+from l2m_yield_model import COMPETITION_SHARE
+
+
+class L2MRouteOptimizer:
+    """Dynamic program over time slots × farming maps
+
+    Each slot's value is the expected epic drops of farming a map for that
+    slot, read from the analyzer's week × hour grid (kill rate × epic
+    chance with day modifier and buffs × best-time factor), plus the epic
+    chance of any field boss spawning there in the slot. Moving to another
+    map loses `travel_minutes` of the slot. A map is eligible within
+    `level_margin` of its level range; the top bracket has no upper bound.
+    The DP is vectorized over characters, so a whole guild is planned in
+    one pass.
+    """
+
+    def __init__(self, analyzer, slot_minutes=60, travel_minutes=10, level_margin=3):
+        self.analyzer = analyzer
+        self.slot = timedelta(minutes=slot_minutes)
+        self.travel = travel_minutes / slot_minutes
+        self.level_margin = level_margin
+
+        self.maps = [
+            dict(entry,
+                 kills_per_hour=float(kills),
+                 competition_share=COMPETITION_SHARE.get(entry['competition'], 0.5))
+            for entry, kills in zip(analyzer.map_catalog.maps, analyzer.yield_model.kills_per_hour)
+        ]
+        self._map_index = {m['name']: i for i, m in enumerate(self.maps)}
+        self.min_level = np.array([m['level'][0] for m in self.maps])
+        self.max_level = np.array([m['level'][1] for m in self.maps])
+        self.upper_level = np.where(self.max_level == self.max_level.max(), np.inf,
+                                    self.max_level + level_margin)
+
+    def _slot_starts(self, start, hours):
+        count = max(1, int(round(timedelta(hours=hours) / self.slot)))
+        return [start + i * self.slot for i in range(count)]
+
+    def _base_yield(self, slots, buffs, region=None):
+        """Expected epics per slot and map before level eligibility, shape (T, M)"""
+        hours = self.slot / timedelta(hours=1)
+        grid = self.analyzer.time_windows(buffs)
+        yields = grid.map_yield[[slot_index(moment) for moment in slots]] * hours
+
+        end = slots[-1] + self.slot
+        for spawn in self.analyzer.calendar_for(region).spawns_between(slots[0], end, kind='field'):
+            m = self._map_index.get(spawn['location'])
+            if m is None:
+                continue
+            t = int((spawn['spawn_time'] - slots[0]) / self.slot)
+            boss = self._field_boss(spawn['boss'])
+            chance = sum(parse_range(boss['drops']['epic_chance'])) / 2
+            yields[t, m] += chance / 100 * self.maps[m]['competition_share']
+        return yields
+
+    def _field_boss(self, name):
+        key = name.replace(' ', '_')
+        for group in self.analyzer.field_bosses.values():
+            if key in group:
+                return group[key]
+        raise KeyError(name)
+
+    def _solve(self, yields, levels):
+        """Batched DP, yields (T, M) and levels (B,) → map index per slot (B, T)"""
+        levels = np.asarray(levels, dtype=float)[:, None]
+        eligible = (levels >= self.min_level - self.level_margin) & (levels <= self.upper_level)
+        penalty = np.where(eligible, 0.0, -1e9)
+
+        T, M = yields.shape
+        B = levels.shape[0]
+        back = np.zeros((T, B, M), dtype=np.int64)
+        value = yields[0] * (1 - self.travel) + penalty
+        for t in range(1, T):
+            best_prev = value.argmax(axis=1)
+            best_value = value.max(axis=1, keepdims=True)
+            stay = value
+            switch = best_value - self.travel * yields[t]
+            use_switch = switch > stay
+            back[t] = np.where(use_switch, best_prev[:, None], np.arange(M))
+            value = np.maximum(stay, switch) + yields[t] + penalty
+
+        path = np.zeros((B, T), dtype=np.int64)
+        path[:, -1] = value.argmax(axis=1)
+        for t in range(T - 1, 0, -1):
+            path[:, t - 1] = back[t, np.arange(B), path[:, t]]
+        return path, value.max(axis=1), eligible
+
+    def _segments(self, path, yields, slots, eligible):
+        segments = []
+        for t, m in enumerate(path):
+            if not eligible[m]:
+                continue
+            gain = float(yields[t, m]) * (1 - self.travel if t == 0 or path[t - 1] != m else 1)
+            if segments and segments[-1]['map'] == self.maps[m]['name']:
+                segments[-1]['end'] = slots[t] + self.slot
+                segments[-1]['expected_epics'] += gain
+            else:
+                segments.append({
+                    'map': self.maps[m]['name'],
+                    'start': slots[t],
+                    'end': slots[t] + self.slot,
+                    'expected_epics': gain,
+                    'items': self.maps[m]['epic_items']
+                })
+        return segments
+
+    def plan(self, level, hours=4, start=None, buffs=None, region=None):
+        """Best farming plan for one character"""
+        member = {'name': None, 'level': level, 'buffs': buffs}
+        return self.plan_guild([member], hours, start, region)[0]
+
+    def plan_guild(self, members, hours=4, start=None, region=None):
+        """Plans for many characters; members are dicts with name, level, buffs
+
+        Times are server time of `region` (default the analyzer's region).
+        """
+        start = (start or self.analyzer.now(region)).replace(minute=0, second=0, microsecond=0)
+        slots = self._slot_starts(start, hours)
+
+        # Members sharing a buff set share one yield grid and one batched DP
+        groups = {}
+        for i, member in enumerate(members):
+            groups.setdefault(tuple(sorted(member.get('buffs') or ())), []).append(i)
+
+        plans = [None] * len(members)
+        for buffs, indices in groups.items():
+            yields = self._base_yield(slots, list(buffs), region)
+            path, totals, eligible = self._solve(yields, [members[i]['level'] for i in indices])
+            for row, i in enumerate(indices):
+                plans[i] = {
+                    'name': members[i].get('name'),
+                    'level': members[i]['level'],
+                    'expected_epics': float(max(totals[row], 0.0)),
+                    'route': self._segments(path[row], yields, slots, eligible[row])
+                }
+        return plans
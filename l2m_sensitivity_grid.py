@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Sensitivity Grid
+What-if sweeps over rates and karma rules, evaluated as one array
+"""
+
+import numpy as np
+
+from l2m_rate_tables import KARMA_PER_TUMBAL, KARMA_CAP, EVENT_BOOST, FINAL_RATE_CAP, LEVELS
+from l2m_cost_distribution import DEFAULT_TUMBAL_PRICE
+
+# Grid axes in array order; every metric has one dimension per axis
+AXES = ('grade', 'level', 'rate_delta', 'tumbal', 'karma_step', 'karma_cap',
+        'event_boost', 'final_cap')
+METRICS = ('success', 'attempts', 'cost', 'destroy_risk')
+
+
+def parse_axis(text, cast=float):
+    """'0.7,0.75,0.8' → [0.7, 0.75, 0.8]; 'start:stop:count' → evenly spaced values"""
+    if ':' in text:
+        start, stop, count = text.split(':')
+        return [cast(v) for v in np.linspace(float(start), float(stop), int(count))]
+    return [cast(v) for v in text.split(',')]
+
+
+class L2MSensitivityGrid:
+    """Single-step metrics over the full product of parameter axes
+
+    success = min(base + rate_delta + min(tumbal * karma_step, karma_cap)
+    + event_boost, final_cap). attempts and cost assume a destroyed weapon
+    is replaced at the same level; destroy_risk is P(destroyed before
+    success). Sub-results (base rates, karma, total boost) are memoized by
+    the axis values they depend on, so changing one axis only recomputes
+    what depends on it.
+    """
+
+    def __init__(self, rate_table, tumbal_price=DEFAULT_TUMBAL_PRICE):
+        self.rate_table = rate_table
+        self.tumbal_price = tumbal_price
+        self._memo = {}
+
+    def _axes(self, overrides):
+        unknown = set(overrides) - set(AXES)
+        if unknown:
+            raise ValueError(f"Unknown grid axes: {sorted(unknown)}")
+        defaults = {
+            'grade': self.rate_table.grades,
+            'level': LEVELS,
+            'rate_delta': (0.0,),
+            'tumbal': (0,),
+            'karma_step': (KARMA_PER_TUMBAL,),
+            'karma_cap': (KARMA_CAP,),
+            'event_boost': (0.0, EVENT_BOOST),
+            'final_cap': (FINAL_RATE_CAP,)
+        }
+        axes = {}
+        for name in AXES:
+            values = overrides.get(name)
+            values = defaults[name] if values is None else values
+            if name == 'grade':
+                values = tuple(values)
+                for grade in values:
+                    self.rate_table.grade_index(grade)
+            elif name in ('level', 'tumbal'):
+                values = tuple(int(v) for v in values)
+            else:
+                values = tuple(float(v) for v in values)
+            if not values:
+                raise ValueError(f"Empty grid axis: {name}")
+            axes[name] = values
+        for level in axes['level']:
+            self.rate_table.level_index(level)
+        return axes
+
+    def _shaped(self, name, values, dtype=float):
+        """Axis values reshaped to broadcast along their own grid dimension"""
+        shape = [1] * len(AXES)
+        shape[AXES.index(name)] = len(values)
+        return np.asarray(values, dtype=dtype).reshape(shape)
+
+    def _cached(self, name, axes, depends, compute):
+        """Reuse the last result of `name` while its axis values are unchanged"""
+        key = tuple(axes[axis] for axis in depends)
+        hit = self._memo.get(name)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        result = compute()
+        self._memo[name] = (key, result)
+        return result
+
+    def evaluate(self, **overrides):
+        """Metrics for every combination of the given axes (others at defaults)
+
+        Returns {'axes': {name: values}, metric: array} with float32 arrays
+        shaped by the axis lengths in AXES order.
+        """
+        axes = self._axes(overrides)
+        g_idx = [self.rate_table.grade_index(g) for g in axes['grade']]
+        l_idx = [self.rate_table.level_index(l) for l in axes['level']]
+        gl = np.ix_(g_idx, l_idx)
+        trailing = (1,) * (len(AXES) - 2)
+
+        base = self._cached('base', axes, ('grade', 'level', 'rate_delta'), lambda: np.clip(
+            self.rate_table.success[gl].reshape(len(g_idx), len(l_idx), *trailing)
+            + self._shaped('rate_delta', axes['rate_delta']), 0.0, 1.0))
+        karma = self._cached('karma', axes, ('tumbal', 'karma_step', 'karma_cap'), lambda: np.minimum(
+            self._shaped('tumbal', axes['tumbal']) * self._shaped('karma_step', axes['karma_step']),
+            self._shaped('karma_cap', axes['karma_cap'])))
+        boost = self._cached('boost', axes, ('tumbal', 'karma_step', 'karma_cap', 'event_boost'),
+                             lambda: karma + self._shaped('event_boost', axes['event_boost']))
+        destroy_rate = self._cached('destroy_rate', axes, ('grade', 'level'), lambda:
+                                    self.rate_table.destroy[gl].reshape(len(g_idx), len(l_idx), *trailing))
+        per_attempt = self._cached('per_attempt', axes, ('level', 'tumbal'), lambda:
+                                   self.rate_table.cost[l_idx].reshape(1, -1, *trailing)
+                                   + self._shaped('tumbal', axes['tumbal']) * self.tumbal_price)
+
+        success = np.minimum(base + boost, self._shaped('final_cap', axes['final_cap']))
+        with np.errstate(divide='ignore'):
+            attempts = 1 / success
+        destroy = (1 - success) * destroy_rate
+        with np.errstate(divide='ignore', invalid='ignore'):
+            destroy_risk = np.where(success + destroy > 0, destroy / (success + destroy), 0.0)
+
+        return {
+            'axes': axes,
+            'success': success.astype(np.float32),
+            'attempts': attempts.astype(np.float32),
+            'cost': (attempts * per_attempt).astype(np.float32),
+            'destroy_risk': destroy_risk.astype(np.float32)
+        }
+
+    def write(self, results, prefix):
+        """Write results as <prefix>.npz (axes + metric arrays) and <prefix>.csv"""
+        axes = results['axes']
+        arrays = {f'axis_{name}': np.asarray(values) for name, values in axes.items()}
+        arrays.update({metric: results[metric] for metric in METRICS})
+        np.savez_compressed(f'{prefix}.npz', **arrays)
+
+        # One row per combination; the grade name goes into each block's format string
+        shape = results['success'].shape
+        numeric = [np.asarray(axes[name], dtype=float) for name in AXES[1:]]
+        with open(f'{prefix}.csv', 'w') as f:
+            f.write(','.join(AXES + METRICS) + '\n')
+            for g, grade in enumerate(axes['grade']):
+                index = np.indices(shape[1:]).reshape(len(shape) - 1, -1)
+                columns = [values[i] for values, i in zip(numeric, index)]
+                columns += [results[metric][g].ravel() for metric in METRICS]
+                fmt = f'{grade},%d,%g,%d,%g,%g,%g,%g,%.6g,%.6g,%.6g,%.6g'
+                np.savetxt(f, np.column_stack(columns), fmt=fmt)
+        return f'{prefix}.npz', f'{prefix}.csv'
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Server Clock
+Regional server time and batched timezone conversion with cached offsets
+"""
+
+import time
+import warnings
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import numpy as np
+
+# Regional servers and the zone their schedules run on
+REGIONS = {
+    'KR': 'Asia/Seoul',
+    'JP': 'Asia/Tokyo',
+    'TW': 'Asia/Taipei',
+    'SEA': 'Asia/Singapore',
+    'NA': 'America/Los_Angeles',
+    'EU': 'Europe/Berlin'
+}
+DEFAULT_REGION = 'KR'
+
+# Standard-time UTC offsets (hours) used when no IANA tz database is
+# installed (e.g. Windows without the tzdata package); DST is ignored
+FIXED_OFFSETS = {
+    'Asia/Seoul': 9,
+    'Asia/Tokyo': 9,
+    'Asia/Taipei': 8,
+    'Asia/Singapore': 8,
+    'America/Los_Angeles': -8,
+    'Europe/Berlin': 1
+}
+
+_EPOCH = np.datetime64(0, 's')
+
+
+class L2MServerClock:
+    """UTC offsets per zone cached as hourly tables
+
+    Each zone keeps the UTC offset of every UTC hour over a window
+    (default 8 days), built once with zoneinfo and extended when a query
+    falls outside it. Converting any number of timestamps is then a
+    vectorized table lookup per distinct zone, so a batch of users across
+    a few regions costs a few lookups rather than one conversion each.
+    Timestamps are int64 epoch seconds; "local" seconds are wall-clock
+    time in the zone counted as if it were UTC. Without a tz database the
+    region zones fall back to FIXED_OFFSETS, with a warning.
+    """
+
+    def __init__(self, regions=REGIONS, default_region=DEFAULT_REGION, table_hours=8 * 24):
+        if default_region not in regions:
+            raise ValueError(f"Default region {default_region} is not in the region table")
+        self.regions = dict(regions)
+        self.default_region = default_region
+        self.table_hours = table_hours
+        self._zones = {}
+        self._tables = {}
+
+    def zone_name(self, name=None):
+        """IANA zone for a region code or zone name (default region if None)"""
+        name = name or self.default_region
+        name = self.regions.get(name, name)
+        if name not in self._zones:
+            try:
+                self._zones[name] = ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                if name not in FIXED_OFFSETS:
+                    raise ValueError(f"Unknown region or timezone: {name}") from None
+                warnings.warn(f"No tz database entry for {name}; using fixed UTC{FIXED_OFFSETS[name]:+d} "
+                              f"without DST (install tzdata for exact times)")
+                self._zones[name] = timezone(timedelta(hours=FIXED_OFFSETS[name]), name)
+        return name
+
+    def _table(self, name, first_hour, last_hour):
+        """(base hour, offsets) for a zone covering UTC hours first..last"""
+        cached = self._tables.get(name)
+        if cached is not None:
+            base, offsets = cached
+            if base <= first_hour and last_hour < base + len(offsets):
+                return cached
+        base = first_hour - 24
+        count = max(last_hour - base + 1, self.table_hours) + 24
+        zone = self._zones[name]
+        offsets = np.array([
+            int(datetime.fromtimestamp((base + h) * 3600, timezone.utc).astimezone(zone)
+                .utcoffset().total_seconds())
+            for h in range(count)
+        ], dtype=np.int64)
+        self._tables[name] = (base, offsets)
+        return self._tables[name]
+
+    def offsets(self, utc_seconds, zones):
+        """UTC offset in seconds for each timestamp in its zone (zones broadcast)"""
+        utc_seconds = np.asarray(utc_seconds, dtype=np.int64)
+        zones = np.broadcast_to(np.asarray(zones, dtype=object), utc_seconds.shape)
+        result = np.empty(utc_seconds.shape, dtype=np.int64)
+        if not utc_seconds.size:
+            return result
+        names, inverse = np.unique(zones, return_inverse=True)
+        inverse = inverse.reshape(utc_seconds.shape)
+        for z, name in enumerate(names):
+            name = self.zone_name(name)
+            mask = inverse == z
+            hours = utc_seconds[mask] // 3600
+            base, table = self._table(name, int(hours.min()), int(hours.max()))
+            result[mask] = table[hours - base]
+        return result
+
+    def to_local(self, utc_seconds, zones):
+        """Epoch seconds → wall-clock seconds in each zone"""
+        utc_seconds = np.asarray(utc_seconds, dtype=np.int64)
+        return utc_seconds + self.offsets(utc_seconds, zones)
+
+    def to_utc(self, local_seconds, zones):
+        """Wall-clock seconds in each zone → epoch seconds (earlier reading on DST overlaps)"""
+        local_seconds = np.asarray(local_seconds, dtype=np.int64)
+        guess = local_seconds - self.offsets(local_seconds, zones)
+        return local_seconds - self.offsets(guess, zones)
+
+    def convert(self, local_seconds, from_zones, to_zones):
+        """Wall-clock seconds in from_zones → wall-clock seconds in to_zones"""
+        return self.to_local(self.to_utc(local_seconds, from_zones), to_zones)
+
+    def now(self, region=None, when=None):
+        """Naive server-local datetime for a region (at `when` epoch seconds, default now)"""
+        when = int(time.time() if when is None else when)
+        local = int(self.to_local(when, self.zone_name(region)))
+        return datetime.fromtimestamp(local, timezone.utc).replace(tzinfo=None)
+
+
+def to_seconds(moments):
+    """Naive datetimes → int64 wall-clock seconds"""
+    return (np.array(moments, dtype='datetime64[s]') - _EPOCH).astype(np.int64)
+
+
+def to_datetime64(seconds):
+    """int64 wall-clock seconds → datetime64[s]"""
+    return _EPOCH + np.asarray(seconds, dtype='timedelta64[s]')
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Spawn Calendar
+Boss schedules parsed once and materialized into a time-ordered calendar
+"""
+
+import re
+import heapq
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from itertools import count
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+_TIME = re.compile(r'(\d{1,2}):(\d{2})')
+_HOURS = re.compile(r'(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?))?\s*hours?', re.IGNORECASE)
+
+
+def parse_weekly_schedule(schedule):
+    """'Wednesday & Sunday 20:00' → [(2, 20, 0), (6, 20, 0)] (empty if unscheduled)"""
+    text = schedule.lower()
+    clock = _TIME.search(text)
+    if not clock:
+        return []
+    hour, minute = int(clock.group(1)), int(clock.group(2))
+    return [(day, hour, minute) for day, name in enumerate(WEEKDAYS) if name in text]
+
+
+def parse_respawn_hours(respawn):
+    """'8-12 hours' → (8.0, 12.0), '2 hours' → (2.0, 2.0)"""
+    match = _HOURS.search(respawn)
+    if not match:
+        raise ValueError(f"Unrecognized respawn time: {respawn}")
+    low = float(match.group(1))
+    high = float(match.group(2) or low)
+    return low, high
+
+
+class WeeklyRule:
+    """Fixed weekday/time spawn (world bosses)"""
+
+    def __init__(self, info, weekday, hour, minute):
+        self.info = info
+        self.weekday = weekday
+        self.hour = hour
+        self.minute = minute
+
+    def first_at_or_after(self, moment):
+        candidate = moment.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        candidate += timedelta(days=(self.weekday - moment.weekday()) % 7)
+        if candidate < moment:
+            candidate += timedelta(days=7)
+        return candidate
+
+    def following(self, spawn):
+        return spawn + timedelta(days=7)
+
+    def window(self, spawn):
+        return spawn, spawn
+
+
+class IntervalRule:
+    """Field boss respawn after a recorded kill
+
+    The spawn is expected at the midpoint of the respawn range and carries
+    the [min, max] window around it. Only the next spawn is known: later
+    ones depend on when the boss is killed again, so the rule does not
+    repeat.
+    """
+
+    def __init__(self, info, kill_time, low_hours, high_hours):
+        self.info = info
+        self.anchor = kill_time
+        self.low = timedelta(hours=low_hours)
+        self.high = timedelta(hours=high_hours)
+        self.spawn = kill_time + (self.low + self.high) / 2
+
+    def window(self, spawn):
+        return self.anchor + self.low, self.anchor + self.high
+
+
+class L2MSpawnCalendar:
+    """Upcoming boss spawns answered from a materialized, sorted calendar
+
+    Schedules are parsed once into rules. A min-heap holds each weekly
+    rule's next occurrence; popping it adds it to the sorted calendar and
+    pushes that rule's following spawn, so the calendar is extended lazily
+    in time order. Field bosses have no fixed schedule: their spawns enter
+    the calendar only from recorded kills (record_kill), otherwise only
+    their respawn range is known (respawn_ranges). "Next K after T" and
+    "spawns in [a, b)" are bisect lookups. Events more than two horizons
+    behind the latest query are dropped, and a query before the kept range
+    rebuilds the calendar from there.
+    """
+
+    def __init__(self, world_bosses, field_bosses, start=None, horizon=timedelta(days=7)):
+        start = start or datetime.now()
+        self.start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.horizon = horizon
+        self.rules = []
+        self.unscheduled = []
+        self.field = {}
+        self.kills = {}
+
+        for boss, data in world_bosses.items():
+            slots = parse_weekly_schedule(data.get('spawn_schedule', ''))
+            if not slots:
+                self.unscheduled.append(boss)
+            for weekday, hour, minute in slots:
+                self.rules.append(WeeklyRule(self._info(boss, 'world', data), weekday, hour, minute))
+
+        for group in field_bosses.values():
+            for boss, data in group.items():
+                low, high = parse_respawn_hours(data['respawn_time'])
+                self.field[boss] = (self._info(boss, 'field', data), low, high, data['respawn_time'])
+
+        # Kinds with repeating rules: only those can be extended indefinitely
+        self._repeating = {None: bool(self.rules), 'world': bool(self.rules), 'field': False}
+        self._seq = count()
+        self._reset(self.start)
+
+    def _info(self, boss, kind, data):
+        return {
+            'boss': boss.replace('_', ' '),
+            'type': kind,
+            'location': data.get('location'),
+            'drops': data.get('drops', {}).get('items', [])
+        }
+
+    def _reset(self, moment):
+        """Materialize from `moment`, discarding everything before it"""
+        self.kept_from = moment
+        self._until = moment
+        # Sorted (times, events) per kind: None = all, 'world', 'field'
+        self._index = {kind: ([], []) for kind in (None, 'world', 'field')}
+        self._heap = [(rule.first_at_or_after(moment), next(self._seq), rule) for rule in self.rules]
+        heapq.heapify(self._heap)
+        for rule in self.kills.values():
+            if rule.spawn >= moment:
+                self._insert(rule, rule.spawn)
+        self._materialize_until(moment + self.horizon)
+
+    def _insert(self, rule, spawn):
+        window_start, window_end = rule.window(spawn)
+        event = dict(rule.info, spawn_time=spawn, window_start=window_start, window_end=window_end)
+        for kind in (None, event['type']):
+            times, events = self._index[kind]
+            i = bisect_right(times, spawn)
+            times.insert(i, spawn)
+            events.insert(i, event)
+        return event
+
+    def _materialize_until(self, moment):
+        while self._heap and self._heap[0][0] < moment:
+            spawn, _, rule = heapq.heappop(self._heap)
+            self._insert(rule, spawn)
+            heapq.heappush(self._heap, (rule.following(spawn), next(self._seq), rule))
+        self._until = max(self._until, moment)
+
+    def _keep(self, moment):
+        """Rebuild for queries before the kept range, prune far behind the latest one"""
+        if moment < self.kept_from:
+            self._reset(moment)
+        elif moment - self.kept_from > 2 * self.horizon:
+            cutoff = moment - self.horizon
+            for times, events in self._index.values():
+                i = bisect_left(times, cutoff)
+                del times[:i], events[:i]
+            self.kills = {pair: rule for pair, rule in self.kills.items() if rule.spawn >= cutoff}
+            self.kept_from = cutoff
+
+    def record_kill(self, boss, when, channel=None):
+        """Anchor a field boss's next spawn at a kill; replaces the pair's earlier kill"""
+        key = boss.replace(' ', '_')
+        if key not in self.field:
+            raise ValueError(f"Unknown field boss: {boss}")
+        info, low, high, _ = self.field[key]
+        pair = (key, channel)
+        old = self.kills.get(pair)
+        if old is not None:
+            for times, events in (self._index[None], self._index['field']):
+                i = bisect_left(times, old.spawn)
+                while i < len(times) and times[i] == old.spawn:
+                    if events[i]['boss'] == info['boss'] and events[i].get('channel') == channel:
+                        del times[i], events[i]
+                        break
+                    i += 1
+        rule = IntervalRule(dict(info, channel=channel), when, low, high)
+        self.kills[pair] = rule
+        if rule.spawn >= self.kept_from:
+            self._insert(rule, rule.spawn)
+        return rule
+
+    def respawn_ranges(self, exclude=()):
+        """Field bosses without a recorded kill: their respawn range only"""
+        anchored = {key for key, _ in self.kills} | {b.replace(' ', '_') for b in exclude}
+        return [
+            dict(info, respawn_time=text, respawn_hours=(low, high))
+            for key, (info, low, high, text) in self.field.items() if key not in anchored
+        ]
+
+    def next_spawns(self, after, k=5, kind=None):
+        """The next k spawns strictly after `after` (optionally 'world' or 'field')"""
+        self._keep(after)
+        times, events = self._index[kind]
+        self._materialize_until(after + self.horizon)
+        i = bisect_right(times, after)
+        while len(times) < i + k and self._repeating[kind]:
+            self._materialize_until(self._until + self.horizon)
+        return events[i:i + k]
+
+    def spawns_between(self, start, end, kind=None):
+        """All spawns in the window [start, end)"""
+        self._keep(start)
+        times, events = self._index[kind]
+        self._materialize_until(end)
+        return events[bisect_left(times, start):bisect_left(times, end)]
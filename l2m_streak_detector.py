@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Hot Streak Detector
+Sliding-window streak signals per character and per server channel
+"""
+
+import math
+import statistics
+from collections import deque
+
+from l2m_rate_tables import MIN_LEVEL, MAX_LEVEL, FINAL_RATE_CAP, karma_boost, step_key
+
+
+class _Window:
+    """Fixed-size ring buffer with running success/expectation sums"""
+
+    __slots__ = ('events', 'successes', 'expected', 'variance',
+                 'tumbal_successes', 'hot')
+
+    def __init__(self, size):
+        self.events = deque(maxlen=size)
+        self.successes = 0
+        self.expected = 0.0
+        self.variance = 0.0
+        self.tumbal_successes = 0
+        self.hot = False
+
+    def push(self, success, rate, is_tumbal):
+        if len(self.events) == self.events.maxlen:
+            old_success, old_rate, old_tumbal = self.events[0]
+            self.successes -= old_success
+            self.expected -= old_rate
+            self.variance -= old_rate * (1 - old_rate)
+            self.tumbal_successes -= old_success and old_tumbal
+        self.events.append((success, rate, is_tumbal))
+        self.successes += success
+        self.expected += rate
+        self.variance += rate * (1 - rate)
+        self.tumbal_successes += success and is_tumbal
+
+    def z_score(self):
+        if self.variance <= 1e-12:
+            return 0.0
+        return (self.successes - self.expected) / math.sqrt(self.variance)
+
+
+class L2MStreakDetector:
+    """Flags hot streaks that beat the base rates by a significant margin
+
+    Every attempt is scored against its expected success rate (base rate
+    plus karma). Each character and each channel keeps a ring buffer of
+    the last `window` attempts with running sums, so an event costs O(1).
+    A window is hot when successes exceed the expectation with one-sided
+    significance `alpha` (normal approximation to the Poisson-binomial)
+    and, as in the HOT STREAK rule, it holds at least `min_tumbal_successes`
+    tumbal successes. Signals are emitted only when a window turns hot or
+    cools down again. Attempts without a channel only update the
+    character window.
+    """
+
+    def __init__(self, enhancement_rates, window=30, min_events=10, alpha=0.01,
+                 min_tumbal_successes=2):
+        self.window = window
+        self.min_events = min_events
+        self.min_tumbal_successes = min_tumbal_successes
+        self.threshold = statistics.NormalDist().inv_cdf(1 - alpha)
+        self.base_rates = {
+            (grade, level): steps[step_key(level)]
+            for grade, steps in enhancement_rates.items()
+            for level in range(MIN_LEVEL, MAX_LEVEL)
+        }
+        self.characters = {}
+        self.channels = {}
+        self.processed = 0
+
+    def _update(self, windows, key, success, rate, is_tumbal, scope, timestamp):
+        win = windows.get(key)
+        if win is None:
+            win = windows[key] = _Window(self.window)
+        win.push(success, rate, is_tumbal)
+
+        if len(win.events) < self.min_events:
+            return None
+        z = win.z_score()
+        hot = z >= self.threshold and win.tumbal_successes >= self.min_tumbal_successes
+        if hot == win.hot:
+            return None
+        win.hot = hot
+        return {
+            'scope': scope,
+            'key': key,
+            'state': 'hot' if hot else 'cooled',
+            'z_score': z,
+            'successes': win.successes,
+            'expected': win.expected,
+            'window': len(win.events),
+            'tumbal_successes': win.tumbal_successes,
+            'timestamp': timestamp
+        }
+
+    def process(self, character, channel, grade, level, success, tumbal=0,
+                is_tumbal=False, timestamp=None):
+        """Score one attempt, returns a list of state-change signals"""
+        base = self.base_rates.get((grade, level))
+        if base is None:
+            raise ValueError(f"No rates for {grade} +{level}")
+        rate = base if is_tumbal else min(base + karma_boost(tumbal), FINAL_RATE_CAP)
+        success = 1 if success else 0
+        self.processed += 1
+
+        signals = []
+        for windows, key, scope in ((self.characters, character, 'character'),
+                                    (self.channels, channel, 'channel')):
+            if key is None:
+                continue
+            signal = self._update(windows, key, success, rate, is_tumbal, scope, timestamp)
+            if signal:
+                signals.append(signal)
+        return signals
+
+    def process_event(self, event):
+        """Score an event dict (character, channel, grade, level, outcome, ...)"""
+        return self.process(
+            event['character'], event.get('channel'), event['grade'], int(event['level']),
+            event.get('outcome') == 'success', int(event.get('tumbal') or 0),
+            bool(event.get('is_tumbal')), event.get('timestamp')
+        )
+
+    def is_hot(self, character=None, channel=None):
+        """Current hot state of a character or channel window"""
+        windows, key = (self.characters, character) if character is not None else (self.channels, channel)
+        win = windows.get(key)
+        return bool(win and win.hot)
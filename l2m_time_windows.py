@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Time Windows
+Week x hour grid of enhancement timing scores and epic yields
+"""
+
+from bisect import bisect_left
+from datetime import timedelta
+
+import numpy as np
+
+from l2m_spawn_calendar import WEEKDAYS, WeeklyRule
+from l2m_map_catalog import in_hour_window
+
+SLOTS_PER_DAY = 24
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+
+# Hour-of-day bands shared by the advisor, day analysis, report and routes:
+# (start, end, enhancement score, stars, assessment, competition)
+HOUR_BANDS = (
+    (0, 1, 95, 5, 'EXCELLENT - Daily reset!', 'Low'),
+    (1, 6, 85, 4, 'GOOD - Low population', 'Low'),
+    (6, 10, 70, 3, 'ACCEPTABLE - Moderate', 'Moderate'),
+    (10, 17, 50, 2, 'POOR - Standard rates', 'Standard'),
+    (17, 20, 35, 1, 'BAD - High population', 'High'),
+    (20, 24, 25, 1, 'TERRIBLE - Peak hours', 'High')
+)
+
+# Farming outlook by competition: (time bonus, recommended action)
+FARMING_OUTLOOK = {
+    'Low': ('EXCELLENT - Low competition', 'Farm elite zones now!'),
+    'Moderate': ('GOOD - Moderate competition', 'Focus on less popular maps'),
+    'Standard': ('AVERAGE - Standard competition', 'Prepare for evening bosses'),
+    'High': ('POOR - High competition', 'Wait for late night or join world boss')
+}
+
+OFF_HOURS_FACTOR = 0.75  # Map yield outside its best_time window
+BOSS_LEAD_SLOTS = 3  # Hours before a world boss spawn that count as boss time
+
+
+def slot_index(moment):
+    """Week slot of a datetime: Monday 00:00 → 0, Sunday 23:00 → 167"""
+    return moment.weekday() * SLOTS_PER_DAY + moment.hour
+
+
+class _NextAtLeast:
+    """Next slot (cyclic, at or after a slot) whose value reaches a threshold
+
+    For every distinct value v the next qualifying slot of each slot is
+    precomputed, so a query is one bisect over the distinct values plus an
+    array lookup.
+    """
+
+    def __init__(self, values):
+        self.levels = np.unique(values)
+        n = len(values)
+        doubled = np.concatenate([values, values])
+        positions = np.arange(2 * n)
+        self.next = np.empty((len(self.levels), n), dtype=np.int64)
+        for j, level in enumerate(self.levels):
+            # Index of the first qualifying position at or after each position
+            marks = np.where(doubled >= level, positions, 2 * n)
+            nearest = np.minimum.accumulate(marks[::-1])[::-1]
+            self.next[j] = nearest[:n]
+
+    def query(self, slot, threshold):
+        """Slots ahead of `slot` (0 = this one) until value >= threshold; None if never"""
+        j = bisect_left(self.levels, threshold - 1e-12)
+        if j == len(self.levels):
+            return None
+        return int(self.next[j, slot]) - slot
+
+
+class L2MTimeWindowGrid:
+    """168-slot week grid combining every time-dependent factor
+
+    Per slot: the hour band (enhancement score, competition), the day's
+    drop modifier, world boss spawns, and each map's expected epics per
+    hour (the yield model's rate for the day and buffs × best-time
+    factor). The slot score is the band score
+    scaled by the day modifier. Lookups index the arrays directly; "next
+    slot with score/yield ≥ X" is a precomputed table lookup.
+    """
+
+    def __init__(self, analyzer, buffs=None):
+        self.analyzer = analyzer
+        self.buffs = list(buffs or [])
+        model = analyzer.yield_model
+        buff_row = model.drops_per_hour[model.buff_index(self.buffs)]
+        maps = model.maps
+        self.map_names = [m['name'] for m in maps]
+
+        hours = np.tile(np.arange(SLOTS_PER_DAY), 7)
+        self.band = np.empty(WEEK_SLOTS, dtype=np.int64)
+        for b, (start, end, *_) in enumerate(HOUR_BANDS):
+            self.band[(hours >= start) & (hours < end)] = b
+        band_scores = np.array([band[2] for band in HOUR_BANDS])
+
+        days = analyzer.daily_drop_rates
+        self.day_modifier = np.repeat(
+            [days.get(day, days['monday'])['modifier'] for day in WEEKDAYS], SLOTS_PER_DAY)
+        self.score = np.minimum(np.rint(band_scores[self.band] * self.day_modifier), 100).astype(int)
+
+        self.bosses = [[] for _ in range(WEEK_SLOTS)]
+        for rule in analyzer.spawn_calendar.rules:
+            if isinstance(rule, WeeklyRule):
+                self.bosses[rule.weekday * SLOTS_PER_DAY + rule.hour].append(rule.info['boss'])
+        boss_slots = np.array([bool(b) for b in self.bosses])
+        # Boss time: a world boss spawns in this slot or within the lead window
+        self.boss_time = np.zeros(WEEK_SLOTS, dtype=bool)
+        for lead in range(BOSS_LEAD_SLOTS + 1):
+            self.boss_time |= np.roll(boss_slots, -lead)
+
+        self.map_yield = np.zeros((WEEK_SLOTS, len(maps)))
+        factor = np.ones((SLOTS_PER_DAY, len(maps)))
+        for m, info in enumerate(maps):
+            if info['best_hours']:
+                factor[[not in_hour_window(h, info['best_hours']) for h in range(SLOTS_PER_DAY)], m] = \
+                    OFF_HOURS_FACTOR
+        for d in range(len(WEEKDAYS)):
+            self.map_yield[d * SLOTS_PER_DAY:(d + 1) * SLOTS_PER_DAY] = buff_row[d] * factor
+        self.best_map = self.map_yield.argmax(axis=1)
+        self.epic_yield = self.map_yield.max(axis=1)
+
+        self._next_score = _NextAtLeast(self.score)
+        self._next_yield = _NextAtLeast(self.epic_yield)
+
+    def slot(self, moment):
+        """Everything known about the week slot containing moment"""
+        i = slot_index(moment)
+        _, _, band_score, stars, assessment, competition = HOUR_BANDS[self.band[i]]
+        time_bonus, action = FARMING_OUTLOOK[competition]
+        ranked = np.argsort(-self.map_yield[i])
+        return {
+            'slot': i,
+            'day': WEEKDAYS[i // SLOTS_PER_DAY],
+            'hour': i % SLOTS_PER_DAY,
+            'score': int(self.score[i]),
+            'band_score': band_score,
+            'rating': '⭐' * stars,
+            'assessment': assessment,
+            'competition': competition,
+            'time_bonus': time_bonus,
+            'recommended_action': action,
+            'day_modifier': float(self.day_modifier[i]),
+            'bosses': self.bosses[i],
+            'boss_time': bool(self.boss_time[i]),
+            'best_maps': [self.map_names[m] for m in ranked[:3]],
+            'expected_epics': float(self.epic_yield[i])
+        }
+
+    def map_yields(self, moment):
+        """{map name: expected epics per hour} for the slot containing moment"""
+        return dict(zip(self.map_names, self.map_yield[slot_index(moment)].tolist()))
+
+    def next_window(self, moment, min_score=None, min_epics=None):
+        """Start of the first slot at or after moment's slot meeting a threshold
+
+        Give either min_score (timing score) or min_epics (best map yield).
+        Returns None if no slot in the week qualifies; a start earlier than
+        moment means the current slot already qualifies.
+        """
+        if (min_score is None) == (min_epics is None):
+            raise ValueError("Give exactly one of min_score or min_epics")
+        table = self._next_score if min_epics is None else self._next_yield
+        ahead = table.query(slot_index(moment), min_score if min_epics is None else min_epics)
+        if ahead is None:
+            return None
+        return moment.replace(minute=0, second=0, microsecond=0) + timedelta(hours=ahead)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Tumbal Policy Solver
+Optimal proceed / restart / pivot decisions by dynamic programming
+"""
+
+import os
+import hashlib
+
+import numpy as np
+
+from l2m_rate_tables import (
+    KARMA_PER_TUMBAL, KARMA_CAP, EVENT_BOOST, FINAL_RATE_CAP, MAX_LEVEL,
+    step_key, karma_boost, diamond_cost_per_attempt
+)
+from l2m_markov_solver import rate_table_version
+
+ACTIONS = ('stop', 'proceed', 'restart', 'pivot')
+STOP, PROCEED, RESTART, PIVOT = range(len(ACTIONS))
+
+# Market value midpoints from economic_analysis (diamonds)
+MARKET_PRICES = {
+    'rare': {6: 75, 7: 400, 8: 1750, 9: 5000},
+    'unique': {6: 750, 7: 2500, 8: 9000, 9: 30000}
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.l2m_optimizer', 'policies')
+
+
+class L2MTumbalPolicy:
+    """Precomputed policy table with O(1) lookups
+
+    Arrays are indexed [fodder, level - start, karma, pivot] where karma is
+    the number of tumbal destroyed (capped at the karma limit) and pivot
+    flags a tumbal that just succeeded and can be attempted once more.
+    """
+
+    def __init__(self, params, values, policy):
+        self.params = params
+        self.values = values
+        self.policy = policy
+        self.start = params['start']
+        self.target = params['target']
+        self.max_karma = policy.shape[2] - 1
+        self.max_fodder = policy.shape[0] - 1
+
+    def action(self, karma, fodder, level, pivot=False):
+        """Optimal action name for the current session state"""
+        return ACTIONS[self.action_code(karma, fodder, level, pivot)]
+
+    def action_code(self, karma, fodder, level, pivot=False):
+        """Optimal action code for the current session state"""
+        if level >= self.target:
+            return STOP
+        if not self.start <= level:
+            raise ValueError(f"Level +{level} is below the policy start +{self.start}")
+        if not 0 <= fodder <= self.max_fodder:
+            raise ValueError(f"Policy covers 0-{self.max_fodder} fodder, got {fodder}")
+        return int(self.policy[fodder, level - self.start,
+                               min(karma, self.max_karma), int(bool(pivot))])
+
+    def value(self, karma, fodder, level, pivot=False):
+        """Expected net worth in diamonds when following the policy"""
+        return float(self.values[min(fodder, self.max_fodder), level - self.start,
+                                 min(karma, self.max_karma), int(bool(pivot))])
+
+    def table(self, fodder, level, pivot=False):
+        """Action per karma count for one fodder stock and level"""
+        return {
+            k: ACTIONS[self.policy[fodder, level - self.start, k, int(bool(pivot))]]
+            for k in range(self.max_karma + 1)
+        }
+
+
+class L2MTumbalPolicySolver:
+    """Value iteration over (karma, remaining fodder, main weapon level)
+
+    Actions in every state:
+    • stop     - keep the weapon at its current level
+    • proceed  - attempt the main weapon with the current karma; karma is
+                 consumed whatever the outcome
+    • restart  - burn one fresh fodder item; destruction adds karma, a
+                 success resets karma and leaves a pivot item
+    • pivot    - attempt the pivot item one level higher; destruction adds
+                 karma, a success resets karma and spends the pivot
+
+    Fodder attempts use the base rate of the fodder grade without karma.
+    Failed attempts that do not destroy leave the state unchanged, so each
+    action's value is solved in closed form for its self-loop.
+    """
+
+    def __init__(self, enhancement_rates, destruction_rates, cache_dir=DEFAULT_CACHE_DIR):
+        self.enhancement_rates = enhancement_rates
+        self.destruction_rates = destruction_rates
+        self.cache_dir = cache_dir
+        self._policies = {}
+
+    def _step(self, grade, level, boost=0.0):
+        """Success and destroy probabilities of one attempt"""
+        if grade not in self.destruction_rates:
+            raise ValueError(f"No destruction rates for grade: {grade}")
+        key = step_key(level)
+        success = min(self.enhancement_rates[grade][key] + boost, FINAL_RATE_CAP)
+        destroy = (1 - success) * self.destruction_rates[grade][key]
+        return success, destroy
+
+    def _params(self, grade, start, target, max_fodder, fodder_grade, fodder_level,
+                prices, fodder_value, event):
+        prices = prices or MARKET_PRICES.get(grade)
+        if not prices:
+            raise ValueError(f"No market prices for grade: {grade}")
+        missing = [lvl for lvl in range(start, target + 1) if lvl not in prices]
+        if missing:
+            raise ValueError(f"Missing market prices for levels: {missing}")
+        if not start < target <= MAX_LEVEL:
+            raise ValueError(f"Invalid enhancement range: +{start} → +{target}")
+        if fodder_level + 1 >= MAX_LEVEL:
+            raise ValueError(f"Fodder level +{fodder_level} leaves no pivot step")
+        return {
+            'grade': grade,
+            'start': start,
+            'target': target,
+            'max_fodder': max_fodder,
+            'fodder_grade': fodder_grade,
+            'fodder_level': fodder_level,
+            'prices': {lvl: prices[lvl] for lvl in range(start, target + 1)},
+            'fodder_value': fodder_value,
+            'event': event,
+            'karma': (KARMA_PER_TUMBAL, KARMA_CAP),
+            'rates': rate_table_version(self.enhancement_rates, self.destruction_rates)
+        }
+
+    def _cache_path(self, params):
+        digest = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"tumbal_policy_{digest}.npz")
+
+    def solve(self, grade, start=7, target=9, max_fodder=30, fodder_grade='rare',
+              fodder_level=6, prices=None, fodder_value=0, event=False):
+        """Optimal policy table, loaded from memory or disk when available"""
+        params = self._params(grade, start, target, max_fodder, fodder_grade,
+                              fodder_level, prices, fodder_value, event)
+        key = repr(sorted(params.items()))
+        if key in self._policies:
+            return self._policies[key]
+
+        path = self._cache_path(params) if self.cache_dir else None
+        if path and os.path.exists(path):
+            with np.load(path) as data:
+                policy = L2MTumbalPolicy(params, data['values'], data['policy'])
+        else:
+            policy = L2MTumbalPolicy(params, *self._value_iteration(params))
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.savez_compressed(path, values=policy.values, policy=policy.policy)
+
+        self._policies[key] = policy
+        return policy
+
+    def _value_iteration(self, params):
+        start, target = params['start'], params['target']
+        max_fodder, prices = params['max_fodder'], params['prices']
+        max_karma = int(round(KARMA_CAP / KARMA_PER_TUMBAL))
+        n_levels = target - start + 1
+
+        values = np.zeros((max_fodder + 1, n_levels, max_karma + 1, 2))
+        policy = np.zeros(values.shape, dtype=np.int8)
+        values[:, -1] = prices[target]
+
+        event_boost = EVENT_BOOST if params['event'] else 0
+        main = {
+            (lvl, k): self._step(params['grade'], lvl, karma_boost(k) + event_boost)
+            for lvl in range(start, target) for k in range(max_karma + 1)
+        }
+        fodder_success, fodder_destroy = self._step(params['fodder_grade'], params['fodder_level'])
+        pivot_success, pivot_destroy = self._step(params['fodder_grade'], params['fodder_level'] + 1)
+        fodder_cost = diamond_cost_per_attempt(params['fodder_level'])
+        pivot_cost = diamond_cost_per_attempt(params['fodder_level'] + 1)
+        fodder_value = params['fodder_value']
+
+        # Every dependency points to fewer fodder, a higher level, karma 0,
+        # or the non-pivot state, so one ordered sweep is exact
+        for f in range(max_fodder + 1):
+            for li in range(n_levels - 2, -1, -1):
+                lvl = start + li
+                main_cost = diamond_cost_per_attempt(lvl)
+                for p in (0, 1):
+                    for k in range(max_karma + 1):
+                        k_up = min(k + 1, max_karma)
+                        options = [prices[lvl]]
+
+                        success, destroy = main[(lvl, k)]
+                        gain = -main_cost + success * values[f, li + 1, 0, p]
+                        if k == 0:
+                            options.append(gain / (success + destroy))
+                        else:
+                            options.append(gain + (1 - success - destroy) * values[f, li, 0, p])
+
+                        if f > 0:
+                            gain = (-fodder_cost
+                                    + fodder_destroy * (values[f - 1, li, k_up, p] - fodder_value)
+                                    + fodder_success * (values[f - 1, li, 0, 1] - fodder_value))
+                            options.append(gain / (fodder_success + fodder_destroy))
+                        else:
+                            options.append(-np.inf)
+
+                        if p:
+                            gain = (-pivot_cost
+                                    + pivot_destroy * values[f, li, k_up, 0]
+                                    + pivot_success * values[f, li, 0, 0])
+                            options.append(gain / (pivot_success + pivot_destroy))
+
+                        best = int(np.argmax(options))
+                        policy[f, li, k, p] = best
+                        values[f, li, k, p] = options[best]
+
+        return values, policy
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Tumbal ROI Optimizer
+Expected profit of every tumbal count for every grade and level
+"""
+
+import numpy as np
+
+from l2m_rate_tables import KARMA_PER_TUMBAL, KARMA_CAP, MIN_LEVEL, MAX_LEVEL, LEVELS
+from l2m_tumbal_policy import MARKET_PRICES
+from l2m_cost_distribution import DEFAULT_TUMBAL_PRICE
+
+
+class L2MTumbalROIOptimizer:
+    """Profit curves over tumbal counts 0..karma cap, one array for all steps
+
+    Buying a +L weapon and enhancing it to +L+1 (rebuying it whenever it is
+    destroyed) costs price[L] * (1 + destroys) + attempts * (tier + n *
+    tumbal_price), where attempts = 1/p and destroys = (1-p)/p * destroy
+    rate. The rate-dependent parts (attempts, destroys) are computed once
+    as (grade, level, tumbal) arrays; a price update only redoes the
+    multiply-add for the grades whose prices changed.
+    """
+
+    def __init__(self, rate_table, prices=None, tumbal_price=DEFAULT_TUMBAL_PRICE,
+                 max_tumbal=None, event=False):
+        self.rate_table = rate_table
+        if max_tumbal is None:
+            max_tumbal = int(round(KARMA_CAP / KARMA_PER_TUMBAL))
+        self.tumbal = np.arange(max_tumbal + 1)
+
+        grades = np.arange(len(rate_table.grades))[:, None, None]
+        levels = np.arange(len(LEVELS))[None, :, None]
+        p = rate_table.final_rate(grades, levels, self.tumbal[None, None, :], event)
+        self.attempts = 1 / p
+        self.destroys = (1 - p) * rate_table.destroy[:, :, None] / p
+        self.attempt_cost = rate_table.cost[None, :, None].astype(float)
+
+        shape = (len(rate_table.grades), MAX_LEVEL - MIN_LEVEL + 1)
+        self.prices = np.full(shape, np.nan)
+        self.tumbal_price = None
+        self.profit = np.full(self.attempts.shape, np.nan)
+        self.spend = np.full(self.attempts.shape, np.nan)
+        self.update_prices(MARKET_PRICES if prices is None else prices, tumbal_price)
+
+    def update_prices(self, prices=None, tumbal_price=None):
+        """Apply new market prices ({grade: {level: diamonds}}); returns updated grades
+
+        Grades left out of `prices` keep their current prices. Changing the
+        tumbal price reprices every grade.
+        """
+        changed = set()
+        for grade, levels in (prices or {}).items():
+            g = self.rate_table.grade_index(grade)
+            row = np.full(self.prices.shape[1], np.nan)
+            for level, price in levels.items():
+                if not MIN_LEVEL <= level <= MAX_LEVEL:
+                    raise ValueError(f"No market level +{level}")
+                row[level - MIN_LEVEL] = price
+            # Same prices, unset levels (NaN) included; equal_nan needs numpy 1.19
+            old = self.prices[g]
+            if not (np.array_equal(np.isnan(row), np.isnan(old))
+                    and np.array_equal(row[~np.isnan(row)], old[~np.isnan(old)])):
+                self.prices[g] = row
+                changed.add(g)
+        if tumbal_price is not None and tumbal_price != self.tumbal_price:
+            self.tumbal_price = tumbal_price
+            changed = set(range(len(self.rate_table.grades)))
+
+        if changed:
+            rows = sorted(changed)
+            price = self.prices[rows]
+            spend = (price[:, :-1, None] * (1 + self.destroys[rows])
+                     + self.attempts[rows] * (self.attempt_cost + self.tumbal * self.tumbal_price))
+            self.spend[rows] = spend
+            self.profit[rows] = price[:, 1:, None] - spend
+        return [self.rate_table.grades[g] for g in sorted(changed)]
+
+    def best(self, grade, level):
+        """Best tumbal count for the step from level to level+1, with its profit curve"""
+        g = self.rate_table.grade_index(grade)
+        l = self.rate_table.level_index(level)
+        curve = self.profit[g, l]
+        if np.isnan(curve).any():
+            raise ValueError(f"No market prices for {grade} +{level} → +{level + 1}")
+        n = int(curve.argmax())
+        return {
+            'grade': grade,
+            'level': level,
+            'tumbal': n,
+            'profit': float(curve[n]),
+            'roi': float(curve[n] / self.spend[g, l, n]),
+            'curve': curve.copy()
+        }
+
+    def table(self):
+        """{grade: {target: best(...)}} for every step with known prices"""
+        priced = ~np.isnan(self.profit[:, :, 0])
+        best = self.profit.argmax(axis=2)
+        table = {}
+        for g, l in zip(*np.nonzero(priced)):
+            grade = self.rate_table.grades[g]
+            n = int(best[g, l])
+            table.setdefault(grade, {})[LEVELS[l] + 1] = {
+                'tumbal': n,
+                'profit': float(self.profit[g, l, n]),
+                'roi': float(self.profit[g, l, n] / self.spend[g, l, n]),
+                'no_tumbal_profit': float(self.profit[g, l, 0])
+            }
+        return table
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Yield Model
+Epic drops per hour from mob density, competition and drop chance
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+from l2m_spawn_calendar import WEEKDAYS
+
+# Kills per hour by mob density, and the share of kills left by competition
+DENSITY_KILLS = {'Low': 80, 'Medium': 120, 'High': 160, 'Very High': 200}
+COMPETITION_SHARE = {'Low': 1.0, 'Medium': 0.8, 'High': 0.6, 'Very High': 0.45, 'Extreme': 0.35}
+
+BUFFS = ('event', 'party', 'premium')
+BUFF_COMBOS = tuple(combo for size in range(len(BUFFS) + 1) for combo in combinations(BUFFS, size))
+
+
+def kill_rate(entry):
+    """Mean kills per hour on a map: density kill rate × competition share"""
+    return DENSITY_KILLS.get(entry['mob_density'], 100) * COMPETITION_SHARE.get(entry['competition'], 0.5)
+
+
+class L2MYieldModel:
+    """Poisson kill process thinned by the per-kill epic chance
+
+    Kills arrive as a Poisson process at kill_rate per hour and each kill
+    drops an epic with calculate_epic_drop_chance (day modifier, buffs,
+    cap), so epics over t hours are Poisson(kill_rate × chance × t):
+    E = λt and P(≥1) = 1 - e^(-λt). Rates are tabulated once for every
+    buff combination × weekday × map, shape (len(BUFF_COMBOS), 7, maps).
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.maps = analyzer.map_catalog.maps
+        self._index = {entry['name']: m for m, entry in enumerate(self.maps)}
+        self.kills_per_hour = np.array([kill_rate(entry) for entry in self.maps])
+
+        days = analyzer.daily_drop_rates
+        modifiers = [days.get(day, days['monday'])['modifier'] for day in WEEKDAYS]
+        self.chance = np.array([
+            [
+                [analyzer.calculate_epic_drop_chance(entry['expected_rate'], modifier, list(combo)) / 100
+                 for entry in self.maps]
+                for modifier in modifiers
+            ]
+            for combo in BUFF_COMBOS
+        ])
+        self.drops_per_hour = self.kills_per_hour * self.chance
+
+    def buff_index(self, buffs=None):
+        """Row of BUFF_COMBOS for a buff list"""
+        combo = tuple(sorted(set(buffs or ())))
+        unknown = set(combo) - set(BUFFS)
+        if unknown:
+            raise ValueError(f"Unknown buffs: {sorted(unknown)}")
+        return BUFF_COMBOS.index(combo)
+
+    def session(self, hours=1):
+        """Expected epics and P(≥1 epic) over `hours` for every buff × day × map"""
+        mean = self.drops_per_hour * hours
+        return {'expected': mean, 'p_any': -np.expm1(-mean)}
+
+    def distribution(self, map_name, hours=1, buffs=None, day='monday', max_drops=10):
+        """P(exactly k epics) for k = 0..max_drops on one map"""
+        m = self._map_index(map_name)
+        mean = self.drops_per_hour[self.buff_index(buffs), WEEKDAYS.index(day), m] * hours
+        k = np.arange(max_drops + 1)
+        log_fact = np.concatenate([[0.0], np.cumsum(np.log(k[1:]))])
+        return np.exp(k * np.log(mean) - mean - log_fact) if mean > 0 else (k == 0).astype(float)
+
+    def simulate(self, hours=1, trials=10_000, seed=None):
+        """Monte Carlo check of session(): Poisson kills, then binomial epics per kill"""
+        rng = np.random.default_rng(seed)
+        kills = rng.poisson(self.kills_per_hour * hours, size=(trials,) + self.chance.shape)
+        drops = rng.binomial(kills, self.chance)
+        return {'expected': drops.mean(axis=0), 'p_any': (drops > 0).mean(axis=0)}
+
+    def rank(self, maps=None, hours=1, buffs=None, day='monday'):
+        """Maps (all, or the given catalog entries) by expected epics per session"""
+        b, d = self.buff_index(buffs), WEEKDAYS.index(day)
+        indices = range(len(self.maps)) if maps is None else [self._map_index(m['name']) for m in maps]
+        ranked = []
+        for m in indices:
+            mean = float(self.drops_per_hour[b, d, m] * hours)
+            ranked.append({
+                'map': self.maps[m],
+                'kills_per_hour': float(self.kills_per_hour[m]),
+                'expected_epics': mean,
+                'p_any_epic': float(-np.expm1(-mean))
+            })
+        ranked.sort(key=lambda r: -r['expected_epics'])
+        return ranked
+
+    def _map_index(self, name):
+        if name not in self._index:
+            raise ValueError(f"Unknown map: {name}")
+        return self._index[name]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Lineage2M API Server Tests
+End-to-end checks through the local HTTP client, standing in for the bot
+"""
+
+import asyncio
+import socket
+import threading
+import unittest
+
+from l2m_master_optimizer import L2MEnhancementMasterSystem
+from l2m_api_server import L2MAPIServer, L2MAPIClient
+
+
+class L2MAPIServerTest(unittest.TestCase):
+    """Starts one server on a free port in a background event loop"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = L2MAPIServer(L2MEnhancementMasterSystem(), port=0)
+        cls.loop = asyncio.new_event_loop()
+        cls.thread = threading.Thread(target=cls.loop.run_forever, daemon=True)
+        cls.thread.start()
+        asyncio.run_coroutine_threadsafe(cls.server.start(), cls.loop).result(10)
+
+    @classmethod
+    def tearDownClass(cls):
+        asyncio.run_coroutine_threadsafe(cls.server.close(), cls.loop).result(10)
+        cls.loop.call_soon_threadsafe(cls.loop.stop)
+        cls.thread.join(10)
+        cls.loop.close()
+
+    def setUp(self):
+        self.client = L2MAPIClient(port=self.server.port)
+
+    def tearDown(self):
+        self.client.close()
+
+    def raw(self, request):
+        with socket.create_connection(('127.0.0.1', self.server.port), timeout=10) as sock:
+            sock.sendall(request)
+            return sock.recv(65536).split(b'\r\n')[0]
+
+    def test_rate(self):
+        status, body = self.client.get('/rate', grade='rare', level=8, tumbal=8)
+        self.assertEqual(status, 200)
+        self.assertAlmostEqual(body['final_rate'], 0.36)
+        self.assertAlmostEqual(body['expected_attempts'], 1 / 0.36)
+
+    def test_equivalent_requests_share_a_cache_entry(self):
+        self.client.get('/rate', grade='unique', level=7, event='yes')
+        hits = self.client.get('/stats')[1]['hits']
+        status, _ = self.client.get('/rate', event='1', level=7, grade='UNIQUE')
+        self.assertEqual(status, 200)
+        self.assertEqual(self.client.get('/stats')[1]['hits'], hits + 1)
+
+    def test_cost_quantiles(self):
+        status, body = self.client.get('/cost', grade='unique', start=6, target=9, tumbal=5)
+        self.assertEqual(status, 200)
+        quantiles = body['quantiles']
+        self.assertLessEqual(quantiles['p5'], quantiles['p50'])
+        self.assertLessEqual(quantiles['p50'], quantiles['p99'])
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get('/rate', grade='rare')[0], 400)
+        self.assertEqual(self.client.get('/rate', grade='rare', level='x')[0], 400)
+        self.assertEqual(self.client.get('/rate', grade='rare', level=8, color='red')[0], 400)
+        self.assertEqual(self.client.get('/rate', grade='legendary', level=8)[0], 400)
+        self.assertEqual(self.client.get('/nowhere')[0], 404)
+
+    def test_bad_content_length(self):
+        line = self.raw(b'GET /stats HTTP/1.1\r\nHost: x\r\nContent-Length: abc\r\n\r\n')
+        self.assertEqual(line, b'HTTP/1.1 400 Bad Request')
+
+    def test_route_uses_region_clock(self):
+        status, body = self.client.get('/route', level=55, hours=3, buffs=['party', 'event'], region='NA')
+        self.assertEqual(status, 200)
+        now = self.server.analyzer.now('NA').replace(minute=0, second=0, microsecond=0)
+        self.assertEqual(body['route'][0]['start'], now.isoformat())
+
+    def test_kill_anchors_field_timers(self):
+        self.assertEqual(self.client.get('/kill', boss='Core')[0], 405)
+        status, kill = self.client.post('/kill', boss='Core', channel=3, region='JP')
+        self.assertEqual(status, 200)
+        status, body = self.client.get('/field-bosses', count=3, region='JP')
+        self.assertEqual(status, 200)
+        core = [t for t in body['timers'] if t['boss'] == 'Core']
+        self.assertEqual(core[0]['spawn_time'], kill['spawn_time'])
+        self.assertEqual(core[0]['channel'], '3')
+        self.assertEqual(self.client.post('/kill', boss='Nobody')[0], 400)
+
+    def test_tumbal_successes_turn_a_streak_hot(self):
+        self.assertFalse(self.client.get('/streak', character='bot')[1]['hot'])
+        for _ in range(10):
+            status, body = self.client.post('/attempt', grade='rare', level=6, outcome='success',
+                                            is_tumbal=1, character='bot', channel=7)
+            self.assertEqual(status, 200)
+        self.assertEqual([s['state'] for s in body['signals']], ['hot', 'hot'])
+        self.assertTrue(self.client.get('/streak', character='bot')[1]['hot'])
+        self.assertTrue(self.client.get('/streak', channel=7)[1]['channel_hot'])
+        self.assertEqual(self.client.post('/attempt', grade='rare', level=6, outcome='won')[0], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
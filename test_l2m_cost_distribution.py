@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Cost Distribution Tests
+Exact cost distributions checked against the Markov solver's expectations
+"""
+
+import unittest
+
+from l2m_master_optimizer import L2MEnhancementMasterSystem
+
+
+class L2MCostDistributionTest(unittest.TestCase):
+    """Both engines restart a destroyed weapon at the start level"""
+
+    @classmethod
+    def setUpClass(cls):
+        app = L2MEnhancementMasterSystem()
+        cls.engine = app.cost_distribution
+        cls.solver = app.markov_solver
+
+    def test_mean_matches_markov_solver(self):
+        for grade, start, target, tumbal in (('rare', 6, 7, 0), ('rare', 6, 10, 5),
+                                             ('unique', 7, 9, [3, 8]), ('unique', 8, 10, 10)):
+            with self.subTest(grade=grade, start=start, target=target, tumbal=tumbal):
+                dist = self.engine.distribution(grade, start, target, tumbal, tumbal_price=50)
+                exact = self.solver.solve(grade, start, target, tumbal, tumbal_cost=50)
+                self.assertLess(dist.tail_mass, 1e-11)
+                self.assertAlmostEqual(dist.pmf.sum() + dist.tail_mass, 1.0, places=12)
+                self.assertAlmostEqual(dist.mean / exact['expected_diamonds_with_restart'], 1.0, places=8)
+
+    def test_item_price_adds_replacements(self):
+        plain = self.engine.distribution('unique', 6, 9, 5)
+        replaced = self.engine.distribution('unique', 6, 9, 5, item_price=750)
+        destroyed = self.solver.solve('unique', 6, 9, 5)['expected_destroyed_with_restart']
+        self.assertAlmostEqual(replaced.mean - plain.mean, 750 * destroyed, places=4)
+
+    def test_event_matches_markov_solver(self):
+        dist = self.engine.distribution('rare', 7, 10, 8, event=True, tumbal_price=0)
+        exact = self.solver.solve('rare', 7, 10, 8, event=True)
+        self.assertAlmostEqual(dist.mean / exact['expected_diamonds_with_restart'], 1.0, places=8)
+
+    def test_quantiles_are_ordered_lattice_points(self):
+        dist = self.engine.distribution('rare', 6, 9, 5)
+        quantiles = [dist.quantile(q) for q in (0.05, 0.5, 0.95, 0.99)]
+        self.assertEqual(quantiles, sorted(quantiles))
+        for value in quantiles:
+            self.assertEqual(value % dist.unit, 0)
+        self.assertGreaterEqual(dist.cdf(quantiles[1]), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
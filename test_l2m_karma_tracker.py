@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Karma Tracker Tests
+Timer wheel expiry and per-tumbal karma decay steps
+"""
+
+import unittest
+
+from l2m_karma_tracker import TimerWheel, L2MKarmaTracker, decay_weight
+
+
+class TimerWheelTest(unittest.TestCase):
+    """Timers fire on their tick, whichever wheel level holds them"""
+
+    def test_fires_in_order_across_levels_and_overflow(self):
+        wheel = TimerWheel(start=0)
+        delays = [1, 63, 64, 65, 4095, 4096, 300_000]
+        for delay in reversed(delays):
+            wheel.schedule(delay, delay)
+        fired = []
+        for delay in delays:
+            self.assertEqual(wheel.advance(delay - 1), [])
+            fired += wheel.advance(delay)
+        self.assertEqual(fired, delays)
+        self.assertEqual(wheel.pending, 0)
+
+    def test_fractional_timestamps_round_up_to_a_tick(self):
+        wheel = TimerWheel(start=0)
+        wheel.schedule(0.5, 'half')
+        self.assertEqual(wheel.advance(0.9), [])
+        self.assertEqual(wheel.advance(1), ['half'])
+
+    def test_past_timers_fire_on_next_advance(self):
+        wheel = TimerWheel(start=100)
+        wheel.schedule(50, 'late')
+        self.assertEqual(wheel.advance(100), ['late'])
+
+
+class L2MKarmaTrackerTest(unittest.TestCase):
+    """Decay steps: 100% under 60s, 90% to 120s, 70% to 300s, then expired"""
+
+    def test_single_tumbal_decay_steps(self):
+        tracker = L2MKarmaTracker(start=0)
+        tracker.record_destruction('a', 0)
+        for now, weight in ((0, 1.0), (59, 1.0), (60, 0.9), (119, 0.9), (120, 0.7), (299, 0.7)):
+            self.assertAlmostEqual(tracker.effective_tumbal('a', now), weight, msg=f"at {now}s")
+            self.assertAlmostEqual(weight, decay_weight(now))
+        self.assertEqual(tracker.effective_tumbal('a', 300), 0.0)
+        self.assertNotIn('a', tracker.characters)
+
+    def test_tumbal_decay_independently(self):
+        tracker = L2MKarmaTracker(start=0)
+        for timestamp in (0, 30, 90, 200):
+            tracker.record_destruction('a', timestamp)
+        # Ages at 240s: 240, 210, 150, 40; at 330s: two expired, 240, 130
+        self.assertAlmostEqual(tracker.effective_tumbal('a', 240), 0.7 * 3 + 1.0)
+        self.assertAlmostEqual(tracker.effective_boost('a', 240), 3.1 * 0.03)
+        self.assertAlmostEqual(tracker.effective_tumbal('a', 330), 0.7 + 0.7)
+
+    def test_query_in_the_past_recomputes(self):
+        tracker = L2MKarmaTracker(start=0)
+        tracker.record_destruction('a', 0)
+        tracker.record_destruction('a', 100)
+        self.assertAlmostEqual(tracker.effective_tumbal('a', 130), 0.7 + 1.0)
+        self.assertAlmostEqual(tracker.effective_tumbal('a', 70), 0.9)
+
+    def test_reset_and_characters(self):
+        tracker = L2MKarmaTracker(start=0)
+        tracker.record_destruction('a', 0)
+        tracker.record_destruction('b', 0)
+        tracker.reset('a')
+        self.assertEqual(tracker.effective_tumbal('a', 10), 0.0)
+        self.assertAlmostEqual(tracker.effective_tumbal('b', 10), 1.0)
+        # The reset entry's decay events must not touch a fresh karma count
+        tracker.record_destruction('a', 50)
+        self.assertAlmostEqual(tracker.effective_tumbal('a', 100), 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
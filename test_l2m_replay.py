@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Counterfactual Replay Tests
+Reproducible replays that do not depend on how the log is chunked
+"""
+
+import unittest
+
+import numpy as np
+
+from l2m_master_optimizer import L2MEnhancementMasterSystem
+from l2m_replay import L2MCounterfactualReplay, session_starts
+
+POLICIES = {'no tumbal': 0, '5 tumbal': 5, '10 tumbal': 10, 'more at +8': {8: 10}}
+
+
+def make_log(steps, attempts=150, seed=7):
+    """Random outcomes for (character, grade, level, tumbal) steps, in attempt_log() order"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for character, grade, level, tumbal in sorted(steps):
+        for i, outcome in enumerate(rng.choice(3, size=attempts, p=[0.3, 0.45, 0.25])):
+            rows.append((character, grade, level, tumbal, False, outcome, 1e9 + i))
+    columns = list(zip(*rows))
+    return {
+        'character': np.array(columns[0], dtype=object),
+        'grade': np.array(columns[1], dtype=object),
+        'level': np.array(columns[2], dtype=np.int64),
+        'tumbal': np.array(columns[3], dtype=np.int64),
+        'event': np.array(columns[4], dtype=bool),
+        'outcome': np.array(columns[5], dtype=np.int8),
+        'timestamp': np.array(columns[6], dtype=float)
+    }
+
+
+class L2MCounterfactualReplayTest(unittest.TestCase):
+    """Replays of one synthetic log of three characters' sessions"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.rate_table = L2MEnhancementMasterSystem().rate_table
+        cls.log = make_log([('a', 'rare', 7, 5), ('a', 'rare', 8, 3),
+                            ('b', 'unique', 8, 8), ('c', 'rare', 6, 0)])
+
+    def replay(self, chunk_size=100_000, seed=None, log=None):
+        replayer = L2MCounterfactualReplay(self.rate_table, chunk_size=chunk_size)
+        return replayer.replay(self.log if log is None else log, POLICIES, seed)
+
+    def assertSameResults(self, first, second):
+        self.assertEqual(list(first), list(second))
+        for name in first:
+            for key, value in first[name].items():
+                if isinstance(value, float):
+                    self.assertAlmostEqual(value, second[name][key], places=6, msg=f"{name} {key}")
+                else:
+                    self.assertEqual(value, second[name][key], msg=f"{name} {key}")
+
+    def test_repeated_replays_are_identical(self):
+        self.assertSameResults(self.replay(), self.replay())
+        self.assertSameResults(self.replay(seed=11), self.replay(seed=11))
+
+    def test_chunk_size_does_not_change_results(self):
+        whole = self.replay()
+        for chunk_size in (1, 17, 150):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertSameResults(whole, self.replay(chunk_size))
+
+    def test_uniforms_are_seeded_from_the_outcomes(self):
+        other = make_log([('a', 'rare', 7, 5), ('a', 'rare', 8, 3),
+                          ('b', 'unique', 8, 8), ('c', 'rare', 6, 0)], seed=8)
+        self.assertNotEqual(self.replay(log=other)['10 tumbal']['diamonds'],
+                            self.replay()['10 tumbal']['diamonds'])
+
+    def test_actual_play_reproduces_history(self):
+        actual = self.replay()['actual']
+        outcome = self.log['outcome']
+        self.assertEqual(actual['attempts'], outcome.size)
+        self.assertEqual(actual['successes'], int((outcome == 0).sum()))
+        self.assertEqual(actual['destroyed'], int((outcome == 2).sum()))
+        self.assertEqual(actual['sessions'], session_starts(self.log).size)
+        self.assertEqual(actual['diamond_delta'], 0)
+
+    def test_more_tumbal_never_takes_more_attempts(self):
+        # Common random numbers: a higher success rate ends every session no later
+        results = self.replay()
+        for fewer, more in (('no tumbal', '5 tumbal'), ('5 tumbal', '10 tumbal')):
+            self.assertLessEqual(results[more]['attempts'], results[fewer]['attempts'])
+            self.assertLessEqual(results[more]['destroyed'], results[fewer]['destroyed'])
+
+    def test_unknown_grade(self):
+        log = dict(self.log, grade=np.full(self.log['grade'].size, 'mythic', dtype=object))
+        with self.assertRaises(ValueError):
+            self.replay(log=log)
+
+
+if __name__ == '__main__':
+    unittest.main()
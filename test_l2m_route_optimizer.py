@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Route Optimizer Tests
+Farming route DP against brute force, level eligibility and guild batching
+"""
+
+import unittest
+from datetime import datetime
+from itertools import product
+
+import numpy as np
+
+from l2m_epic_drop_analyzer import L2MEpicDropAnalyzer
+
+START = datetime(2026, 3, 3, 18, 0)
+
+
+class L2MRouteOptimizerTest(unittest.TestCase):
+    """Plans from a fixed server time, so they do not depend on the clock"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = L2MEpicDropAnalyzer()
+        cls.optimizer = cls.analyzer.route_optimizer
+
+    def brute_force(self, yields, eligible):
+        travel = self.optimizer.travel
+        best = -np.inf
+        for path in product(np.flatnonzero(eligible), repeat=yields.shape[0]):
+            total = sum(yields[t, m] * (1 - travel if t == 0 or path[t - 1] != m else 1)
+                        for t, m in enumerate(path))
+            best = max(best, total)
+        return best
+
+    def test_dp_matches_brute_force(self):
+        rng = np.random.default_rng(3)
+        M = len(self.optimizer.maps)
+        levels = [self.optimizer.min_level.min(), float(np.median(self.optimizer.min_level)), 99]
+        for trial in range(5):
+            yields = rng.random((4, M)) * rng.random(M)
+            path, totals, eligible = self.optimizer._solve(yields, levels)
+            for row in range(len(levels)):
+                with self.subTest(trial=trial, level=levels[row]):
+                    self.assertTrue(eligible[row][path[row]].all())
+                    self.assertAlmostEqual(totals[row], self.brute_force(yields, eligible[row]))
+
+    def test_route_respects_level_margin(self):
+        margin = self.optimizer.level_margin
+        for level in (30, 45, 55, 70):
+            plan = self.analyzer.plan_farming_route(level, hours=6, start=START)
+            for segment in plan['route']:
+                m = self.optimizer._map_index[segment['map']]
+                self.assertGreaterEqual(level, self.optimizer.min_level[m] - margin)
+                self.assertLessEqual(level, self.optimizer.upper_level[m])
+
+    def test_top_bracket_has_no_upper_bound(self):
+        top = int(np.argmax(self.optimizer.max_level))
+        level = self.optimizer.max_level[top] + self.optimizer.level_margin + 20
+        _, _, eligible = self.optimizer._solve(np.zeros((1, len(self.optimizer.maps))), [level])
+        self.assertTrue(eligible[0, top])
+
+    def test_guild_plans_match_single_plans(self):
+        members = [
+            {'name': 'A', 'level': 40, 'buffs': ['party']},
+            {'name': 'B', 'level': 58, 'buffs': None},
+            {'name': 'C', 'level': 58, 'buffs': ['party']},
+            {'name': 'D', 'level': 65, 'buffs': ['event', 'party']}
+        ]
+        plans = self.optimizer.plan_guild(members, hours=5, start=START)
+        for member, plan in zip(members, plans):
+            single = self.optimizer.plan(member['level'], hours=5, start=START, buffs=member['buffs'])
+            self.assertEqual(plan['name'], member['name'])
+            self.assertAlmostEqual(plan['expected_epics'], single['expected_epics'])
+            self.assertEqual([s['map'] for s in plan['route']], [s['map'] for s in single['route']])
+
+    def test_segments_add_up_to_the_plan(self):
+        plan = self.analyzer.plan_farming_route(55, hours=8, start=START, buffs=['party'])
+        self.assertAlmostEqual(sum(s['expected_epics'] for s in plan['route']), plan['expected_epics'])
+        self.assertEqual(plan['route'][0]['start'], START)
+        for before, after in zip(plan['route'], plan['route'][1:]):
+            self.assertEqual(before['end'], after['start'])
+            self.assertNotEqual(before['map'], after['map'])
+
+
+if __name__ == '__main__':
+    unittest.main()
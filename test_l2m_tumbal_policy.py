@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Lineage2M Tumbal Policy Tests
+DP policy checked against the Markov solver and its own invariants
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from l2m_master_optimizer import L2MEnhancementMasterSystem
+from l2m_tumbal_policy import L2MTumbalPolicySolver, STOP, PROCEED, RESTART
+
+
+class L2MTumbalPolicyTest(unittest.TestCase):
+    """Policies solved in memory only (no disk cache) unless a test says so"""
+
+    @classmethod
+    def setUpClass(cls):
+        app = L2MEnhancementMasterSystem()
+        cls.rates = (app.enhancement_rates, app.destruction_rates)
+        cls.solver = L2MTumbalPolicySolver(*cls.rates, cache_dir=None)
+        cls.markov = app.markov_solver
+
+    def test_without_fodder_matches_markov_solver(self):
+        # Only the target is worth anything, so proceeding is always best
+        prices = {7: 0, 8: 0, 9: 0, 10: 100_000}
+        policy = self.solver.solve('rare', start=7, target=10, max_fodder=0, prices=prices)
+        self.assertTrue(np.all(policy.policy[0, :-1, 0, 0] == PROCEED))
+        exact = self.markov.solve('rare', 7, 10)
+        expected = exact['success_probability'] * prices[10] - exact['expected_diamonds']
+        self.assertAlmostEqual(policy.value(0, 0, 7), expected, places=6)
+
+    def test_more_fodder_never_hurts(self):
+        policy = self.solver.solve('unique', start=7, target=9, max_fodder=12)
+        self.assertTrue(np.all(np.diff(policy.values, axis=0) >= -1e-9))
+
+    def test_values_at_least_stop_price(self):
+        policy = self.solver.solve('unique', start=7, target=9, max_fodder=12)
+        prices = policy.params['prices']
+        for level in range(7, 9):
+            self.assertTrue(np.all(policy.values[:, level - 7] >= prices[level] - 1e-9))
+
+    def test_karma_makes_proceeding_more_attractive(self):
+        policy = self.solver.solve('unique', start=8, target=9, max_fodder=10)
+        actions = [policy.action_code(karma, 5, 8) for karma in range(policy.max_karma + 1)]
+        first = actions.index(PROCEED)
+        self.assertTrue(all(code in (STOP, RESTART) for code in actions[:first]))
+        self.assertTrue(all(code == PROCEED for code in actions[first:]))
+
+    def test_fodder_value_discourages_burning(self):
+        prices = {8: 0, 9: 30000}
+        free = self.solver.solve('unique', start=8, target=9, max_fodder=10, prices=prices)
+        costly = self.solver.solve('unique', start=8, target=9, max_fodder=10, prices=prices,
+                                   fodder_value=2000)
+        self.assertLess(costly.value(0, 10, 8), free.value(0, 10, 8))
+        self.assertLessEqual(int((costly.policy == RESTART).sum()), int((free.policy == RESTART).sum()))
+
+    def test_disk_cache_round_trip(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            solved = L2MTumbalPolicySolver(*self.rates, cache_dir=cache_dir).solve('rare', 7, 9, 6)
+            loaded = L2MTumbalPolicySolver(*self.rates, cache_dir=cache_dir).solve('rare', 7, 9, 6)
+        np.testing.assert_array_equal(solved.policy, loaded.policy)
+        np.testing.assert_allclose(solved.values, loaded.values)
+
+    def test_bad_ranges(self):
+        policy = self.solver.solve('rare', start=7, target=9, max_fodder=4)
+        with self.assertRaises(ValueError):
+            policy.action(0, 5, 7)
+        with self.assertRaises(ValueError):
+            policy.action(0, 2, 6)
+        with self.assertRaises(ValueError):
+            self.solver.solve('legendary', start=7, target=9)
+
+
+if __name__ == '__main__':
+    unittest.main()